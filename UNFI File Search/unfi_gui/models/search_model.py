@@ -8,12 +8,12 @@ from unfi_api.search.result import Result, Results, ProductResult
 from unfi_api.utils.jobs import Job
 from unfi_api.utils.string import divide_list_into_chunks_by_character_limit
 from unfi_api.utils.threading import threader
+# the search throttling comes from myunfi, so the GUI needs myunfi installed next to unfi_api
+from myunfi.http_wrappers.rate_limit import RateLimiter
 from ..settings import search_chunk_size
 from ..controller import Controller
 from ..exceptions import UnfiApiClientNotSetException
 from ..model import TkModel
-import time
-import random
 
 if TYPE_CHECKING:
     from ..controllers.search import SearchController
@@ -46,6 +46,9 @@ class SearchModel(TkModel):
         self.results: Results = Results()
         self.search_chunk_size = search_chunk_size
         self.description_to_result_map = {}
+        # shared by every search thread so concurrent chunks stay under the portal's request budget,
+        # built here rather than on import so it picks up the rate_limit_* config of this run
+        self.rate_limiter = RateLimiter()
         # self.register_event_handler("onSearchComplete", lambda x: controller.stop_cancelled_jobs())
 
     @classmethod
@@ -103,10 +106,13 @@ class SearchModel(TkModel):
             nonlocal found_count
             self.trigger_event("onSearch", chunk)
             searched_count += len(chunk)
-            # sleep for random float interval between 0.5 and 1 seconds
-            time.sleep(random.uniform(0.5, 1))
-            # result = chunk
-            result = self.client.search(" ".join(chunk))
+            start = self.rate_limiter.acquire()
+            try:
+                result = self.client.search(" ".join(chunk))
+            except Exception:
+                self.rate_limiter.release(start, error=True)
+                raise
+            self.rate_limiter.release(start)
             found_count += len(result.product_results)
             self.add_result(result)
             if progress_callback:
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from myunfi.catalog import CatalogCrawler, CatalogSnapshot
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
+
+
+class ChangedCatalog(SyntheticCatalog):
+    """
+    A later state of the same catalog, with some items discontinued.
+    """
+
+    def __init__(self, *args, discontinued=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.discontinued = set(discontinued)
+
+    def search_item(self, index: int) -> dict:
+        item = super().search_item(index)
+        if index in self.discontinued:
+            item["statusCode"] = "Discontinued"
+        return item
+
+
+class MissingBrandServer(MockMyUNFIServer):
+    """
+    brands/grouped leaves one brand out, as if the API didn't return it.
+    """
+
+    def __init__(self, *args, missing_brand: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.missing_brand = missing_brand
+
+    def brands_grouped(self, query: dict, **kwargs):
+        status, groups = super().brands_grouped(query, **kwargs)
+        for group in groups:
+            group["brands"] = [brand for brand in group["brands"] if brand["id"] != self.missing_brand]
+        return status, groups
+
+
+class TestCatalogCrawler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = CatalogSnapshot(Path(self.directory.name) / "catalog.sqlite")
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.directory.cleanup()
+
+    def crawl(self, catalog: SyntheticCatalog, server: MockMyUNFIServer = None):
+        with server or MockMyUNFIServer(catalog) as server:
+            session = server.install(RequestsSession.create_session(rate_limiter=None))
+            stats = CatalogCrawler(session, self.snapshot, brands_per_search=10).crawl()
+        return stats, server
+
+    def test_full_then_delta_crawl(self):
+        stats, server = self.crawl(SyntheticCatalog(600, brands=30))
+        self.assertEqual((stats.items, stats.new, stats.details_fetched, stats.catalog_total), (600, 600, 600, 600))
+        self.assertEqual(len(self.snapshot), 600)
+
+        stats, server = self.crawl(ChangedCatalog(600, brands=30, discontinued=[5, 17]))
+        self.assertEqual((stats.new, stats.changed, stats.unchanged), (0, 2, 598))
+        self.assertEqual(stats.details_fetched, 2)
+        # brands, 3 brand group searches, the catalog total and 2 products
+        self.assertEqual(server.request_count, 1 + 3 + 1 + 2)
+        self.assertEqual(self.snapshot.get_summary("100005").status_code, "Discontinued")
+
+        stats, server = self.crawl(ChangedCatalog(590, brands=30, discontinued=[5, 17]))
+        self.assertEqual((stats.removed, stats.details_fetched), (10, 0))
+        self.assertEqual(len(self.snapshot), 590)
+        self.assertEqual(self.snapshot.last_crawl()["removed"], 10)
+
+    def test_incomplete_crawl_removes_nothing(self):
+        stats, _ = self.crawl(SyntheticCatalog(300, brands=10))
+        self.assertTrue(stats.complete)
+        catalog = SyntheticCatalog(300, brands=10)
+        stats, _ = self.crawl(catalog, MissingBrandServer(catalog, missing_brand=30003))
+        self.assertEqual((stats.items, stats.catalog_total, stats.removed), (270, 300, 0))
+        self.assertFalse(stats.complete)
+        self.assertFalse(self.snapshot.last_crawl()["complete"])
+        self.assertEqual(len(self.snapshot), 300)
+        self.assertEqual(len(self.snapshot.item_numbers(brand_id=30003)), 30)
+
+    def test_lookups(self):
+        self.crawl(SyntheticCatalog(100, brands=5))
+        self.assertEqual(len(self.snapshot.item_numbers(brand_id=30001)), 20)
+        with mock.patch("myunfi.models.items.product.replace_abbreviations", False):
+            product = self.snapshot.get_product("100042")
+        self.assertEqual(product.brand_id, 30002)
+
+
+if __name__ == '__main__':
+    unittest.main()
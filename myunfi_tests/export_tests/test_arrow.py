@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from myunfi.export.arrow import LINE_ITEM_COLUMNS, PRODUCT_COLUMNS, line_item_columns, pa, product_columns
+from myunfi.models.invoices.invoice import Invoice
+from myunfi.models.items.product import Product, Products, Promotion
+from myunfi.testing import SyntheticCatalog
+
+
+class ArrowExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("myunfi.models.items.product.replace_abbreviations", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.catalog = SyntheticCatalog(50, invoices=5)
+        self.products = Products()
+        self.products.extend(Product.parse_obj(self.catalog.product(index)) for index in range(50))
+        self.products["100003"].promotions = [Promotion(description="Monthly Promotion", discountValue=1.5)]
+        self.invoices = [Invoice.parse_obj(self.catalog.invoice(number)) for number in range(5)]
+
+
+class TestColumns(ArrowExportTestCase):
+
+    def test_product_columns(self):
+        columns = product_columns(self.products)
+        self.assertEqual(list(columns), [name for name, _ in PRODUCT_COLUMNS])
+        self.assertTrue(all(len(values) == 50 for values in columns.values()))
+        self.assertEqual(columns["item_number"][3], "100003")
+        self.assertEqual(columns["net_price"][3], self.catalog.price(3))
+        self.assertEqual(columns["promotions"][3][0]["discount_value"], 1.5)
+        self.assertEqual(columns["promotions"][4], [])
+
+    def test_schema_does_not_depend_on_data(self):
+        self.assertEqual(list(product_columns([])), list(product_columns(self.products)))
+
+    def test_line_item_columns(self):
+        columns = line_item_columns(self.invoices)
+        self.assertEqual(list(columns), [name for name, _ in LINE_ITEM_COLUMNS])
+        lines = sum(len(invoice.line_items) for invoice in self.invoices)
+        self.assertEqual(len(columns["item_number"]), lines)
+        self.assertEqual(columns["invoice_date"][0], date(2022, 1, 1))
+        self.assertEqual(columns["line_number"][:3], [1, 1, 2])
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestArrowTables(ArrowExportTestCase):
+
+    def test_parquet_round_trip(self):
+        from myunfi.export.arrow import products_to_table, read_parquet, write_parquet
+        table = products_to_table(self.products)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [write_parquet(table, Path(directory) / f"catalog-{day}.parquet") for day in range(2)]
+            loaded = read_parquet(paths)
+        self.assertEqual(loaded.schema, table.schema)
+        self.assertEqual(loaded.num_rows, 100)
+        self.assertEqual(loaded.column("upc").type, pa.int64())
+
+    def test_line_items_table(self):
+        from myunfi.export.arrow import line_items_to_table
+        table = line_items_to_table(self.invoices)
+        self.assertEqual(table.column("invoice_date").type, pa.date32())
+        self.assertEqual(table.num_rows, sum(len(invoice.line_items) for invoice in self.invoices))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import csv
+import io
+import unittest
+from unittest import mock
+
+from myunfi.export.delimited import write_invoice_summaries, write_line_items, write_products
+from myunfi.models.invoices import InvoiceList
+from myunfi.models.invoices.invoice import Invoice, LINE_ITEM_COLUMN_ORDER
+from myunfi.models.items.product import Product, Products
+from myunfi.testing import SyntheticCatalog
+
+
+def read(out: io.StringIO, delimiter: str = ",") -> list:
+    return list(csv.reader(io.StringIO(out.getvalue()), delimiter=delimiter))
+
+
+class TestDelimitedExport(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("myunfi.models.items.product.replace_abbreviations", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.catalog = SyntheticCatalog(40, invoices=6)
+
+    def test_products_tsv(self):
+        products = Products()
+        products.extend(Product.parse_obj(self.catalog.product(index)) for index in range(40))
+        out = io.StringIO()
+        self.assertEqual(write_products(products, out, delimiter="\t"), 40)
+        rows = read(out, "\t")
+        self.assertEqual(len(rows), 41)
+        self.assertEqual(rows[0][0], "upc_no_check")
+        self.assertIn("Natural", rows[0])
+        self.assertEqual(rows[1][rows[0].index("item_number")], "100000")
+        self.assertTrue(all(len(row) == len(rows[0]) for row in rows))
+
+    def test_line_items_follow_column_order(self):
+        invoices = [Invoice.parse_obj(self.catalog.invoice(number)) for number in range(6)]
+        out = io.StringIO()
+        count = write_line_items(invoices, out)
+        rows = read(out)
+        self.assertEqual(count, sum(len(invoice.line_items) for invoice in invoices))
+        self.assertEqual(rows[0][1:], sorted(LINE_ITEM_COLUMN_ORDER, key=LINE_ITEM_COLUMN_ORDER.get))
+        self.assertEqual(rows[1][:2], [invoices[0].invoice_number, "1"])
+
+    def test_invoice_summaries(self):
+        invoice_list = InvoiceList.parse_obj(
+            {"invoices": [self.catalog.invoice_listing(number) for number in range(6)]})
+        out = io.StringIO()
+        self.assertEqual(write_invoice_summaries(invoice_list, out), 6)
+        rows = read(out)
+        self.assertEqual(rows[1][rows[0].index("invoice_date")], "2022-01-01")
+        self.assertEqual(rows[2][rows[0].index("item_count")], "2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from openpyxl import load_workbook
+
+from myunfi.export.excel import export_products
+from myunfi.export.rows import product_header, product_row
+from myunfi.models.items.product import Product, Products, Promotion
+from myunfi.testing import SyntheticCatalog
+
+
+class TestExcelExport(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("myunfi.models.items.product.replace_abbreviations", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        catalog = SyntheticCatalog(30)
+        self.products = Products()
+        self.products.extend(Product.parse_obj(catalog.product(index)) for index in range(30))
+        self.products["100002"].promotions = [Promotion(description="Monthly Promotion", discountValue=2.0)]
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def read(self, path: Path) -> list:
+        workbook = load_workbook(path, read_only=True)
+        rows = [list(row) for row in workbook.active.iter_rows(values_only=True)]
+        workbook.close()
+        return rows
+
+    def test_header_and_rows(self):
+        rows = self.read(export_products(self.products, Path(self.directory.name) / "products.xlsx"))
+        self.assertEqual(len(rows), 31)
+        self.assertEqual(rows[0][:4], ["UPC No Check", "Case UPC", "Brand Name", "Description"])
+        self.assertIn("Monthly Promotion Discount Value", rows[0])
+        self.assertIn("Natural", rows[0])
+        column = rows[0].index("Item Number")
+        self.assertEqual([row[column] for row in rows[1:]], [product.item_number for product in self.products])
+
+    def test_header_without_flattening(self):
+        header = product_header(self.products)
+        columns = {}
+        for product in self.products:
+            columns.update(dict.fromkeys(key for key, value in product_row(product).items() if value is not None))
+        self.assertLessEqual(set(columns), set(header))
+        self.assertEqual(header[:3], ["upc_no_check", "case_upc", "brand_name"])
+        self.assertIn("Monthly Promotion discount_value", header)
+
+    def test_rows_stream_without_header(self):
+        with mock.patch("myunfi.export.excel.write_workbook") as write_workbook:
+            export_products(iter(self.products), Path(self.directory.name) / "products.xlsx")
+        rows, header = write_workbook.call_args.args
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual(len(list(rows)), 30)
+
+    def test_streams_with_header(self):
+        header = ["item_number", "wholesale_price"]
+        products = (product for product in self.products)
+        rows = self.read(export_products(products, Path(self.directory.name) / "streamed.xlsx", header=header))
+        self.assertEqual(rows[0], ["Item Number", "Wholesale Price"])
+        self.assertEqual(rows[3], ["100002", self.products["100002"].wholesale_price])
+        self.assertEqual(product_row(self.products["100002"])["Monthly Promotion discount_value"], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,15 @@
+import requests
+
+
+def make_response(status_code: int = 200, content: bytes = b"", headers: dict = None,
+                  url: str = None) -> requests.Response:
+    """
+    A requests.Response with its content already read, for mocking Session.request.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = content
+    response._content_consumed = True
+    response.url = url
+    return response
@@ -0,0 +1,94 @@
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from myunfi.config import api_base_url
+from myunfi.http_wrappers.factories import HTTPWrapperFactory
+from myunfi.models.items.product import Product
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from myunfi.http_wrappers.http_aiohttp import AioHTTPResult, AioHTTPSession
+except ImportError:
+    web = None
+
+assets_path = Path(__file__).parents[1] / "Assets"
+item_json = assets_path / "Items" / "item.json"
+
+
+def make_app():
+    item = json.loads(item_json.read_text())
+
+    async def echo(request: web.Request):
+        body = await request.text()
+        return web.json_response({"method": request.method, "query": dict(request.query), "body": body,
+                                  "header": request.headers.get("x-test")})
+
+    async def product(request: web.Request):
+        return web.json_response(item)
+
+    app = web.Application()
+    app.router.add_route("*", "/echo", echo)
+    app.router.add_get("/shopping/api/customers/{account_id}/items/{item_number}", product)
+    return app
+
+
+class RewritingAioHTTPSession(AioHTTPSession):
+    """
+    Sends requests for the live portal to the local test server instead.
+    """
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    async def request(self, method, url, allow_sleep=True, **kwargs):
+        return await super().request(method, url.replace(api_base_url, self.base_url), allow_sleep, **kwargs)
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class TestAioHTTPSession(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = TestServer(make_app())
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_factory_selects_aiohttp(self):
+        factory = HTTPWrapperFactory("aiohttp")
+        self.assertIs(factory.get_session(), AioHTTPSession)
+        self.assertIs(factory.get_result(), AioHTTPResult)
+
+    async def test_create_session_pool(self):
+        async with AioHTTPSession.create_session(pool_maxsize=5, keep_alive=False) as session:
+            connector = session.get_session().connector
+            self.assertEqual(connector.limit_per_host, 5)
+            self.assertTrue(connector.force_close)
+
+    async def test_session_get(self):
+        async with AioHTTPSession(headers={"x-test": "yes"}) as session:
+            response = await session.get(self.base_url + "/echo", params={"page": 0, "flag": True, "empty": None})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["query"], {"page": "0", "flag": "True"})
+        self.assertEqual(response.get_json()["header"], "yes")
+
+    async def test_request_execute(self):
+        async with AioHTTPSession() as session:
+            request = session.create_request("POST", self.base_url + "/echo", json={"itemNumbers": ["1"]})
+            await request.execute()
+        self.assertTrue(request.executed)
+        self.assertEqual(request.status_code, 200)
+        self.assertEqual(json.loads(request.get_json().json["body"]), {"itemNumbers": ["1"]})
+
+    async def test_product_fetch_async(self):
+        with mock.patch("myunfi.models.items.product.replace_abbreviations", False):
+            async with RewritingAioHTTPSession(self.base_url) as session:
+                product = await Product(itemNumber="58082").fetch_async(session)
+        self.assertTrue(product.is_fetched())
+        self.assertEqual(product.brand_name, "Purezero")
+        self.assertEqual(product.qty_on_hand, 66)
@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from myunfi.http_wrappers.cache import CachedResult, ResponseCache
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi_tests.http_tests import make_response
+
+product_url = "https://www.myunfi.com/shopping/api/customers/001014/items/61003?isQtyOnHandSupported=true"
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.directory.name, ttls=[(r"/items/quantityOnHand", 0), (r"/items/", 60)],
+                                   default_ttl=0)
+        self.session = RequestsSession(requests.Session(), cache=self.cache)
+        self.session.session.request = mock.Mock()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cache_key(self):
+        key = self.cache.cache_key("GET", product_url, {"b": 2, "a": 1}, "application/json")
+        self.assertEqual(key, self.cache.cache_key("get", product_url, [("a", 1), ("b", 2)], "application/json"))
+        self.assertNotEqual(key, self.cache.cache_key("GET", product_url, {"a": 1}, "application/json"))
+        self.assertNotEqual(key, self.cache.cache_key("GET", product_url, {"b": 2, "a": 1}, "application/pdf"))
+
+    def test_ttls(self):
+        self.assertEqual(self.cache.ttl_for(product_url), 60)
+        self.assertIsNone(self.cache.lookup("GET", product_url.replace("61003", "quantityOnHand")))
+        self.assertIsNone(self.cache.lookup("POST", product_url))
+        self.assertIsNone(self.cache.lookup("GET", "https://www.myunfi.com/"))
+
+    def test_default_ttls(self):
+        cache = ResponseCache(self.directory.name)
+        self.assertEqual(cache.ttl_for(product_url), 5 * 60)
+        self.assertEqual(cache.ttl_for(product_url.replace("=true", "=false")), 24 * 60 * 60)
+        self.assertEqual(cache.ttl_for(product_url.replace("61003", "quantityOnHand")), 0)
+
+    def test_fresh_entry_served_from_disk(self):
+        self.session.session.request.return_value = make_response(
+            200, b'{"itemNumber": "61003"}', {"Content-Type": "application/json"}, product_url)
+        first = self.session.get(product_url, allow_sleep=False)
+        second = self.session.get(product_url, allow_sleep=False)
+        self.assertEqual(self.session.session.request.call_count, 1)
+        self.assertIsInstance(second, CachedResult)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.get_json(), {"itemNumber": "61003"})
+        self.assertEqual(second.get_content_type(), "application/json")
+        self.session.get(product_url, allow_sleep=False, use_cache=False)
+        self.assertEqual(self.session.session.request.call_count, 2)
+
+    def test_stale_entry_revalidated(self):
+        self.session.session.request.return_value = make_response(
+            200, b'{"itemNumber": "61003"}', {"Content-Type": "application/json", "ETag": '"v1"'}, product_url)
+        self.session.get(product_url, allow_sleep=False)
+        lookup = self.cache.lookup("GET", product_url, accept=self.session.headers.get("accept"))
+        lookup.entry.stored_at -= 120
+        self.cache.write(lookup.entry)
+
+        self.session.session.request.return_value = make_response(304, url=product_url)
+        result = self.session.get(product_url, allow_sleep=False)
+        sent_headers = self.session.session.request.call_args.kwargs["headers"]
+        self.assertEqual(sent_headers["If-None-Match"], '"v1"')
+        self.assertIsInstance(result, CachedResult)
+        self.assertEqual(result.get_json(), {"itemNumber": "61003"})
+        self.assertTrue(self.cache.lookup("GET", product_url, accept=self.session.headers.get("accept")).fresh)
+
+
+if __name__ == '__main__':
+    unittest.main()
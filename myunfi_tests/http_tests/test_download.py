@@ -0,0 +1,73 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+from myunfi.api.shopping.orders import download_invoice
+from myunfi.http_wrappers.download import write_chunks
+from myunfi.http_wrappers.exceptions import NonPDFResponseException
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.models.items.product import Image
+from myunfi_tests.http_tests import make_response
+
+placeholder_path = Path(__file__).parents[2] / "src" / "myunfi" / "models" / "items" / "placeholder_image.jpg"
+image_url = "https://products.unfi.com/api/Images/GetByUPC?upc=00856873008205&version=3"
+jpeg = {"Content-Type": "image/jpeg"}
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.session = RequestsSession(requests.Session(), rate_limiter=None)
+        self.session.session.request = mock.Mock()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_download_streams_to_file(self):
+        content = b"x" * 200_000
+        self.session.session.request.return_value = make_response(200, content, {
+            "Content-Type": "application/pdf", "Content-Disposition": 'attachment; filename="inv.pdf"'})
+        download = self.session.download("https://www.myunfi.com/file", self.path, chunk_size=1024)
+        self.assertTrue(self.session.session.request.call_args.kwargs["stream"])
+        self.assertEqual(download.path, self.path / "inv.pdf")
+        self.assertEqual(download.path.read_bytes(), content)
+        self.assertEqual((download.size, download.md5), (len(content), hashlib.md5(content).hexdigest()))
+
+    def test_failed_write_leaves_no_file(self):
+        def chunks():
+            yield b"partial"
+            raise requests.exceptions.ChunkedEncodingError()
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            write_chunks(chunks(), self.path / "image.jpg")
+        self.assertEqual(list(self.path.iterdir()), [])
+
+    def test_image_download_to_file(self):
+        image = Image(url=image_url)
+        self.session.session.request.return_value = make_response(200, b"\xff\xd8 jpeg", jpeg, image_url)
+        saved = image.download_to_file(self.session, self.path / "1.jpg")
+        self.assertEqual(saved.read_bytes(), b"\xff\xd8 jpeg")
+        self.assertIsNone(image.image_result)
+
+        self.session.session.request.return_value = make_response(200, placeholder_path.read_bytes(), jpeg, image_url)
+        self.assertIsNone(image.download_to_file(self.session, self.path / "2.jpg"))
+        self.assertTrue(image.is_placeholder)
+        self.assertFalse((self.path / "2.jpg").exists())
+
+    def test_invoice_download_checks_type(self):
+        self.session.session.request.return_value = make_response(200, b"{}", {"Content-Type": "application/json"})
+        with self.assertRaises(NonPDFResponseException):
+            download_invoice(self.session, "001014", "68307090-021", self.path / "invoice.pdf")
+        self.assertFalse((self.path / "invoice.pdf").exists())
+        headers = self.session.session.request.call_args.kwargs["headers"]
+        self.assertEqual(headers["accept"], "application/pdf")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from myunfi.api.shopping.items import fetch_items, fetch_qty_on_hand
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.http_wrappers.retry import RetryPolicy
+from myunfi.models.items.product import Product
+from myunfi.models.items.search import Facets, Page, ProductSearch, ResultItem
+from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
+
+account_id = "001014"
+
+
+class TestSyntheticCatalog(unittest.TestCase):
+
+    def test_deterministic_search(self):
+        catalog = SyntheticCatalog(500, brands=20)
+        self.assertEqual(len(catalog.search("*")), 500)
+        self.assertEqual(catalog.search(catalog.item_number(42)), [42])
+        self.assertEqual(catalog.search(catalog.upc(7)), [7])
+        brand_matches = catalog.search("*", brands=[catalog.brand_id(3)])
+        self.assertEqual(len(brand_matches), 25)
+        self.assertEqual(SyntheticCatalog(500, brands=20).search("kale"), catalog.search("kale"))
+
+
+class TestMockMyUNFIServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockMyUNFIServer(SyntheticCatalog(1000)).start()
+        self.session = self.server.install(RequestsSession.create_session(rate_limiter=None))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_search_paging(self):
+        data = fetch_items(self.session, account_id, 6, search_term="*", page_number=3, page_size=96).get_json()
+        page = Page.parse_obj(data["page"])
+        self.assertEqual((page.total_elements, page.total_pages, page.number_of_elements), (1000, 11, 96))
+        Facets.parse_obj(data["facets"])
+        items = [ResultItem.parse_obj(item) for item in data["items"]]
+        self.assertEqual(items[0].item_number, "100288")
+
+    def test_product_search(self):
+        searcher = ProductSearch()
+        searcher.set_session(self.session)
+        results = searcher.search(search_term="100001 100002 kale", page_size=100)
+        self.assertEqual(searcher.total_elements, len(results))
+        self.assertIn("100001", [result.item_number for result in results.results])
+        self.assertEqual(sum(brand.count for brand in searcher.facets.brands), len(results))
+
+    def test_product_and_qty_on_hand(self):
+        with mock.patch("myunfi.models.items.product.replace_abbreviations", False):
+            product = Product(itemNumber="100010").fetch(self.session)
+        self.assertEqual(product.brand_name, "Brand10")
+        data = fetch_qty_on_hand(self.session, account_id, ["100010", "100011"]).response.json()
+        self.assertEqual([qty["quantityOnHand"] for qty in data["quantitiesOnHand"]], [130, 143])
+        self.assertEqual(self.server.stats()["statuses"], {200: 2})
+
+    def test_bad_request_body(self):
+        url = f"{self.server.url}/shopping/api/customers/{account_id}/items/quantityOnHand"
+        response = self.session.get_session().post(url, data=b"{bad")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Invalid JSON body", response.json()["message"])
+        response = self.session.get_session().post(url, json={"itemNumbers": None})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("message", response.json())
+        self.assertEqual(self.server.stats()["statuses"], {400: 1, 500: 1})
+
+    @mock.patch("myunfi.http_wrappers.http_requests.time.sleep")
+    def test_throttling(self, sleep):
+        self.server.throttle_rate = 2
+        self.server._tokens = 2
+        self.session.retry_policy = RetryPolicy(max_attempts=1)
+        with self.assertRaises(requests.exceptions.HTTPError) as raised:
+            for _ in range(5):
+                fetch_items(self.session, account_id, 6, page_size=1)
+        self.assertEqual(raised.exception.response.status_code, 429)
+        self.assertEqual(raised.exception.response.headers["Retry-After"], "1")
+
+
+if __name__ == '__main__':
+    unittest.main()
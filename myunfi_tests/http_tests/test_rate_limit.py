@@ -0,0 +1,75 @@
+import threading
+import unittest
+from unittest import mock
+
+from myunfi.http_wrappers.rate_limit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sleep = mock.patch("myunfi.http_wrappers.rate_limit.time.sleep", side_effect=self.clock.sleep)
+        self.sleep.start()
+
+    def tearDown(self):
+        self.sleep.stop()
+
+    def make_limiter(self, **kwargs):
+        options = dict(requests_per_second=2, burst=2, initial_concurrency=4, min_concurrency=1,
+                       max_concurrency=8, latency_target=1.0, clock=self.clock)
+        options.update(kwargs)
+        return RateLimiter(**options)
+
+    def test_burst_then_sustained_rate(self):
+        limiter = self.make_limiter()
+        starts = []
+        for _ in range(4):
+            start = limiter.acquire()
+            starts.append(start)
+            limiter.release(start, 200)
+        self.assertEqual(starts, [0.0, 0.0, 0.5, 1.0])
+
+    def test_backs_off_once_per_window(self):
+        limiter = self.make_limiter()
+        first, second = limiter.acquire(), limiter.acquire()
+        limiter.release(first, 429)
+        self.assertEqual(limiter.concurrency_limit, 2)
+        limiter.release(second, 503)
+        self.assertEqual(limiter.concurrency_limit, 2)
+        limiter.release(limiter.acquire(), error=True)
+        self.assertEqual(limiter.concurrency_limit, 1)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_grows_on_fast_responses(self):
+        limiter = self.make_limiter(requests_per_second=1000, burst=1000, initial_concurrency=1)
+        for _ in range(10):
+            limiter.release(limiter.acquire(), 200)
+        self.assertGreater(limiter.concurrency_limit, 1)
+        self.assertLessEqual(limiter.concurrency_limit, 8)
+
+    def test_concurrency_limit_blocks(self):
+        limiter = self.make_limiter(requests_per_second=1000, burst=1000, initial_concurrency=1)
+        first = limiter.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(first, 200)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+from myunfi.http_wrappers.exceptions import ReplayMissException
+from myunfi.http_wrappers.factories import HTTPWrapperFactory
+from myunfi.http_wrappers.http_replay import CONNECTION_ERROR, Cassette, Interaction, ReplaySession
+from myunfi.http_wrappers.retry import RetryBudget, RetryPolicy
+from myunfi.models.items.product import Product
+
+assets_path = Path(__file__).parents[1] / "Assets"
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Set-Cookie", "session=secret")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestReplaySession(unittest.TestCase):
+
+    def test_factory_selects_replay(self):
+        self.assertIs(HTTPWrapperFactory("replay").get_session(), ReplaySession)
+
+    def test_fixture_replay(self):
+        session = ReplaySession(Cassette.from_fixtures(assets_path))
+        with mock.patch("myunfi.models.items.product.replace_abbreviations", False):
+            product = Product(itemNumber="58082").fetch(session)
+        self.assertEqual(product.brand_name, "Purezero")
+        invoice = session.get("https://www.myunfi.com/shopping/api/customers/001014/invoices/68307090-021",
+                              params={"transactionType": "INVOICE"})
+        self.assertEqual(invoice.response.json()["invoiceNumber"], "68307090-021")
+        self.assertEqual(session.request_count, 2)
+
+    def test_unrecorded_request(self):
+        session = ReplaySession(Cassette(), strict=True)
+        with self.assertRaises(ReplayMissException):
+            session.get("https://www.myunfi.com/missing")
+        with self.assertRaises(requests.exceptions.HTTPError):
+            ReplaySession(Cassette()).get("https://www.myunfi.com/missing")
+
+    def test_error_injection_is_seeded(self):
+        cassette = Cassette([Interaction("GET", "https://www.myunfi.com/ok", 200, body="ok")])
+
+        def statuses(seed):
+            session = ReplaySession(cassette, error_rate=0.5, seed=seed, retry_policy=RetryPolicy(max_attempts=1))
+            results = []
+            for _ in range(20):
+                try:
+                    results.append(session.get("https://www.myunfi.com/ok").status_code)
+                except requests.exceptions.HTTPError as e:
+                    results.append(e.response.status_code)
+            return results
+
+        self.assertEqual(statuses(3), statuses(3))
+        self.assertIn(503, statuses(3))
+        self.assertIn(200, statuses(3))
+
+    @mock.patch("myunfi.http_wrappers.http_requests.time.sleep")
+    def test_injected_connection_errors_are_retried(self, sleep):
+        cassette = Cassette([Interaction("GET", "https://www.myunfi.com/ok", 200, body="ok")])
+        session = ReplaySession(cassette, error_rate=0.5, error_status=CONNECTION_ERROR, seed=1,
+                                retry_policy=RetryPolicy(max_attempts=20, budget=RetryBudget(None)))
+        for _ in range(10):
+            self.assertEqual(session.get("https://www.myunfi.com/ok").text, "ok")
+        self.assertGreater(session.request_count, 10)
+
+    def test_record_and_replay(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/items/1?b=2&a=1"
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / "cassette.json"
+                recorder = ReplaySession(Cassette(path=path), record=True)
+                recorded = recorder.get(url).response.json()
+                recorder.cassette.save()
+
+                cassette = Cassette.load(path)
+                self.assertNotIn("Set-Cookie", cassette.interactions[0].headers)
+                replayed = ReplaySession(cassette).get(url.replace("b=2&a=1", "a=1&b=2"))
+                self.assertEqual(replayed.response.json(), recorded)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
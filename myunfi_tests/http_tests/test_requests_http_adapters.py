@@ -1,8 +1,16 @@
 import unittest
 import json
+import socket
+from unittest import mock
+
+import requests
 
 from myunfi.http_wrappers.http_adapters import HTTPAdapter, HTTPResponse, HTTPSession, HTTPRequest
-from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.http_wrappers.http_requests import PooledHTTPAdapter, RequestsSession
+from myunfi.http_wrappers.rate_limit import RateLimiter
+from myunfi.http_wrappers.retry import RetryPolicy
+from myunfi.api.shopping.items import fetch_product
+from myunfi.client.headers import api_headers
 
 
 class MockResult(object):
@@ -204,3 +212,58 @@ class TestRequestsSession(unittest.TestCase):
         self.assertEqual(response.text, '{"status": "ok"}')
         self.assertEqual(response.cookies, mock_requests_session.cookies)
         self.assertEqual(response.headers, mock_requests_session.headers)
+
+
+class TestRequestHeaders(unittest.TestCase):
+
+    def setUp(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = b'{"itemNumber": "61003"}'
+        response._content_consumed = True
+        self.session = RequestsSession(requests.Session())
+        self.session.session.request = mock.Mock(return_value=response)
+        self.session_headers = dict(self.session.headers)
+
+    def test_request_does_not_modify_session(self):
+        request = self.session.create_request("GET", "https://www.myunfi.com/", headers={"x-test": "1"},
+                                              cookies={"test": "1"})
+        request.execute()
+        self.assertEqual(dict(self.session.headers), self.session_headers)
+        self.assertEqual(len(self.session.cookies), 0)
+        self.assertEqual(self.session.session.request.call_args.kwargs["headers"], {"x-test": "1"})
+
+    def test_fetch_product_passes_endpoint_headers(self):
+        fetch_product(self.session, "61003", "001014")
+        self.assertEqual(dict(self.session.headers), self.session_headers)
+        self.assertIs(self.session.session.request.call_args.kwargs["headers"], api_headers)
+        with self.assertRaises(TypeError):
+            api_headers["x-unfi-host-system"] = "other"
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_create_session_pool(self):
+        session = RequestsSession.create_session(pool_maxsize=48, pool_block=True, tcp_nodelay=False)
+        adapter = session.get_session().get_adapter("https://www.myunfi.com/")
+        self.assertIsInstance(adapter, PooledHTTPAdapter)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 48)
+        self.assertTrue(adapter.poolmanager.connection_pool_kw["block"])
+        socket_options = adapter.poolmanager.connection_pool_kw["socket_options"]
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), socket_options)
+        self.assertNotIn((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1), socket_options)
+        self.assertEqual(session.headers["Connection"], "keep-alive")
+
+    def test_create_session_without_keep_alive(self):
+        session = RequestsSession.create_session(keep_alive=False)
+        self.assertEqual(session.headers["Connection"], "close")
+
+    def test_create_session_components(self):
+        session = RequestsSession.create_session()
+        self.assertIsInstance(session.rate_limiter, RateLimiter)
+        self.assertIsInstance(session.retry_policy, RetryPolicy)
+        session = RequestsSession.create_session(rate_limiter=None, retry_policy=None, cache=None)
+        self.assertIsNone(session.rate_limiter)
+        self.assertIsNone(session.retry_policy)
+        self.assertIsNone(session.cache)
@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from myunfi.http_wrappers import json_backend
+from myunfi.http_wrappers.exceptions import NonJSONResponseException
+from myunfi.http_wrappers.http_requests import RequestsResult
+from myunfi.http_wrappers.responses import JSONResponse
+
+
+def make_result(content: bytes, content_type="application/json"):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = content_type
+    response._content = content
+    response._content_consumed = True
+    response.encoding = "utf-8"
+    return RequestsResult(response)
+
+
+class TestJSONDecoding(unittest.TestCase):
+
+    def test_body_decoded_once(self):
+        result = make_result(b'{"items": [{"itemNumber": "61003"}]}')
+        with mock.patch.object(json_backend, "_loads", wraps=json_backend._loads) as loads:
+            response = JSONResponse(result)
+            self.assertIs(response.get_json(), response.json)
+            self.assertIs(JSONResponse(result).json, result.get_json())
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(response.json["items"][0]["itemNumber"], "61003")
+
+    def test_text_decoded_once(self):
+        result = make_result("café".encode("utf-8"), "text/plain")
+        self.assertIs(result.get_text(), result.text)
+        self.assertEqual(result.text, "café")
+
+    def test_non_json_body(self):
+        with self.assertRaises(NonJSONResponseException):
+            JSONResponse(make_result(b"<html></html>", "text/html"))
+
+    def test_backend_selection(self):
+        name, loads, errors = json_backend.load_backend("json")
+        self.assertEqual(name, "json")
+        self.assertEqual(loads(b'{"a": 1}'), {"a": 1})
+        self.assertIn(json_backend.backend_name, json_backend.BACKENDS)
+        with self.assertRaises(ImportError):
+            json_backend.load_backend("not_a_json_module")
+
+
+if __name__ == '__main__':
+    unittest.main()
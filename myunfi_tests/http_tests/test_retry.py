@@ -0,0 +1,88 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+import requests
+
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.http_wrappers.retry import RetryBudget, RetryPolicy, parse_retry_after
+from myunfi_tests.http_tests import make_response
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def make_policy(self, **kwargs):
+        options = dict(max_attempts=3, backoff_factor=1, max_backoff=10, max_retry_after=60,
+                       budget=RetryBudget(None))
+        options.update(kwargs)
+        return RetryPolicy(**options)
+
+    def test_parse_retry_after(self):
+        now = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertEqual(parse_retry_after("Sat, 01 Jan 2022 00:00:30 GMT", now), 30.0)
+        self.assertEqual(parse_retry_after("Fri, 31 Dec 2021 00:00:00 GMT", now), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_retry_decisions(self):
+        policy = self.make_policy()
+        self.assertIsNotNone(policy.retry_delay("GET", 1, status_code=503))
+        self.assertIsNone(policy.retry_delay("GET", 1, status_code=404))
+        self.assertIsNone(policy.retry_delay("POST", 1, status_code=503))
+        self.assertIsNotNone(policy.retry_delay("POST", 1, status_code=503, idempotent=True))
+        self.assertIsNone(policy.retry_delay("GET", 3, status_code=503))
+        self.assertIsNotNone(policy.retry_delay("GET", 1, error=requests.exceptions.ConnectionError()))
+
+    def test_backoff_and_retry_after(self):
+        policy = self.make_policy()
+        for attempt in range(1, 10):
+            self.assertLessEqual(policy.backoff(attempt), min(10, 2 ** (attempt - 1)))
+        self.assertEqual(policy.retry_delay("GET", 1, status_code=429, retry_after="5"), 5.0)
+        self.assertIsNone(policy.retry_delay("GET", 1, status_code=429, retry_after="600"))
+
+    def test_budget(self):
+        policy = self.make_policy(budget=RetryBudget(2))
+        self.assertIsNotNone(policy.retry_delay("GET", 1, status_code=502))
+        self.assertIsNotNone(policy.retry_delay("GET", 1, status_code=502))
+        self.assertIsNone(policy.retry_delay("GET", 1, status_code=502))
+        self.assertEqual(policy.budget.remaining, 0)
+
+
+@mock.patch("myunfi.http_wrappers.http_requests.time.sleep")
+class TestRequestsSessionRetry(unittest.TestCase):
+
+    def make_session(self, responses):
+        policy = RetryPolicy(max_attempts=3, backoff_factor=0.01, budget=RetryBudget(None))
+        session = RequestsSession(requests.Session(), retry_policy=policy)
+        session.session.request = mock.Mock(side_effect=responses)
+        return session
+
+    def test_retries_until_success(self, sleep):
+        session = self.make_session([make_response(502), make_response(429, headers={"Retry-After": "2"}),
+                                     make_response(200)])
+        result = session.get("https://www.myunfi.com/test", allow_sleep=False)
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(session.session.request.call_count, 3)
+        self.assertEqual(sleep.call_args_list[-1], mock.call(2.0))
+
+    def test_raises_when_exhausted(self, sleep):
+        session = self.make_session([make_response(503)] * 3)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            session.get("https://www.myunfi.com/test", allow_sleep=False)
+        self.assertEqual(session.session.request.call_count, 3)
+
+    def test_post_not_retried(self, sleep):
+        session = self.make_session([make_response(503), make_response(200)])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            session.post("https://www.myunfi.com/test", allow_sleep=False)
+        self.assertEqual(session.session.request.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_connection_error_retried(self, sleep):
+        session = self.make_session([requests.exceptions.ConnectionError(), make_response(200)])
+        result = session.post("https://www.myunfi.com/test", allow_sleep=False, idempotent=True)
+        self.assertEqual(result.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
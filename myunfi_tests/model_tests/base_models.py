@@ -1,6 +1,11 @@
 from __future__ import annotations
-from unittest import TestCase
-from myunfi.models.base import PaginatedModel
+from unittest import TestCase, mock
+
+from pydantic import ValidationError
+
+from myunfi.models.base import PaginatedModel, field_names_by_alias
+from myunfi.models.items.product import Product
+from myunfi.testing import SyntheticCatalog
 
 
 class PaginatedBaseModelTest(TestCase):
@@ -53,3 +58,29 @@ class PaginatedBaseModelTest(TestCase):
         self.assertEqual(pm.total_pages, 1)
         self.assertEqual(pm.is_sorted, True)
         self.assertEqual(pm.number_of_elements, 12)
+
+
+@mock.patch("myunfi.models.items.product.replace_abbreviations", False)
+class UpdateModelTest(TestCase):
+
+    def test_matches_parse(self):
+        data = SyntheticCatalog(10).product(3)
+        product = Product(itemNumber=data["itemNumber"])
+        product.update_model(data)
+        self.assertEqual(product.dict(exclude={"image"}), Product.parse_obj(data).dict(exclude={"image"}))
+        self.assertEqual(product.upc_no_check, int(data["upc"][:-1]))
+        self.assertIn("wholesale_price", product.__fields_set__)
+
+    def test_names_and_aliases(self):
+        product = Product()
+        product.update_model({"itemNumber": "100001", "pack_qty": "12"})
+        self.assertEqual((product.item_number, product.pack_qty), ("100001", 12))
+        self.assertIs(field_names_by_alias(Product), field_names_by_alias(Product))
+
+    def test_invalid_update_changes_nothing(self):
+        product = Product(itemNumber="100001", srp=1.0)
+        with self.assertRaises(ValidationError):
+            product.update_model({"srp": 2.0, "packQty": "twelve"})
+        self.assertEqual(product.srp, 1.0)
+        with self.assertRaises(ValueError):
+            product.update_model({"notAField": 1})
@@ -5,7 +5,9 @@ import unittest
 from pathlib import Path
 
 from myunfi import MyUNFIClient
+from myunfi.http_wrappers.http_requests import RequestsSession
 from myunfi.models.invoices import InvoiceList
+from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
 
 this_file_path = Path(__file__)
 assets_path = this_file_path.parents[2] / "Assets"
@@ -57,3 +59,14 @@ class TestFetchInvoices(unittest.TestCase):
         invoices.fetch(client.session)
         full_invoices = invoices.fetch_invoices()
         pass
+
+
+class TestInvoiceListPaging(unittest.TestCase):
+
+    def test_search_all_pages(self):
+        with MockMyUNFIServer(SyntheticCatalog(10, invoices=50)) as server:
+            session = server.install(RequestsSession.create_session(rate_limiter=None))
+            invoices = InvoiceList.search(session=session, page_size=12, all_pages=True)
+        self.assertEqual(invoices.total_pages, 5)
+        self.assertEqual(len(invoices.listings), 50)
+        self.assertEqual(len({listing.invoice_number for listing in invoices.listings}), 50)
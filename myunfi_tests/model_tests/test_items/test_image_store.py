@@ -0,0 +1,90 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+from myunfi.http_wrappers.download import write_chunks
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.models.items.image_store import ImageStore
+from myunfi.models.items.product import Image
+from myunfi_tests.http_tests import make_response
+
+placeholder = (Path(__file__).parents[3] / "src" / "myunfi" / "models" / "items" / "placeholder_image.jpg").read_bytes()
+image_url = "https://products.unfi.com/api/Images/GetByUPC?upc={upc}&version=3"
+jpeg = {"Content-Type": "image/jpeg"}
+
+
+class TestImageStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.session = RequestsSession(requests.Session(), rate_limiter=None)
+        self.session.session.request = mock.Mock()
+        self.store = ImageStore(self.path / "store")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_overlapping_flushes_keep_the_newest_index(self):
+        calls = []
+
+        def slow_first_write(chunks, path):
+            calls.append(path)
+            if len(calls) == 1:
+                time.sleep(0.2)
+            return write_chunks(chunks, path)
+
+        store = ImageStore(self.path / "store", autosave=1)
+        with mock.patch("myunfi.models.items.image_store.write_chunks", slow_first_write):
+            first = threading.Thread(target=store._record, args=("a", {"md5": "1"}))
+            first.start()
+            time.sleep(0.05)
+            store._record("b", {"md5": "2"})
+            first.join()
+        index = json.loads(store.index_path.read_text())
+        self.assertEqual(set(index["urls"]), {"a", "b"})
+
+    def test_identical_images_stored_once(self):
+        self.session.session.request.return_value = make_response(200, b"jpeg", {**jpeg, "ETag": '"a"'})
+        first = self.store.export(self.session, image_url.format(upc=1), self.path / "1.jpg")
+        second = self.store.export(self.session, image_url.format(upc=2), self.path / "2.jpg")
+        self.assertEqual((first.read_bytes(), second.read_bytes()), (b"jpeg", b"jpeg"))
+        self.assertEqual(len(list((self.path / "store" / "objects").rglob("*.jpg"))), 1)
+        self.assertEqual(self.store.stats["deduplicated"], 1)
+
+        # known urls are not downloaded again, in this run or the next
+        self.store.export(self.session, image_url.format(upc=1), self.path / "1.jpg")
+        self.store.flush()
+        ImageStore(self.path / "store").fetch(self.session, image_url.format(upc=2))
+        self.assertEqual(self.session.session.request.call_count, 2)
+
+    def test_placeholder_remembered(self):
+        self.session.session.request.return_value = make_response(200, placeholder, jpeg)
+        image = Image(url=image_url.format(upc=3))
+        self.assertIsNone(image.download_to_file(self.session, self.path / "3.jpg", store=self.store))
+        self.assertTrue(image.is_placeholder)
+        self.assertIsNone(self.store.fetch(self.session, image.url))
+        self.assertEqual(self.session.session.request.call_count, 1)
+        self.assertFalse((self.path / "3.jpg").exists())
+
+    def test_revalidate_with_etag(self):
+        url = image_url.format(upc=4)
+        self.session.session.request.return_value = make_response(200, b"v1", {**jpeg, "ETag": '"v1"'})
+        self.store.fetch(self.session, url)
+        store = ImageStore(self.path / "store", revalidate=True)
+        store.index = self.store.index
+        self.session.session.request.return_value = make_response(304)
+        self.assertEqual(store.fetch(self.session, url).read_bytes(), b"v1")
+        self.assertEqual(self.session.session.request.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+        self.session.session.request.return_value = make_response(200, b"v2", {**jpeg, "ETag": '"v2"'})
+        self.assertEqual(store.fetch(self.session, url).read_bytes(), b"v2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +1,29 @@
 from __future__ import annotations
+
+import unittest
+
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.models.items.product import Product, Products, Promotion
+from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
+
+
+class TestRefreshPricing(unittest.TestCase):
+
+    def test_refresh_in_batches(self):
+        catalog = SyntheticCatalog(1200)
+        products = Products()
+        products.extend(Product(itemNumber=catalog.item_number(index)) for index in range(1200))
+        products["100011"].promotions = [Promotion(description="Expired Promotion")]
+        with MockMyUNFIServer(catalog) as server:
+            session = server.install(RequestsSession.create_session(rate_limiter=None))
+            pricing = products.refresh_pricing(session, batch_size=500, max_workers=3)
+        self.assertEqual(server.stats()["requests"], 3)
+        self.assertEqual(len(pricing.pricing), 1200)
+        self.assertEqual(len(pricing.promotions), 120)
+        self.assertEqual(products["100010"].pricing.net_price, catalog.price(10))
+        self.assertEqual(products["100010"].promotions[0].description, "Monthly Promotion")
+        self.assertEqual(products["100011"].promotions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+from myunfi.models.items.product import Product
+from myunfi.models.items.product_store import ProductStore
+from myunfi.testing import SyntheticCatalog
+
+
+class TestProductStore(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("myunfi.models.items.product.replace_abbreviations", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.catalog = SyntheticCatalog(200, brands=10, categories=5)
+        self.products = [Product.parse_obj(self.catalog.product(index)) for index in range(200)]
+        self.store = ProductStore()
+        self.store.upsert(self.products)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.store), 200)
+        product = self.store.get("100005")
+        self.assertEqual(product.dict(exclude={"image"}), self.products[5].dict(exclude={"image"}))
+        self.assertIn("100005", self.store)
+        self.assertNotIn("999999", self.store)
+        self.assertIsNone(self.store.get("999999"))
+
+    def test_lookups(self):
+        product = self.products[7]
+        self.assertEqual(self.store.get_by_upc(product.upc).item_number, "100007")
+        with ProductStore() as store:
+            store.upsert([product])
+            self.assertEqual(store.get_by_upc(str(product.upc_no_check)).item_number, "100007")
+        self.assertEqual(self.store.lookup("100007")["brand_id"], product.brand_id)
+        self.assertEqual(len(self.store.rows(brand_id=self.catalog.brand_id(3))), 20)
+        self.assertEqual(len(self.store.find(brand_id=[self.catalog.brand_id(1), self.catalog.brand_id(2)])), 40)
+
+    def test_ranges(self):
+        rows = self.store.rows(item_number_between=("100010", "100019"))
+        self.assertEqual([row["item_number"] for row in rows], [f"1000{i}" for i in range(10, 20)])
+        cheap = self.store.rows(wholesale_price_between=(None, 10))
+        self.assertEqual(len(cheap), sum(1 for product in self.products if product.wholesale_price <= 10))
+        with self.assertRaises(ValueError):
+            self.store.rows(brand_name_between=("a", "b"))
+
+    def test_upsert_replaces(self):
+        product = self.products[0].copy(update={"wholesale_price": 1.23})
+        self.store.upsert([product])
+        self.assertEqual(len(self.store), 200)
+        self.assertEqual(self.store.get("100000").wholesale_price, 1.23)
+        self.assertEqual(self.store.delete(["100000", "100001"]), 2)
+        self.assertEqual(len(self.store), 198)
+
+
+if __name__ == '__main__':
+    unittest.main()
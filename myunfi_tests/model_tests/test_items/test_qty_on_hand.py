@@ -1 +1,32 @@
 from __future__ import annotations
+
+import unittest
+
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.models.items.product import Product, Products
+from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
+from myunfi.utils.collections import balanced_chunks
+
+
+class TestRefreshQtyOnHand(unittest.TestCase):
+
+    def test_balanced_chunks(self):
+        self.assertEqual([len(chunk) for chunk in balanced_chunks(list(range(1001)), 500)], [334, 334, 333])
+        self.assertEqual(balanced_chunks([1, 2, 3], 5), [[1, 2, 3]])
+        self.assertEqual(balanced_chunks([], 5), [])
+
+    def test_refresh_in_batches(self):
+        catalog = SyntheticCatalog(1200)
+        products = Products()
+        products.extend(Product(itemNumber=catalog.item_number(index)) for index in range(1200))
+        with MockMyUNFIServer(catalog) as server:
+            session = server.install(RequestsSession.create_session(rate_limiter=None))
+            quantities = products.refresh_qty_on_hand(session, batch_size=500, max_workers=3)
+        self.assertEqual(server.stats()["requests"], 3)
+        self.assertEqual(len(quantities), 1200)
+        self.assertEqual(products["100010"].qty_on_hand, catalog.qty_on_hand(10))
+        self.assertEqual(products["101199"].qty_on_hand, catalog.qty_on_hand(1199))
+
+
+if __name__ == '__main__':
+    unittest.main()
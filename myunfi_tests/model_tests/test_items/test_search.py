@@ -1,10 +1,16 @@
 from __future__ import annotations
+import threading
+import time
 import unittest
 import os
 from pathlib import Path
+from unittest import mock
 
-from myunfi import MyUNFIClient
-from myunfi.models.items.search import ProductSearch
+from myunfi import MyUNFIClient, config
+from myunfi.api.shopping.items import fetch_items
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.models.items.search import ProductSearch, SearchResults
+from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
 
 this_file_path = Path(__file__)
 assets_path = this_file_path.parents[2] / "Assets"
@@ -38,3 +44,131 @@ class TestProductSearchResult(unittest.TestCase):
     def test_search_result_parse_from_file(self):
         search = ProductSearch.parse_file(search_result_json)
         results = search.results
+
+
+class TestProductSearchPaging(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockMyUNFIServer(SyntheticCatalog(1000)).start()
+        self.session = self.server.install(RequestsSession.create_session(rate_limiter=None))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_fetch_all_pages(self):
+        search = ProductSearch()
+        search.page_size = 96
+        pages = search.fetch_all_pages(self.session, search_term="*", max_workers=4)
+        self.assertEqual([page.page_number for page in pages], list(range(11)))
+        self.assertEqual(self.server.request_count, 11)
+        self.assertEqual(search.page_number, 0)
+        self.assertIsNone(search.results)
+
+    def test_fetch_leaves_cached_json_intact(self):
+        responses = []
+
+        def recording_fetch_items(*args, **kwargs):
+            responses.append(fetch_items(*args, **kwargs))
+            return responses[-1]
+
+        with mock.patch("myunfi.models.items.search.fetch_items", recording_fetch_items):
+            ProductSearch().fetch(self.session, search_term="*", page_size=10)
+        data = responses[0].get_json()
+        self.assertEqual(len(data["items"]), 10)
+        self.assertEqual(data["page"]["totalElements"], 1000)
+        self.assertNotIn("results", data)
+
+    def test_iter_items_stops_early(self):
+        search = ProductSearch()
+        search.page_size = 100
+        items = search.iter_items(self.session, search_term="*", max_workers=1)
+        self.assertEqual(next(items).item_number, "100000")
+        items.close()
+        self.assertLess(self.server.request_count, 10)
+
+    def test_next_and_previous_page(self):
+        search = ProductSearch()
+        search.page_size = 400
+        first = search.get_page(self.session, 0, search_term="*")
+        last = first.fetch_next_page(self.session, search_term="*").fetch_next_page(self.session, search_term="*")
+        self.assertEqual((last.page_number, len(last.page_items())), (2, 200))
+        self.assertIsNone(last.fetch_next_page(self.session, search_term="*"))
+        self.assertIsNone(first.fetch_previous_page(self.session, search_term="*"))
+
+    def test_search_all_pages(self):
+        search = ProductSearch()
+        results = search.search(search_term="*", page_size=150, session=self.session, all_pages=True)
+        self.assertEqual(len(results), 1000)
+        self.assertEqual(len({result.item_number for result in results.results}), 1000)
+        self.assertEqual((search.total_elements, search.total_pages), (1000, 7))
+
+    def test_iter_search(self):
+        search = ProductSearch()
+        items = search.iter_search(["100001 100002", "100002 100003", "*"], page_size=100, session=self.session,
+                                   max_workers=3)
+        item_numbers = [item.item_number for item in items]
+        self.assertEqual(len(item_numbers), 1000)
+        self.assertEqual(len(set(item_numbers)), 1000)
+        self.assertEqual(self.server.request_count, 12)
+
+    def test_results_update_deduplicates(self):
+        search = ProductSearch()
+        first = search.search(search_term="100001 100002", session=self.session)
+        merged = SearchResults()
+        merged.update(first)
+        merged.update(search.search(search_term="100002 100003", session=self.session))
+        merged.update(list(first.results))
+        self.assertEqual([item.item_number for item in merged.results], ["100001", "100002", "100003"])
+        self.assertIn("100003", merged)
+
+
+class TestProductSearchSharding(unittest.TestCase):
+
+    def search(self, catalog: SyntheticCatalog, **kwargs) -> tuple[ProductSearch, SearchResults, MockMyUNFIServer]:
+        with MockMyUNFIServer(catalog) as server:
+            session = server.install(RequestsSession.create_session(rate_limiter=None))
+            search = ProductSearch()
+            results = search.search(search_term="*", session=session, **kwargs)
+        return search, results, server
+
+    def test_shard_by_brand(self):
+        search, results, server = self.search(SyntheticCatalog(3000, brands=200), page_size=1000)
+        self.assertEqual(len({result.item_number for result in results.results}), 3000)
+        self.assertEqual(search.total_elements, 3000)
+        # the first page, then 200 brands of 15 items in 4 groups of at most 50 brands
+        self.assertEqual(server.request_count, 5)
+
+    def test_shard_by_category_within_brand(self):
+        search, results, server = self.search(SyntheticCatalog(2500, brands=2, categories=10), page_size=1000)
+        self.assertEqual(len({result.item_number for result in results.results}), 2500)
+        # the first page, a page per brand and a page per category of each brand, 5 of the 10 each
+        self.assertEqual(server.request_count, 1 + 2 + 2 * 5)
+
+    def test_nested_shards_share_the_worker_limit(self):
+        in_flight, peak, lock = [0], [0], threading.Lock()
+        get_page = ProductSearch.get_page
+
+        def counting_get_page(search, *args, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                time.sleep(0.01)
+                return get_page(search, *args, **kwargs)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        with mock.patch.object(ProductSearch, "get_page", counting_get_page), \
+                mock.patch.object(config, "page_fetch_max_workers", 2):
+            search, results, server = self.search(SyntheticCatalog(2500, brands=2, categories=10), page_size=1000)
+        self.assertEqual(len(results), 2500)
+        self.assertLessEqual(peak[0], 2)
+
+    def test_unsharded_page_only(self):
+        search, results, server = self.search(SyntheticCatalog(300), page_size=100, shard=False)
+        self.assertEqual((len(results), search.total_elements), (100, 300))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from myunfi.utils.pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stages_run_in_order(self):
+        pipeline = Pipeline(range(100), [
+            Stage("double", lambda x: x * 2, workers=4),
+            Stage("odd", lambda x: x if x % 4 else None, workers=2),
+        ])
+        results = sorted(pipeline)
+        self.assertEqual(results, [x * 2 for x in range(100) if x % 2])
+        self.assertEqual(pipeline.stats()["odd"]["dropped"], 50)
+        self.assertEqual(pipeline.stats()["source"], 100)
+
+    def test_stages_overlap(self):
+        # source and both stages take 0.5s for 10 items, run one after the other they would take 1.5s
+        def slow_source():
+            for x in range(10):
+                time.sleep(0.05)
+                yield x
+
+        def slow(x):
+            time.sleep(0.05)
+            return x
+
+        start = time.perf_counter()
+        pipeline = Pipeline(slow_source(), [Stage("a", slow), Stage("b", slow)])
+        self.assertEqual(list(pipeline), list(range(10)))
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_error_is_raised(self):
+        def fail(x):
+            if x == 5:
+                raise ValueError("bad item")
+            return x
+
+        with self.assertRaises(ValueError):
+            list(Pipeline(range(1000), [Stage("fail", fail, workers=2), Stage("noop", lambda x: x)]))
+
+    def test_close_cancels(self):
+        pipeline = Pipeline(iter(range(10_000)), [Stage("noop", lambda x: x, workers=2)])
+        results = iter(pipeline)
+        self.assertIsNotNone(next(results))
+        results.close()
+        self.assertLess(pipeline.stats()["source"], 100)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")])
+
+
+if __name__ == '__main__':
+    unittest.main()
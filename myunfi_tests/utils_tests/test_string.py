@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import math
+import random
+import unittest
+from urllib.parse import quote_plus
+
+from myunfi.utils.string import pack_query_terms
+
+
+class TestPackQueryTerms(unittest.TestCase):
+
+    def test_upc_list_packs_full_queries(self):
+        terms = [f"{random.Random(i).randrange(10 ** 11, 10 ** 12)}" for i in range(5000)]
+        chunks = pack_query_terms(terms, 1737)
+        self.assertEqual(len(chunks), math.ceil(len(set(terms)) * 13 / 1738))
+        self.assertEqual(sorted(term for chunk in chunks for term in chunk), sorted(set(terms)))
+        self.assertTrue(all(len(quote_plus(" ".join(chunk))) <= 1737 for chunk in chunks))
+
+    def test_url_encoding_counts(self):
+        terms = ["ben & jerry's", "half/half", "100% juice", "kale"] * 3 + ["x" * 40]
+        chunks = pack_query_terms(terms, 30)
+        self.assertTrue(all(len(quote_plus(" ".join(chunk))) <= 30 for chunk in chunks if len(chunk) > 1))
+        self.assertIn(["x" * 40], chunks)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 5)
+
+    def test_mixed_lengths_fill_gaps(self):
+        # greedy packing in input order needs 3 queries here
+        self.assertEqual(len(pack_query_terms(["aaaaaa", "cccccc", "bbb", "ddd"], 10)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,261 @@
+"""
+Benchmark the product search -> download -> workbook pipeline and the invoice download against a mock or
+replayed MyUNFI backend, so runs can be compared between commits.
+
+Usage:
+    python benchmark_pipeline.py --sizes 100 1000 10000 --output bench.json
+    python benchmark_pipeline.py --sizes 1000 --latency 0.02 0.1 --compare bench.json
+    python benchmark_pipeline.py --backend replay --cassette recorded_run.json
+
+The replay backend replays a cassette recorded from a live run with ReplaySession(record=True); the cassette
+built from the test fixtures has too few items and invoice details for the whole pipeline.
+Each catalog size runs in a fresh process so peak RSS is measured per run. The JSON report holds, per run,
+wall time, requests, requests/sec, peak RSS and the same figures for every stage.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+# search_and_download overlaps the search and download stages, compare it with their sum
+STAGES = ["do_search", "download_products", "create_excel_workbook", "search_and_download", "fetch_invoices"]
+# stages that use the output of an earlier stage
+STAGE_INPUTS = {"download_products": "do_search", "create_excel_workbook": "download_products"}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process in MiB, or None where it can't be measured.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KiB everywhere else
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory_info = psutil.Process().memory_info()
+    return round(getattr(memory_info, "peak_wset", memory_info.rss) / (1024 * 1024), 1)
+
+
+class StageTimer:
+    """
+    Collects wall time, request count and peak RSS for each stage of a run.
+    """
+
+    def __init__(self, request_count: Callable[[], int]):
+        self.request_count = request_count
+        self.stages: Dict[str, dict] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        requests_before = self.request_count()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            requests = self.request_count() - requests_before
+            self.stages[name] = {
+                "wall_time": round(wall_time, 4),
+                "requests": requests,
+                "requests_per_second": round(requests / wall_time, 2) if wall_time else None,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+
+
+def run_pipeline(options: dict) -> dict:
+    """
+    Run every stage once against a fresh backend. Runs in a child process.
+    """
+    sys.path.insert(0, str(Path(__file__).parent))
+    from myunfi import InvoiceList, MyUNFIClient
+    from myunfi.http_wrappers.http_replay import Cassette, ReplaySession
+    from myunfi.http_wrappers.http_requests import RequestsSession
+    from myunfi.http_wrappers.rate_limit import RateLimiter
+    from myunfi.testing import MockMyUNFIServer, SyntheticCatalog
+    from myunfi_product_search.download import download_products
+    from myunfi_product_search.pipeline import search_and_download
+    from myunfi_product_search.search import do_search
+    from myunfi_product_search.workbook import create_excel_workbook, save_wb
+
+    size = options["size"]
+    server = None
+    if options["backend"] == "mock":
+        catalog = SyntheticCatalog(size, invoices=options["invoices"])
+        server = MockMyUNFIServer(catalog, latency=options["latency"], throttle_rate=options["throttle_rate"],
+                                  error_rate=options["error_rate"], seed=options["seed"]).start()
+        session = server.install(RequestsSession.create_session())
+        request_count = lambda: server.request_count
+        query = options["query"] or " ".join(catalog.item_number(index) for index in range(size))
+    else:
+        session = ReplaySession(Cassette.load(options["cassette"]) if options["cassette"] else None,
+                                latency=options["latency"], error_rate=options["error_rate"], seed=options["seed"])
+        request_count = lambda: session.request_count
+        query = options["query"] or "*"
+    if options["requests_per_second"] is not None:
+        rate = options["requests_per_second"]
+        session.rate_limiter = RateLimiter(requests_per_second=rate, burst=max(1, int(rate))) if rate else None
+    client = MyUNFIClient(session=session)
+    timer = StageTimer(request_count)
+    counts = {}
+    start = time.perf_counter()
+    try:
+        if "do_search" in options["stages"]:
+            with timer.stage("do_search"):
+                results = do_search(query, client)
+            counts["search_results"] = len(results)
+        if "download_products" in options["stages"]:
+            with timer.stage("download_products"):
+                products = download_products(results, client)
+            counts["products"] = len(products)
+        if "create_excel_workbook" in options["stages"]:
+            with timer.stage("create_excel_workbook"):
+                workbook = create_excel_workbook(products)
+                with tempfile.TemporaryDirectory() as directory:
+                    save_wb(workbook, Path(directory) / "benchmark.xlsx")
+        if "search_and_download" in options["stages"]:
+            with timer.stage("search_and_download"):
+                pipeline_products = search_and_download(query, client, fetch_images=False)
+            counts["pipeline_products"] = len(pipeline_products)
+        if "fetch_invoices" in options["stages"]:
+            with timer.stage("fetch_invoices"):
+                invoice_list = InvoiceList.search(session=session, page_size=options["invoices"],
+                                                  fetch_results=True)
+            counts["invoices"] = len(invoice_list.invoices or {})
+    finally:
+        if server:
+            server.stop()
+    wall_time = time.perf_counter() - start
+    requests = request_count()
+    return {
+        "size": size,
+        "wall_time": round(wall_time, 4),
+        "requests": requests,
+        "requests_per_second": round(requests / wall_time, 2) if wall_time else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "counts": counts,
+        "stages": timer.stages,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(options: dict, sizes: List[int]) -> dict:
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {key: value for key, value in options.items() if key != "size"},
+        "runs": [],
+    }
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        with context.Pool(1) as pool:
+            run = pool.apply(run_pipeline, ({**options, "size": size},))
+        print(format_run(run))
+        report["runs"].append(run)
+    return report
+
+
+def format_run(run: dict) -> str:
+    lines = [f"size={run['size']}: {run['wall_time']:.2f}s, {run['requests']} requests "
+             f"({run['requests_per_second']}/s), peak rss {run['peak_rss_mb']} MiB"]
+    for name, stage in run["stages"].items():
+        lines.append(f"    {name:<24}{stage['wall_time']:>10.3f}s {stage['requests']:>8} requests")
+    return "\n".join(lines)
+
+
+def compare(report: dict, baseline: dict) -> str:
+    """
+    Wall time change per stage against a previous report, for the sizes both reports ran.
+    """
+    baseline_runs = {run["size"]: run for run in baseline["runs"]}
+    lines = [f"compared with {baseline.get('revision')} ({baseline.get('timestamp')})"]
+    for run in report["runs"]:
+        previous = baseline_runs.get(run["size"])
+        if not previous:
+            continue
+        pairs = [("total", run, previous)] + [(name, stage, previous["stages"][name])
+                                             for name, stage in run["stages"].items() if name in previous["stages"]]
+        for name, current, before in pairs:
+            change = (current["wall_time"] - before["wall_time"]) / before["wall_time"] * 100 if before[
+                "wall_time"] else 0.0
+            lines.append(f"size={run['size']:<8}{name:<24}{before['wall_time']:>10.3f}s -> "
+                         f"{current['wall_time']:>10.3f}s ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--backend", choices=["mock", "replay"], default="mock")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000],
+                        help="catalog sizes to run, every item is searched and downloaded (mock backend)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--query", help="search query, defaults to every item number in the catalog")
+    parser.add_argument("--invoices", type=int, default=50, help="number of invoices to list and download")
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.0],
+                        help="seconds added to each response, or a min and max for a random delay")
+    parser.add_argument("--throttle-rate", type=float, help="mock server requests/sec before answering 429")
+    parser.add_argument("--requests-per-second", type=float,
+                        help="client rate limit, 0 disables it, defaults to config.rate_limit_requests_per_second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with errors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", help="cassette to replay (replay backend), defaults to the test fixtures")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = set(args.stages)
+    for stage in reversed(STAGES):
+        if stage in stages and stage in STAGE_INPUTS:
+            stages.add(STAGE_INPUTS[stage])
+    options = {
+        "backend": args.backend,
+        "stages": [stage for stage in STAGES if stage in stages],
+        "query": args.query,
+        "invoices": args.invoices,
+        "latency": tuple(args.latency) if len(args.latency) > 1 else args.latency[0],
+        "throttle_rate": args.throttle_rate,
+        "requests_per_second": args.requests_per_second,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+        "cassette": args.cassette,
+    }
+    sizes = args.sizes if args.backend == "mock" else [0]
+    report = run_benchmarks(options, sizes)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.compare:
+        print(compare(report, json.loads(Path(args.compare).read_text())))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -11,5 +11,15 @@ PRODUCT_QUERY_OUTPUT_PATH = r"c:\temp\query_new.xlsx"
 
 
 IMAGE_OUTPUT_PATH = r"F:\Signs\product_images"
+# downloaded images are kept here once per distinct image and linked into IMAGE_OUTPUT_PATH,
+# known placeholder urls and unchanged images are skipped on later runs
+IMAGE_STORE_PATH = r"F:\Signs\product_images\.store"
 
-FETCH_IMAGES = False
\ No newline at end of file
+# responses are cached here between runs, see myunfi.config.http_cache_ttls for how long each endpoint is kept
+HTTP_CACHE_PATH = r"c:\temp\myunfi_cache"
+
+FETCH_IMAGES = False
+
+# workers per stage of the search -> product details -> images pipeline (see pipeline.search_and_download)
+DETAIL_WORKERS = 10
+IMAGE_WORKERS = 4
@@ -1,23 +1,31 @@
 from __future__ import annotations
 
 import os
-from typing import Dict
+from typing import Dict, Iterable, Union
 
 from tqdm import tqdm
 
 from myunfi import MyUNFIClient
+from myunfi.models.items.image_store import ImageStore
 from myunfi.models.items.product import Product, Products
 from myunfi.models.items.search import ResultItem, SearchResults
 from myunfi.utils.threading import threader
 from .logger import logger
-from .config import IMAGE_OUTPUT_PATH
+from .config import IMAGE_OUTPUT_PATH, IMAGE_STORE_PATH
 import hashlib
 image_path = IMAGE_OUTPUT_PATH
 
 
-def download_products(search_results: SearchResults, client: MyUNFIClient) -> Products:
+def download_products(search_results: Union[SearchResults, Iterable[ResultItem]], client: MyUNFIClient) -> Products:
+    """
+    Fetch the product for every search result. search_results may be a generator (see search.iter_search), its
+    results are downloaded as they arrive.
+    """
     total_dl = 0
     products = Products()
+    if isinstance(search_results, SearchResults):
+        search_results = search_results.results
+    total = len(search_results) if hasattr(search_results, "__len__") else None
 
     def __download(result: ResultItem):
         nonlocal total_dl
@@ -27,21 +35,23 @@ def download_products(search_results: SearchResults, client: MyUNFIClient) -> Pr
         product.fetch(session=client.session)
         products.append(product)
         total_dl += 1
-        pbar.set_description(f"{total_dl}/{len(search_results)}")
+        pbar.set_description(f"{total_dl}/{total or '?'}")
         pbar.update(1)
         return product
 
-    logger.info(f"Downloading {len(search_results)} products...")
-    with tqdm(total=len(search_results), unit=" products") as pbar:
-        pbar.set_description(f"0/{len(search_results)}")
+    logger.info(f"Downloading {total or 'all'} products...")
+    with tqdm(total=total, unit=" products") as pbar:
+        pbar.set_description(f"0/{total or '?'}")
         pbar.smoothing = 0.1
-        downloaded_products: list[Product] = threader(__download, search_results.results,
+        downloaded_products: list[Product] = threader(__download, search_results,
                                                       executor_options={"max_workers": 10})
     return products
 
 
-def download_product_images(client: MyUNFIClient, products: Products, image_directory: str) -> None:
+def download_product_images(client: MyUNFIClient, products: Products, image_directory: str,
+                            store_directory: str = IMAGE_STORE_PATH) -> None:
     print(f"Downloading product images...")
+    store = ImageStore(store_directory)
 
     max_len = max(
         [len(f"Downloading image for {product.brand_name} - {product.description}") for product in products])
@@ -55,9 +65,7 @@ def download_product_images(client: MyUNFIClient, products: Products, image_dire
             logger.info(pbar_desc)
             # pbar.write(info)
             pbar.set_description(pbar_desc + " " * (max_len - len(pbar_desc)))
-            image = product.image
-            image.download(session=client.session)
-            image.save(filename)
+            product.image.download_to_file(client.session, filename, store=store)
             nonlocal fetched
             fetched += 1
             # info = f"Image for {product.brand_name} - {product.description} already exists."
@@ -66,7 +74,9 @@ def download_product_images(client: MyUNFIClient, products: Products, image_dire
             pbar.update(1)
     # tqdm.write(info)
 
-    threader(_img_fetch, products, executor_options={"max_workers": 4})
+    with store:
+        threader(_img_fetch, products, executor_options={"max_workers": 4})
+    logger.info(f"Image store: {store.stats}")
 
 
 
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+from typing import Set
+
+from tqdm import tqdm
+
+from myunfi import MyUNFIClient
+from myunfi.models.items.image_store import ImageStore
+from myunfi.models.items.product import Product, Products
+from myunfi.models.items.search import ResultItem
+from myunfi.utils.pipeline import Pipeline, Stage
+from .config import DETAIL_WORKERS, FETCH_IMAGES, IMAGE_OUTPUT_PATH, IMAGE_STORE_PATH, IMAGE_WORKERS
+from .logger import get_logger
+from .search import iter_search
+
+mod_logger = get_logger(__name__)
+
+
+def search_and_download(query: str, client: MyUNFIClient, seen: Set[str] = None, fetch_images: bool = FETCH_IMAGES,
+                        image_directory: str = IMAGE_OUTPUT_PATH, store_directory: str = IMAGE_STORE_PATH) -> Products:
+    """
+    Search, fetch product details and fetch images as one pipeline: products are fetched as search results arrive
+    and images as products arrive, so the run takes about as long as its slowest stage.
+    seen holds the item numbers already downloaded, they are skipped and the new ones added.
+    """
+    logger = mod_logger.getChild("search_and_download")
+    products = Products()
+
+    def fetch_details(result: ResultItem) -> Product:
+        product = Product(itemNumber=result.item_number, account_id=client.account_id)
+        return product.fetch(session=client.session)
+
+    def fetch_image(product: Product) -> Product:
+        if product.image:
+            product.image.download_to_file(client.session, os.path.join(image_directory, f"{product.upc}.jpg"),
+                                           store=store)
+        return product
+
+    stages = [Stage("details", fetch_details, workers=DETAIL_WORKERS)]
+    store = None
+    if fetch_images:
+        store = ImageStore(store_directory)
+        stages.append(Stage("images", fetch_image, workers=IMAGE_WORKERS))
+    pipeline = Pipeline(iter_search(query, client, seen=seen), stages)
+    try:
+        with tqdm(unit=" products") as pbar:
+            for product in pipeline:
+                products.append(product)
+                pbar.set_description(f"{len(products)}/{pipeline.source_count} found", refresh=False)
+                pbar.update(1)
+    finally:
+        if store:
+            store.flush()
+            logger.info(f"Image store: {store.stats}")
+    logger.info(f"Pipeline stages: {pipeline.stats()}")
+    return products
@@ -2,48 +2,34 @@ from __future__ import annotations
 
 import logging
 from tkinter import messagebox as mb, simpledialog
-from typing import List, TYPE_CHECKING
+from typing import Iterator, List, Set, TYPE_CHECKING
 
 from tqdm import tqdm
 from unfi_api.unfi_web_queries import make_query_list
 
 from myunfi import ProductSearch
-from myunfi.models.items.search import SearchResults
+from myunfi.models.items.search import ResultItem, SearchResults
+from myunfi.utils.string import pack_query_terms
 from myunfi.utils.threading import threader
 from .logger import logger, get_logger
 if TYPE_CHECKING:
     from myunfi import MyUNFIClient
 
 
+# longest url encoded searchTerm sent in one request
 query_length_limit = 1737
 mod_logger = get_logger(__name__)
 
 
-def query_chunks_by_character_limit(query: list, max_chars: int) -> List[list[str]]:
-    chunks = []
-    chunk = []
-    for term in query:
-        chunk_str = " ".join(chunk)
-        if len(chunk_str + " " + term) > max_chars:
-            print(f"Chunk: {chunk_str}\nLength: {len(chunk_str)}")
-            chunks.append(chunk)
-            chunk = [term]
-        else:
-            chunk.append(term)
-    if chunk:
-        chunks.append(chunk)
-    return chunks
-
-
 def do_search(query: str, client) -> SearchResults:
     do_search_logger = mod_logger.getChild("do_search")
-    searcher = ProductSearch()
-    searcher.page_size = 1000
     search_results = SearchResults()
 
     def __search_chunk(chunk: list):
         # print(f"Searching for {len(chunk)} terms...\n")
-        chunk_results = searcher.search(session=client.session, search_term=" ".join(chunk))
+        searcher = ProductSearch()
+        chunk_results = searcher.search(session=client.session, search_term=" ".join(chunk), page_size=1000,
+                                        all_pages=True)
         search_results.update(chunk_results)
         # print(f"Search Complete! Found {result.total_hits} items matching the query")
         nonlocal total_results
@@ -62,7 +48,7 @@ def do_search(query: str, client) -> SearchResults:
     query_list = make_query_list(query)
     do_search_logger.debug(f"Query list: {query_list}")
     do_search_logger.info(f"Searching for a total of {len(query_list)} terms...")
-    chunks = query_chunks_by_character_limit(query_list, query_length_limit)
+    chunks = pack_query_terms(query_list, query_length_limit)
     with tqdm(total=len(query_list), unit=" terms") as pbar:
         pbar.smoothing = 0.1
         pbar.set_description(f"0/{len(query_list)}")
@@ -71,6 +57,18 @@ def do_search(query: str, client) -> SearchResults:
     return search_results
 
 
+def iter_search(query: str, client, seen: Set[str] = None) -> Iterator[ResultItem]:
+    """
+    Yields the results for query as they arrive, without duplicates, so downloads can start before the search
+    finishes. Pass seen (item numbers) to skip results already handled by an earlier search.
+    """
+    query_list = make_query_list(query)
+    chunks = pack_query_terms(query_list, query_length_limit)
+    mod_logger.getChild("iter_search").info(f"Searching for a total of {len(query_list)} terms...")
+    yield from ProductSearch().iter_search((" ".join(chunk) for chunk in chunks), page_size=1000,
+                                           session=client.session, seen=seen)
+
+
 def search_products(query: str, client: MyUNFIClient) -> SearchResults:
     if not query:
         if mb.askyesno("Empty Search", "Your search was empty. Retry?"):
@@ -6,13 +6,12 @@ import tkinter as tk
 from tkinter import messagebox as mb
 
 from myunfi import MyUNFIClient
-from myunfi.models import ProductSearch
+from myunfi.http_wrappers.cache import ResponseCache
 from myunfi.models.items.product import Products
-from myunfi.models.items.search import SearchResults
 from myunfi_product_search.workbook import create_excel_workbook, save_wb
-from myunfi_product_search.search import ask_query, do_search
-from myunfi_product_search.config import FETCH_IMAGES, PRODUCT_QUERY_OUTPUT_PATH
-from myunfi_product_search.download import download_product_images, download_products, image_path
+from myunfi_product_search.search import ask_query
+from myunfi_product_search.config import HTTP_CACHE_PATH, PRODUCT_QUERY_OUTPUT_PATH
+from myunfi_product_search.pipeline import search_and_download
 from myunfi_product_search.logger import logger
 
 output_path = PRODUCT_QUERY_OUTPUT_PATH
@@ -29,62 +28,38 @@ def main():
     tkroot.withdraw()
     logger.info("Connecting to MyUNFI")
 
-    client = MyUNFIClient(user, password)
+    client = MyUNFIClient(user, password, session_options=dict(cache=ResponseCache(HTTP_CACHE_PATH)))
 
     run(client)
 
 
 def run(client):
+    """
+    Each query is searched, downloaded and its images fetched in one overlapped pipeline, products already
+    downloaded by an earlier query are skipped. The workbook of everything downloaded so far is offered after every
+    query that found new products, and again on exit if the last offer was declined.
+    """
     downloaded_products = Products()
-    search = True
+    seen: set[str] = set()
     saved = False
-    while search:
-        search_results: SearchResults = do_query(client)
-        if search_results:
-            undownloaded_results = SearchResults(
-                items=[result for result in search_results.results if
-                       result.item_number not in downloaded_products.products]
-            )
-
-            if len(undownloaded_results) < 1:
-                logger.debug("No new results found.")
-                if mb.askyesno("No New Results Found", "No new results found. Do another search?"):
-                    continue
-                else:
-                    if len(downloaded_products) > 0:
-                        if not saved:
-                            saved = save(downloaded_products)
-                        search = False
-                        break
-
-            logger.info(f"Found {len(undownloaded_results)} undownloaded products")
-            products: Products = download_products(undownloaded_results, client)
-            if len(products) > 0:
-                saved = False
-                logger.info(f"Downloaded {len(products)} products")
-                downloaded_products.update(products)
-
-            if not saved and len(downloaded_products) > 0:
-                if FETCH_IMAGES:
-                    logger.info("Downloading missing images...")
-                    download_product_images(client, downloaded_products, image_path)
-                saved = save(downloaded_products)
-                if mb.askyesno("Search Again?", "Do another search?"):
-                    continue
-                else:
-                    search = False
-
-        elif mb.askyesno("Run again?", f"No new results found. Do another search?"):
-            continue
-        elif not saved:
-            if len(downloaded_products) > 0:
-                saved = save(downloaded_products)
-            search = False
-
-    # save_wb(wb, output_path)
+    query = ask_query()
+    while query:
+        logger.debug(f"Searching for {query}")
+        products: Products = search_and_download(query, client, seen=seen)
+        if len(products) > 0:
+            logger.info(f"Downloaded {len(products)} products")
+            downloaded_products.update(products)
+            # offer to save after every query, so a failure in a later one doesn't lose these products
+            saved = save(downloaded_products)
+            message = f"{len(products)} new products downloaded.\nDo you want to search again?"
+        else:
+            logger.debug("No new results found.")
+            message = "No new results found. Do another search?"
+        query = ask_query() if mb.askyesno("Search Again?", message) else None
+
+    if not saved and len(downloaded_products) > 0:
+        saved = save(downloaded_products)
     mb.showinfo("Exiting", "Product Search Complete")
-    # if saved:
-    #     logger.info("Saved", "Workbook saved to " + output_path)
     logger.info("Exiting cleanly.")
 
 
@@ -101,23 +76,6 @@ def save(products: Products) -> bool:
     return False
 
 
-def do_query(client) -> SearchResults:
-    search_results = SearchResults()
-    query = ask_query()
-    while query:
-        logger.debug(f"Searching for {query}")
-        results: SearchResults = do_search(query, client)
-        query = None
-        if len(results) > 1:
-            # only notify the quantity of NEW results found
-            result_count = len(set(results.results).difference(search_results.results))
-            search_results.update(results)
-            if mb.askyesno("Products Found", f"{result_count} new products found.\nDo you want to search again?"):
-                query = ask_query()
-    logger.info("Search complete.")
-    return search_results
-
-
 if __name__ == "__main__":
     try:
         main()
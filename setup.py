@@ -9,5 +9,10 @@ setup(
     license='MIT',
     author='Allan Barcellos',
     author_email='sonicdm@gmail.com',
-    description='Python client for myunfi.com'
+    description='Python client for myunfi.com',
+    extras_require={
+        'async': ['aiohttp>=3.8'],
+        'fast-json': ['orjson>=3.6'],
+        'arrow': ['pyarrow>=8'],
+    },
 )
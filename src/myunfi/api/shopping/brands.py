@@ -1,43 +1,51 @@
 """
 Main function file for brands endpoint for shopping.
 """
-from requests import Session
-from myunfi.http_wrappers import http_adapters
+from __future__ import annotations
+
+from myunfi.client.headers import api_headers
+from myunfi.http_wrappers.http_adapters import HTTPSession
 from ..endpoints import shopping_customers_brands_endpoints
 from ...http_wrappers.responses import JSONResponse
 
-brands_grouped = shopping_customers_brands_endpoints['brands_grouped']
-brands = shopping_customers_brands_endpoints['brands']
+brands_grouped = shopping_customers_brands_endpoints['grouped']
+brand = shopping_customers_brands_endpoints['brand_id']
 brands_base = shopping_customers_brands_endpoints['base']
 
 
-def fetch_brands_grouped(session: Session, num_per_group=24):
+def fetch_brands_grouped(session: HTTPSession, account_id: str, num_per_group=24) -> JSONResponse:
     """
+    Every brand available to the account, grouped by first letter.
     GET Method
     https://www.myunfi.com/shopping/api/customers/001014/brands/grouped?numPerGroup=24
     :param session:
+    :param account_id:
     :param num_per_group:
     :return:
     """
-    header_accept = "accept: application/json, text/plain, */*"
-    params = {
-        "numPerGroup": num_per_group
-    }
-    headers = session.headers.copy()
-    headers['accept'] = header_accept
-    response = session.get(brands_grouped, headers=headers, params=params)
-    return JSONResponse(response.status_code, response.content, response.headers)
+    endpoint = brands_grouped.format(accountID=account_id, numPerGroup=num_per_group)
+    return JSONResponse(session.get(endpoint, headers=api_headers))
+
+
+def fetch_brands(session: HTTPSession, account_id: str, starts_with: str) -> JSONResponse:
+    """
+    https://www.myunfi.com/shopping/api/customers/001014/brands?startsWith=A&hostSystem=WBS
+    :param session:
+    :param account_id:
+    :param starts_with: first letter of the brand names
+    :return:
+    """
+    endpoint = brands_base.format(accountID=account_id)
+    return JSONResponse(session.get(endpoint, params={"startsWith": starts_with}, headers=api_headers))
 
 
-def fetch_brand(session: Session, brand_id):
+def fetch_brand(session: HTTPSession, account_id: str, brand_id) -> JSONResponse:
     """
     https://www.myunfi.com/shopping/api/customers/001014/brands/40842
     :param session:
+    :param account_id:
     :param brand_id:
     :return:
     """
-    header_accept = "accept: application/json, text/plain, */*"
-    headers = session.headers.copy()
-    headers['accept'] = header_accept
-    response = session.get(brands.format(brandID=brand_id), headers=headers)
-    return JSONResponse(response.status_code, response.content, response.headers)
+    endpoint = brand.format(accountID=account_id, brandID=brand_id)
+    return JSONResponse(session.get(endpoint, headers=api_headers))
@@ -0,0 +1,51 @@
+"""
+Main function file for the departments, categories and subcategories endpoints for shopping.
+"""
+from __future__ import annotations
+
+from myunfi.client.headers import api_headers
+from myunfi.http_wrappers.http_adapters import HTTPSession
+from ..endpoints import shopping_customers_categories_endpoints, shopping_customers_departments_endpoints
+from ...http_wrappers.responses import JSONResponse
+
+
+def fetch_departments(session: HTTPSession, account_id: str, include_images: bool = False) -> JSONResponse:
+    """
+    Top level of the category tree.
+    https://www.myunfi.com/shopping/api/customers/001014/departments?includeImages=false&hostSystem=WBS
+    :param session:
+    :param account_id:
+    :param include_images:
+    :return:
+    """
+    endpoint = shopping_customers_departments_endpoints["departments"]
+    endpoint = endpoint.format(accountID=account_id, include_images=str(include_images).lower())
+    return JSONResponse(session.get(endpoint, headers=api_headers))
+
+
+def fetch_categories(session: HTTPSession, account_id: str, parent_id) -> JSONResponse:
+    """
+    Categories of a department.
+    https://www.myunfi.com/shopping/api/customers/001014/categories?parentId=76&hostSystem=WBS
+    :param session:
+    :param account_id:
+    :param parent_id: department id
+    :return:
+    """
+    endpoint = shopping_customers_categories_endpoints["categories"]
+    endpoint = endpoint.format(accountID=account_id, parentId=parent_id)
+    return JSONResponse(session.get(endpoint, headers=api_headers))
+
+
+def fetch_subcategories(session: HTTPSession, account_id: str, parent_id) -> JSONResponse:
+    """
+    Subcategories of a category.
+    https://www.myunfi.com/shopping/api/customers/001014/subcategories?parentId=1367&hostSystem=WBS
+    :param session:
+    :param account_id:
+    :param parent_id: category id
+    :return:
+    """
+    endpoint = shopping_customers_categories_endpoints["subcategories"]
+    endpoint = endpoint.format(accountID=account_id, parentId=parent_id)
+    return JSONResponse(session.get(endpoint, headers=api_headers))
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Type
 
+from myunfi.client.headers import api_headers, api_json_headers
 from myunfi.http_wrappers.http_adapters import HTTPRequest, HTTPSession
 from ...http_wrappers.responses import JSONResponse
 import myunfi.logger as logger
@@ -28,14 +29,8 @@ def fetch_product(session: HTTPSession, product_code: str, account_id: str,
     x-unfi-host-system: WBS
     x-unfi-language: en-US
     """
-    headers = {
-        "x-unfi-host-system": "WBS",
-        "x-unfi-language": "en-US",
-    }
-    session.headers.update(headers)
-    endpoint = f'{shopping_customers_items_endpoints["items"]}/{product_code}'
-    endpoint = endpoint.format(accountID=account_id) + f"?isQtyOnHandSupported={str(qty_on_hand_supported).lower()}"
-    request = session.create_request('get', endpoint, headers=headers)
+    endpoint = product_endpoint(product_code, account_id, qty_on_hand_supported)
+    request = session.create_request('get', endpoint, headers=api_headers)
     request.execute()
     if request.status_code != 200:
         return None
@@ -43,6 +38,24 @@ def fetch_product(session: HTTPSession, product_code: str, account_id: str,
     # result = session.get(endpoint)
 
 
+async def fetch_product_async(session: HTTPSession, product_code: str, account_id: str,
+                              qty_on_hand_supported: bool = True) -> JSONResponse:
+    """
+    asyncio variant of fetch_product. Requires an asyncio session (http_library = "aiohttp").
+    """
+    endpoint = product_endpoint(product_code, account_id, qty_on_hand_supported)
+    request = session.create_request('get', endpoint, headers=api_headers)
+    await request.execute()
+    if request.status_code != 200:
+        return None
+    return request.get_json()
+
+
+def product_endpoint(product_code: str, account_id: str, qty_on_hand_supported: bool = True) -> str:
+    endpoint = f'{shopping_customers_items_endpoints["items"]}/{product_code}'
+    return endpoint.format(accountID=account_id) + f"?isQtyOnHandSupported={str(qty_on_hand_supported).lower()}"
+
+
 def fetch_qty_on_hand(session, account_id: str, item_numbers: list[str]):
     """
     Fetch the quantity on hand for a list of item numbers.
@@ -51,17 +64,30 @@ def fetch_qty_on_hand(session, account_id: str, item_numbers: list[str]):
     :param item_numbers:
     :return:
     """
-    headers = {
-        "x-unfi-host-system": "WBS",
-        "x-unfi-language": "en-US",
-    }
     payload = {
         "itemNumbers": item_numbers,
     }
-    session.headers.update(headers)
     endpoint = shopping_customers_items_endpoints["quantity_on_hand"]
     endpoint = endpoint.format(accountID=account_id)
-    result = session.post(endpoint, json=payload)
+    result = session.post(endpoint, json=payload, headers=api_headers, idempotent=True)
+    return result
+
+
+def fetch_pricing(session, account_id: str, item_numbers: list[str]):
+    """
+    Fetch the net price and current promotions for a list of item numbers.
+    https://www.myunfi.com/shopping/api/customers/001014/pricing?hostSystem=WBS
+    :param session:
+    :param account_id:
+    :param item_numbers:
+    :return:
+    """
+    payload = {
+        "itemNumbers": item_numbers,
+    }
+    endpoint = shopping_customers_items_endpoints["pricing"]
+    endpoint = endpoint.format(accountID=account_id)
+    result = session.post(endpoint, json=payload, headers=api_headers, idempotent=True)
     return result
 
 
@@ -78,18 +104,10 @@ def fetch_recommended(session, account_id: str, page_number: int = 0,
     :param page_size:
     :return:
     """
-    headers = session.headers.copy()
-    headers.update({
-        "x-unfi-host-system": "WBS",
-        "x-unfi-language": "en-US",
-        "accept": "application/json , text/plain, */*"
-    })
-
-    session.headers.update(headers)
     endpoint = shopping_customers_items_endpoints["recommended"]
     endpoint = endpoint.format(accountID=account_id)
 
-    result = session.get(endpoint, params={"page": page_number, "size": page_size}, headers=headers)
+    result = session.get(endpoint, params={"page": page_number, "size": page_size}, headers=api_json_headers)
     return result
 
 
@@ -110,13 +128,41 @@ def fetch_items(session, account_id: str, dc_num: int, brand_id: str = None, dep
     :return:
 
     """
-    headers = {
-        "x-unfi-host-system": "WBS",
-        "x-unfi-language": "en-US",
-        "accept": "application/json , text/plain, */*"
-    }
+    endpoint, params, payload = items_search_arguments(account_id, dc_num, brand_id, department_ids,
+                                                       sub_category_id, search_term, page_number, page_size,
+                                                       category_id=category_id)
+    if payload:
+        result = session.post(endpoint, json=payload, params=params, headers=api_json_headers, idempotent=True)
+    else:
+        result = session.get(endpoint, params=params, headers=api_json_headers)
+
+    return JSONResponse(result)
+
+
+async def fetch_items_async(session, account_id: str, dc_num: int, brand_id: str = None,
+                            department_ids: list[int] = None, category_id=None, sub_category_id=None,
+                            search_term="*", page_number: int = 0, sort_by: str = None, sort_order: str = None,
+                            page_size: int = 96) -> JSONResponse:
+    """
+    asyncio variant of fetch_items. Requires an asyncio session (http_library = "aiohttp").
+    """
+    endpoint, params, payload = items_search_arguments(account_id, dc_num, brand_id, department_ids,
+                                                       sub_category_id, search_term, page_number, page_size,
+                                                       category_id=category_id)
+    if payload:
+        result = await session.post(endpoint, json=payload, params=params, headers=api_json_headers, idempotent=True)
+    else:
+        result = await session.get(endpoint, params=params, headers=api_json_headers)
+
+    return JSONResponse(result)
+
 
-    session.headers.update(headers)
+def items_search_arguments(account_id: str, dc_num: int, brand_id: str = None, department_ids: list[int] = None,
+                           sub_category_id=None, search_term="*", page_number: int = 0,
+                           page_size: int = 96, category_id=None) -> tuple[str, dict, dict]:
+    """
+    Build the endpoint, query params and POST payload for an items search.
+    """
     endpoint = shopping_customers_items_endpoints["search"]
     endpoint = endpoint.format(accountID=account_id)
     params = {
@@ -126,19 +172,16 @@ def fetch_items(session, account_id: str, dc_num: int, brand_id: str = None, dep
         "size": page_size,
     }
     payload = {}
+    if category_id:
+        payload["categoryId"] = category_id
     if sub_category_id:
         payload["subCategoryId"] = sub_category_id
 
     if department_ids:
         params["departments"] = ",".join([str(department_id) for department_id in department_ids])
     if brand_id:
-        params["brands"] = brand_id
-    if payload:
-        result = session.post(endpoint, json=payload, params=params)
-    else:
-        result = session.get(endpoint, params=params)
-
-    return JSONResponse(result)
+        params["brands"] = ",".join(str(brand) for brand in brand_id) if isinstance(brand_id, list) else brand_id
+    return endpoint, params, payload
 
 
 def fetch_sub_category_members(session, account_id: str, parent_category_id, sub_category_id: str, page_number: int = 0,
@@ -164,13 +207,6 @@ def fetch_sub_category_members(session, account_id: str, parent_category_id, sub
         "parentId": parent_category_id,
     }
 
-    headers = session.headers.copy()
-    headers.update({
-        "x-unfi-host-system": "WBS",
-        "x-unfi-language": "en-US",
-        "accept": "application/json , text/plain, */*"
-    })
-
     endpoint = shopping_customers_categories_endpoints["items"]
 
-    result = session.get(shopping_customers_categories_endpoints["items"], params=params, json=payload, headers=headers)
+    result = session.get(endpoint, params=params, json=payload, headers=api_json_headers)
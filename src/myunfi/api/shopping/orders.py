@@ -7,7 +7,11 @@ from datetime import date, datetime, timedelta
 from typing import List, Type, Union
 
 from dateutil.relativedelta import relativedelta
+from pathlib import Path
 
+from myunfi.client.headers import invoice_content_type_headers
+from myunfi.http_wrappers.download import Download
+from myunfi.http_wrappers.exceptions import NonExcelResponseException, NonPDFResponseException
 from myunfi.http_wrappers.http_adapters import HTTPRequest, HTTPSession
 from ...http_wrappers.responses import ErrorResponse, ExcelResponse, JSONResponse, PDFResponse
 from ..endpoints import shopping_customers_orders_endpoints
@@ -196,12 +200,57 @@ def fetch_invoice(session: HTTPSession, account_id: str, invoice_number: str,
         Returns:
             A HTTPResponse object containing the invoice in the given file format.
     """
-    func_logger = module_logger.getChild("fetch_invoice")
-    content_type_headers = {
-        "EXCEL": {"accept": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
-        "PDF": {"accept": "application/pdf"},
-        "JSON": {"accept": "application/json; charset=utf-8"}
-    }
+    request = invoice_request(session, account_id, invoice_number, transaction_type, content_type)
+    request.execute()
+    return invoice_response(request, content_type)
+
+
+async def fetch_invoice_async(session: HTTPSession, account_id: str, invoice_number: str,
+                              transaction_type: str = "INVOICE",
+                              content_type="JSON") -> Union[JSONResponse, ExcelResponse, PDFResponse, ErrorResponse]:
+    """
+        asyncio variant of fetch_invoice. Requires an asyncio session (http_library = "aiohttp").
+    """
+    request = invoice_request(session, account_id, invoice_number, transaction_type, content_type)
+    await request.execute()
+    return invoice_response(request, content_type)
+
+
+def download_invoice(session: HTTPSession, account_id: str, invoice_number: str, path: Union[str, Path],
+                     transaction_type: str = "INVOICE", content_type="PDF") -> Download:
+    """
+        Streams an invoice file to disk without holding it in memory.
+        Args:
+            session: The session to use for the request.
+            account_id: The customer ID the invoice belongs to.
+            invoice_number: The invoice number to download. (00000000-000 formatted)
+            path: The file to write, or a directory to save it under the filename the server sends.
+            transaction_type: The type of transaction to fetch. INVOICE,DEBIT,CREDIT (Default is INVOICE)
+            content_type: The file format to download. PDF or EXCEL (Default is PDF)
+        Returns:
+            A Download with the saved path, size and md5 of the file.
+    """
+    content_type = content_type.upper()
+    if content_type not in ("PDF", "EXCEL"):
+        raise ValueError("content_type must be one of: EXCEL, PDF")
+    request = invoice_request(session, account_id, invoice_number, transaction_type, content_type)
+    download = session.download(request.url, path, headers=request.headers, params=request.params)
+    received = (download.content_type or "").split(";")[0]
+    if content_type == "PDF" and received != "application/pdf":
+        download.path.unlink()
+        raise NonPDFResponseException(f"Expected PDF response, got {received}")
+    if content_type == "EXCEL" and received not in ExcelResponse.EXCEL_TYPES:
+        download.path.unlink()
+        raise NonExcelResponseException(f"Expected one of {ExcelResponse.EXCEL_TYPES}, got {received}")
+    return download
+
+
+def invoice_request(session: HTTPSession, account_id: str, invoice_number: str, transaction_type: str = "INVOICE",
+                    content_type="JSON") -> HTTPRequest:
+    """
+        Builds the request for a single invoice in the given file format.
+    """
+    func_logger = module_logger.getChild("invoice_request")
     func_logger.debug(
         f"Fetching invoice {invoice_number} for account {account_id}"
         f" - transaction type {transaction_type} - content type {content_type}")
@@ -211,18 +260,23 @@ def fetch_invoice(session: HTTPSession, account_id: str, invoice_number: str,
     func_logger.debug(f"Endpoint: {endpoint}")
     # https://www.myunfi.com/shopping/api/customers/001014/invoices?order=invoiceDate&size=12&sort=DESC&startInvoiceDate=2021-12-13&hostSystem=WBS
     params = {"transactionType": transaction_type.upper()}
-    headers = session.headers.copy()
     try:
-        headers.update(content_type_headers[content_type])
+        headers = invoice_content_type_headers[content_type]
     except KeyError:
         func_logger.error(f"Invalid content type: {content_type} - "
-                          f"content_type must be one of: {content_type_headers.keys()}")
+                          f"content_type must be one of: {invoice_content_type_headers.keys()}")
         raise ValueError("content_type must be one of: EXCEL, PDF, JSON")
     func_logger.debug(f"Headers: {headers}")
-    request = session.create_request("GET", endpoint, headers=headers, params=params)
+    return session.create_request("GET", endpoint, headers=headers, params=params)
 
-    response = request.execute()
-    if not response.status_code == 200:
+
+def invoice_response(request: HTTPRequest,
+                     content_type="JSON") -> Union[JSONResponse, ExcelResponse, PDFResponse, ErrorResponse]:
+    """
+        Wraps an executed invoice request in the response type matching the requested file format.
+    """
+    content_type = content_type.upper()
+    if not request.status_code == 200:
         return request.get_error()
 
     if content_type == "EXCEL":
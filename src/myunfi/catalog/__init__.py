@@ -0,0 +1,4 @@
+from .crawler import CatalogCrawler, CrawlStats
+from .snapshot import CatalogSnapshot
+
+__all__ = ['CatalogCrawler', 'CatalogSnapshot', 'CrawlStats']
@@ -0,0 +1,163 @@
+"""
+Mirrors the orderable catalog of an account's DC into a CatalogSnapshot.
+Usage:
+    with CatalogSnapshot(r"c:\\temp\\catalog.sqlite") as snapshot:
+        stats = CatalogCrawler(client.session, snapshot).crawl()
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from myunfi import config
+from myunfi.api.shopping.brands import fetch_brands_grouped
+from myunfi.api.shopping.items import fetch_items, fetch_product
+from myunfi.catalog.snapshot import CatalogSnapshot
+from myunfi.http_wrappers.http_adapters import HTTPSession
+from myunfi.logger import get_logger
+from myunfi.models.items.product import Product
+from myunfi.models.items.search import ProductSearch
+from myunfi.utils.threading import threader
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CrawlStats:
+    brands: int = 0
+    searches: int = 0
+    items: int = 0
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    details_fetched: int = 0
+    details_failed: int = 0
+    catalog_total: Optional[int] = None
+    complete: bool = False
+    wall_time: float = 0.0
+
+
+def brand_ids_from(data: Any) -> List[int]:
+    """
+    Brand ids from a fetch_brands_grouped response, every object with an id and a name at any depth.
+    """
+    found = []
+    if isinstance(data, dict):
+        if "id" in data and "name" in data:
+            found.append(int(data["id"]))
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                found.extend(brand_ids_from(value))
+    elif isinstance(data, list):
+        for value in data:
+            found.extend(brand_ids_from(value))
+    return found
+
+
+class CatalogCrawler:
+    """
+    A crawl lists every brand with fetch_brands_grouped and searches the catalog a group of brands at a time,
+    max_workers searches at once. Searches with more results than a page are sharded by ProductSearch.search.
+    Each search summary is compared with the digest stored for its item, so only new and changed items are
+    written, and product details are fetched only for items that are new, changed or never fetched.
+    Items a complete crawl didn't see are marked removed, a crawl whose searches found fewer items than the catalog
+    total is recorded as incomplete and removes nothing. An interrupted crawl picks up the details it missed on
+    the next run.
+    """
+
+    def __init__(self, session: HTTPSession, snapshot: CatalogSnapshot, account_id: str = None,
+                 dc_number: int = None, page_size: int = 1000, max_workers: int = None,
+                 brands_per_search: int = None):
+        self.session = session
+        self.snapshot = snapshot
+        self.account_id = account_id or config.default_account_number
+        self.dc_number = dc_number or config.default_dc
+        self.page_size = page_size
+        self.max_workers = max_workers or config.bulk_fetch_max_workers
+        self.brands_per_search = brands_per_search or config.search_shard_max_brands
+
+    def crawl(self, fetch_details: bool = True) -> CrawlStats:
+        begin = time.perf_counter()
+        started_at = time.time()
+        stats = CrawlStats()
+        self.enumerate(started_at, stats)
+        stats.catalog_total = self.catalog_total()
+        stats.complete = stats.items >= stats.catalog_total
+        if stats.complete:
+            stats.removed = self.snapshot.mark_removed(started_at)
+        else:
+            logger.warning(f"Brand searches found {stats.items} of the {stats.catalog_total} items in the catalog, "
+                           f"not marking unseen items removed")
+        if fetch_details:
+            self.fetch_details(stats)
+        stats.wall_time = round(time.perf_counter() - begin, 3)
+        self.snapshot.save_crawl(started_at, asdict(stats))
+        logger.info(f"Catalog crawl finished: {stats}")
+        return stats
+
+    def list_brands(self) -> List[int]:
+        # a large group size so no group is cut short
+        data = fetch_brands_grouped(self.session, self.account_id, num_per_group=100_000).get_json()
+        return sorted(set(brand_ids_from(data)))
+
+    def catalog_total(self) -> int:
+        data = fetch_items(self.session, self.account_id, self.dc_number, search_term="*", page_size=1).get_json()
+        return data["page"]["totalElements"]
+
+    def enumerate(self, started_at: float, stats: CrawlStats):
+        """
+        Record the search summary of every item in the catalog.
+        """
+        brand_ids = self.list_brands()
+        stats.brands = len(brand_ids)
+        groups = [brand_ids[start:start + self.brands_per_search]
+                  for start in range(0, len(brand_ids), self.brands_per_search)]
+        known = self.snapshot.digests()
+        logger.info(f"Crawling {len(brand_ids)} brands in {len(groups)} searches, {len(known)} items known")
+
+        def search_group(group: List[int]) -> tuple:
+            search = ProductSearch(account_id=self.account_id, dc_number=self.dc_number)
+            results = search.search(search_term="*", brand_ids=group, page_size=self.page_size,
+                                    session=self.session)
+            items = results.results if results else []
+            return (len(items),) + self.snapshot.record(items, known, started_at)
+
+        for items, new, changed, unchanged in threader(search_group, groups, max_workers=self.max_workers):
+            stats.searches += 1
+            stats.items += items
+            stats.new += new
+            stats.changed += changed
+            stats.unchanged += unchanged
+
+    def fetch_details(self, stats: CrawlStats, save_every: int = 200):
+        """
+        Fetch product details for the items whose details are missing or older than their summary.
+        """
+        item_numbers = self.snapshot.stale_products()
+        logger.info(f"Fetching details for {len(item_numbers)} items")
+        pending: Dict[str, dict] = {}
+
+        def fetch(item_number: str) -> tuple:
+            try:
+                result = fetch_product(self.session, item_number, self.account_id)
+                return item_number, Product._product_data(result)
+            except Exception as e:
+                logger.warning(f"Could not fetch details for {item_number}: {e!r}")
+                return item_number, None
+
+        def collect(result: tuple):
+            item_number, data = result
+            if data is None:
+                stats.details_failed += 1
+                return
+            pending[item_number] = data
+            stats.details_fetched += 1
+            if len(pending) >= save_every:
+                self.snapshot.save_products(pending)
+                pending.clear()
+
+        threader(fetch, item_numbers, callback=collect, max_workers=self.max_workers)
+        if pending:
+            self.snapshot.save_products(pending)
@@ -0,0 +1,186 @@
+"""
+Local snapshot of the catalog in one sqlite database: the search summary of every item a crawl has seen and the
+product details last fetched for it. Each summary is stored with a digest of the fields that change when the
+product does (status, pack, UPC, brand, description...), so a later crawl can tell which items need their details
+fetched again without fetching them all.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from myunfi.logger import get_logger
+from myunfi.models.items.product import Product
+from myunfi.models.items.search import ResultItem
+
+logger = get_logger(__name__)
+
+# search summary fields compared between crawls
+SUMMARY_FIELDS = {"upc", "pack_qty", "pack_size", "pack_config", "brand_id", "status_code", "status_reason_code",
+                  "is_dsd_restricted", "description", "title", "department_id", "image"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_number TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    brand_id INTEGER,
+    department_id INTEGER,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    changed_at REAL NOT NULL,
+    removed_at REAL,
+    product TEXT,
+    product_fetched_at REAL
+);
+CREATE INDEX IF NOT EXISTS items_brand_id ON items (brand_id);
+CREATE INDEX IF NOT EXISTS items_department_id ON items (department_id);
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    stats TEXT NOT NULL
+);
+"""
+
+
+def summary_digest(item: ResultItem) -> str:
+    data = item.dict(include=SUMMARY_FIELDS)
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CatalogSnapshot:
+    """
+    Safe to share between threads, writes are serialized on one connection.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> CatalogSnapshot:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _query(self, sql: str, parameters: Iterable = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, tuple(parameters)).fetchall()
+
+    def digests(self) -> Dict[str, str]:
+        """
+        item number: summary digest, for every item ever seen.
+        """
+        return dict(self._query("SELECT item_number, digest FROM items"))
+
+    def record(self, items: Iterable[ResultItem], known: Dict[str, str], seen_at: float) -> Tuple[int, int, int]:
+        """
+        Store the summaries of items seen by a crawl started at seen_at. Only new and changed summaries (compared
+        with known, see digests) are written, the rest only have last_seen updated.
+        Returns the number of new, changed and unchanged items.
+        """
+        upserts, unchanged = [], []
+        new = changed = 0
+        for item in items:
+            digest = summary_digest(item)
+            previous = known.get(item.item_number)
+            if previous == digest:
+                unchanged.append((seen_at, item.item_number))
+                continue
+            if previous is None:
+                new += 1
+            else:
+                changed += 1
+            upserts.append((item.item_number, digest, item.json(by_alias=True), item.brand_id, item.department_id,
+                            seen_at, seen_at, seen_at))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO items (item_number, digest, summary, brand_id, department_id, first_seen, last_seen, "
+                "changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (item_number) DO UPDATE SET "
+                "digest = excluded.digest, summary = excluded.summary, brand_id = excluded.brand_id, "
+                "department_id = excluded.department_id, last_seen = excluded.last_seen, "
+                "changed_at = excluded.changed_at, removed_at = NULL", upserts)
+            self._connection.executemany("UPDATE items SET last_seen = ?, removed_at = NULL WHERE item_number = ?",
+                                         unchanged)
+        return new, changed, len(unchanged)
+
+    def mark_removed(self, not_seen_since: float) -> int:
+        """
+        Mark the items a crawl started at not_seen_since didn't see as removed. Returns how many were marked.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "UPDATE items SET removed_at = ? WHERE last_seen < ? AND removed_at IS NULL",
+                (time.time(), not_seen_since))
+            return cursor.rowcount
+
+    def stale_products(self) -> List[str]:
+        """
+        Item numbers in the catalog whose details were never fetched or were fetched before their summary changed.
+        """
+        return [row[0] for row in self._query(
+            "SELECT item_number FROM items WHERE removed_at IS NULL "
+            "AND (product_fetched_at IS NULL OR product_fetched_at < changed_at) ORDER BY item_number")]
+
+    def save_products(self, products: Dict[str, dict], fetched_at: float = None):
+        """
+        Store product details, item number: the product JSON as returned by fetch_product.
+        """
+        fetched_at = fetched_at or time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "UPDATE items SET product = ?, product_fetched_at = ? WHERE item_number = ?",
+                [(json.dumps(data), fetched_at, item_number) for item_number, data in products.items()])
+
+    def save_crawl(self, started_at: float, stats: dict):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO crawls (started_at, finished_at, stats) VALUES (?, ?, ?)",
+                                     (started_at, time.time(), json.dumps(stats)))
+
+    def last_crawl(self) -> Optional[dict]:
+        rows = self._query("SELECT started_at, finished_at, stats FROM crawls ORDER BY id DESC LIMIT 1")
+        if not rows:
+            return None
+        started_at, finished_at, stats = rows[0]
+        return {"started_at": started_at, "finished_at": finished_at, **json.loads(stats)}
+
+    def get_summary(self, item_number: str) -> Optional[ResultItem]:
+        rows = self._query("SELECT summary FROM items WHERE item_number = ?", (item_number,))
+        return ResultItem.parse_raw(rows[0][0]) if rows else None
+
+    def get_product(self, item_number: str) -> Optional[Product]:
+        rows = self._query("SELECT product FROM items WHERE item_number = ?", (item_number,))
+        return Product.parse_raw(rows[0][0]) if rows and rows[0][0] else None
+
+    def item_numbers(self, brand_id: int = None, department_id: int = None) -> List[str]:
+        """
+        Item numbers currently in the catalog, optionally of one brand or department.
+        """
+        sql, parameters = "SELECT item_number FROM items WHERE removed_at IS NULL", []
+        if brand_id is not None:
+            sql += " AND brand_id = ?"
+            parameters.append(brand_id)
+        if department_id is not None:
+            sql += " AND department_id = ?"
+            parameters.append(department_id)
+        return [row[0] for row in self._query(sql + " ORDER BY item_number", parameters)]
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM items WHERE removed_at IS NULL")[0][0]
+
+    def __repr__(self):
+        return f"<CatalogSnapshot {self.path} items={len(self)}>"
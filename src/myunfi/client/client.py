@@ -31,14 +31,18 @@ class MyUNFIClient(MyUNFIClientProtocol):
         client = MyUNFIClient(username="", password="")
     """
 
-    def __init__(self, username=None, password=None, auto_login=True, auto_reconnect=True, session=None):
+    def __init__(self, username=None, password=None, auto_login=True, auto_reconnect=True, session=None,
+                 session_options: dict = None):
         """
 
         :param username:
         :param password:
+        :param session: OPTIONAL: an existing HTTPSession to use instead of creating one
+        :param session_options: OPTIONAL: options for the session factory when creating the session,
+                                e.g. dict(pool_maxsize=64, pool_block=True) (see RequestsSession.create_session)
         """
         super().__init__(username, password, auto_login)
-        self.session = session or wrapper_factory.get_session().create_session()
+        self.session = session or wrapper_factory.get_session().create_session(**(session_options or {}))
         FetchableModel.set_session(self.session)
         self.logger = LOGGER.getChild(self.__class__.__name__)
         self._account_id = config.default_account_number
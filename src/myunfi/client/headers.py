@@ -1,3 +1,5 @@
+from types import MappingProxyType
+
 login_page_headers = {
     'authority': 'www.myunfi.com',
     'sec-ch-ua': '" Not A;Brand";v="99", "Chromium";v="99", "Google Chrome";v="99"',
@@ -13,3 +15,19 @@ login_page_headers = {
     'referer': 'https://www.myunfi.com/',
     'accept-language': 'en-US,en;q=0.9',
 }
+
+# Per-endpoint header sets for the shopping API. These are read only and passed with each request, the session
+# merges them over its own headers at send time so shared sessions are never mutated from worker threads.
+api_headers = MappingProxyType({
+    "x-unfi-host-system": "WBS",
+    "x-unfi-language": "en-US",
+})
+api_json_headers = MappingProxyType({
+    **api_headers,
+    "accept": "application/json , text/plain, */*",
+})
+invoice_content_type_headers = MappingProxyType({
+    "EXCEL": MappingProxyType({"accept": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}),
+    "PDF": MappingProxyType({"accept": "application/pdf"}),
+    "JSON": MappingProxyType({"accept": "application/json; charset=utf-8"}),
+})
@@ -46,9 +46,7 @@ def do_login(session: HTTPSession, username: str, password: str) -> bool:
     payload["password"] = password
 
     # submit login form
-    headers = session.headers.copy()
-    headers["Referer"] = login_page_response.url
-    headers['origin'] = "https://auth.myunfi.com"
+    headers = {"Referer": login_page_response.url, "origin": "https://auth.myunfi.com"}
     login_response = session.request("post", login_page_response.url, data=payload, headers=headers, allow_sleep=False)
     # check if it is a bad login
     if "Bad Login" in login_response.text or login_response.url == login_page_response.url:
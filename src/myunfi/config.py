@@ -1,11 +1,86 @@
 
 default_account_number = "001014"
 
+# "requests" (blocking) or "aiohttp" (asyncio, requires the optional aiohttp dependency)
 http_library = "requests"
 beautiful_soup_parser = "html.parser"
-random_delay = False
 default_dc = 6
 
+# Request rate limiting, shared by every request made through a session (see http_wrappers.rate_limit)
+rate_limit_enabled = True
+rate_limit_requests_per_second = 10.0
+rate_limit_burst = 20
+# AIMD concurrency: backs off on 429/5xx responses, grows while responses are faster than the latency target
+rate_limit_initial_concurrency = 8
+rate_limit_min_concurrency = 1
+rate_limit_max_concurrency = 32
+rate_limit_latency_target = 2.0
+
+# Connection pooling (see RequestsSession.create_session). pool_maxsize is the number of connections kept open per
+# host and should be at least the largest max_workers used with threader, otherwise threads queue on the pool
+# (pool_block=True) or open throwaway connections (pool_block=False).
+http_pool_connections = 10
+http_pool_maxsize = 32
+http_pool_block = False
+http_keep_alive = True
+# TCP socket tuning for pooled connections
+http_tcp_nodelay = True
+http_tcp_keepalive = True
+http_tcp_keepalive_idle = 60
+http_tcp_keepalive_interval = 10
+http_tcp_keepalive_count = 6
+
+# On disk cache for GET responses (see http_wrappers.cache). Entries past their TTL are revalidated with
+# ETag/Last-Modified when the server sent them. TTLs are (url regex, seconds), first match wins, 0 disables caching.
+http_cache_enabled = False
+http_cache_directory = r".myunfi_cache"
+http_cache_default_ttl = 0
+http_cache_ttls = [
+    (r"/items/quantityOnHand", 0),
+    (r"/items/(search|recommended|top)\b", 60 * 60),
+    # product detail with stock and wholesale price in it, those go stale long before the rest of the product
+    (r"/items/[^/?]+\?.*\bisQtyOnHandSupported=true", 5 * 60),
+    (r"/items/[^/?]+(\?|$)", 24 * 60 * 60),  # product detail
+    (r"/brands", 7 * 24 * 60 * 60),
+    (r"/(categories|subcategories|departments)", 7 * 24 * 60 * 60),
+]
+
+# Retries for 429/502/503/504 responses and connection errors (see http_wrappers.retry)
+retry_enabled = True
+retry_max_attempts = 4
+retry_backoff_factor = 0.5
+retry_max_backoff = 30.0
+# longest Retry-After the client will wait for before giving up
+retry_max_retry_after = 120.0
+# total retries allowed per session, None for unlimited
+retry_budget = 200
+
+# Bulk refreshes on Products (refresh_qty_on_hand, refresh_pricing): item numbers per batch request and
+# batches sent at once
+qty_on_hand_batch_size = 500
+pricing_batch_size = 500
+bulk_fetch_max_workers = 4
+
+# pages fetched at once by PaginatedFetchableModel.iter_pages/fetch_all_pages after the first page
+page_fetch_max_workers = 4
+# ProductSearch.search splits searches with more results than one page into brand (then category) filtered
+# searches, at most this many brands per search to keep urls short
+search_shard_max_brands = 50
+
+# chunk size in bytes for streamed downloads (see HTTPSession.download)
+download_chunk_size = 64 * 1024
+
+# JSON decoder for response bodies: "auto" (orjson, then ujson, then json), "orjson", "ujson" or "json"
+json_backend = "auto"
+
+# Record/replay transport (http_library = "replay", see http_wrappers.http_replay). With no cassette the replay
+# session is seeded from the JSON fixtures in replay_fixtures_directory (defaults to myunfi_tests/Assets).
+replay_cassette = None
+replay_fixtures_directory = None
+replay_latency = 0.0
+replay_error_rate = 0.0
+replay_seed = 0
+
 home_page = r"https://www.myunfi.com/"
 login_redirect_url = r"https://www.myunfi.com/api/auth/login?origin=https://www.myunfi.com/"
 login_page = r"https://auth.myunfi.com/siteminderagent/forms/login.fcc"
@@ -0,0 +1,6 @@
+from .arrow import line_items_to_table, products_to_table, read_parquet, write_parquet
+from .delimited import write_invoice_summaries, write_line_items, write_products
+from .excel import export_products, products_workbook
+
+__all__ = ['export_products', 'line_items_to_table', 'products_workbook', 'products_to_table', 'read_parquet',
+           'write_invoice_summaries', 'write_line_items', 'write_parquet', 'write_products']
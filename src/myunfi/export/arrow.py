@@ -0,0 +1,151 @@
+"""
+Columnar export of Products and invoice line items to Arrow tables and Parquet files.
+The schemas come from the model definitions, not from the data, so every export has the same columns and types
+whatever products it holds, and a month of daily catalog files reads back as one table.
+pyarrow is optional, only needed here: pip install myunfi[arrow]
+Usage:
+    write_parquet(products_to_table(products), r"c:\\temp\\catalog-2022-06-01.parquet")
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from myunfi.logger import get_logger
+from myunfi.models.invoices.invoice import Invoice, InvoiceLineItem, LINE_ITEM_COLUMN_ORDER
+from myunfi.models.items.product import Product, Products, Promotion
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is an optional dependency, only needed for columnar exports
+    pa = None
+    pq = None
+
+logger = get_logger(__name__)
+
+# python type: arrow type name
+ARROW_TYPES = {bool: "bool_", int: "int64", float: "float64", str: "string", date: "date32"}
+# product fields that aren't columns, nested models are flattened below
+PRODUCT_SKIP = {"executed", "error", "last_fetched", "image", "pricing", "promotions", "item_attributes",
+                "order_history"}
+PROMOTION_FIELDS = ["description", "discount_type", "id", "promotion_number", "start_date", "end_date",
+                    "discount_value"]
+# columns from the invoice on every line item row
+INVOICE_FIELDS = ["invoice_number", "invoice_date", "transaction_type", "customer_number", "po_number"]
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Columnar exports require pyarrow. Install it with: pip install myunfi[arrow]")
+
+
+def scalar_columns(model: Type[BaseModel], names: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    (field, arrow type name) of the scalar fields of a model, fields without a plain type are stored as strings.
+    """
+    return [(name, ARROW_TYPES.get(model.__fields__[name].outer_type_, "string")) for name in names]
+
+
+PRODUCT_SCALAR_COLUMNS = scalar_columns(Product, [name for name in Product.__fields__ if name not in PRODUCT_SKIP])
+PRODUCT_COLUMNS: List[Tuple[str, str]] = PRODUCT_SCALAR_COLUMNS + [
+    ("image_url", "string"),
+    ("net_price", "float64"),
+    ("net_unit_price", "float64"),
+    ("item_attributes", "list<string>"),
+    ("promotions", "list<promotion>"),
+]
+LINE_ITEM_COLUMNS: List[Tuple[str, str]] = scalar_columns(Invoice, INVOICE_FIELDS) + scalar_columns(
+    InvoiceLineItem, sorted(InvoiceLineItem.__fields__, key=lambda name: LINE_ITEM_COLUMN_ORDER.get(name, 1000)))
+
+
+def _scalar(value: Any, type_name: str) -> Any:
+    if value is None or type_name != "string" or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _promotion(promotion: Promotion) -> dict:
+    return {name: _scalar(getattr(promotion, name), type_name)
+            for name, type_name in scalar_columns(Promotion, PROMOTION_FIELDS)}
+
+
+def product_columns(products: Union[Products, Iterable[Product]]) -> Dict[str, list]:
+    """
+    Products as column lists in PRODUCT_COLUMNS order, the attributes are read directly, no dict() per product.
+    """
+    columns = {name: [] for name, _ in PRODUCT_COLUMNS}
+    for product in products:
+        values = product.__dict__
+        for name, type_name in PRODUCT_SCALAR_COLUMNS:
+            columns[name].append(_scalar(values[name], type_name))
+        columns["image_url"].append(product.image.url if product.image else None)
+        columns["net_price"].append(product.pricing.net_price if product.pricing else None)
+        columns["net_unit_price"].append(product.pricing.net_unit_price if product.pricing else None)
+        columns["item_attributes"].append(list(product.item_attributes or []))
+        columns["promotions"].append([_promotion(promotion) for promotion in product.promotions or []])
+    return columns
+
+
+def line_item_columns(invoices: Iterable[Invoice]) -> Dict[str, list]:
+    """
+    The line items of invoices as column lists in LINE_ITEM_COLUMNS order, each with its invoice's fields.
+    """
+    invoice_columns = scalar_columns(Invoice, INVOICE_FIELDS)
+    item_columns = LINE_ITEM_COLUMNS[len(invoice_columns):]
+    columns = {name: [] for name, _ in LINE_ITEM_COLUMNS}
+    for invoice in invoices:
+        invoice_values = [_scalar(getattr(invoice, name), type_name) for name, type_name in invoice_columns]
+        for line_item in invoice.line_items or []:
+            values = line_item.__dict__
+            for (name, _), value in zip(invoice_columns, invoice_values):
+                columns[name].append(value)
+            for name, type_name in item_columns:
+                columns[name].append(_scalar(values[name], type_name))
+    return columns
+
+
+def arrow_type(type_name: str) -> pa.DataType:
+    require_pyarrow()
+    if type_name == "list<string>":
+        return pa.list_(pa.string())
+    if type_name == "list<promotion>":
+        return pa.list_(pa.struct([(name, arrow_type(promotion_type))
+                                   for name, promotion_type in scalar_columns(Promotion, PROMOTION_FIELDS)]))
+    return getattr(pa, type_name)()
+
+
+def arrow_schema(columns: List[Tuple[str, str]]) -> pa.Schema:
+    return pa.schema([(name, arrow_type(type_name)) for name, type_name in columns])
+
+
+def products_to_table(products: Union[Products, Iterable[Product]]) -> pa.Table:
+    require_pyarrow()
+    return pa.table(product_columns(products), schema=arrow_schema(PRODUCT_COLUMNS))
+
+
+def line_items_to_table(invoices: Iterable[Invoice]) -> pa.Table:
+    require_pyarrow()
+    return pa.table(line_item_columns(invoices), schema=arrow_schema(LINE_ITEM_COLUMNS))
+
+
+def write_parquet(table: pa.Table, path: Union[str, Path], compression: str = "zstd") -> Path:
+    require_pyarrow()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, str(path), compression=compression)
+    logger.info("Wrote %s rows to %s", table.num_rows, path)
+    return path
+
+
+def read_parquet(paths: Union[str, Path, List[Union[str, Path]]]) -> pa.Table:
+    """
+    One table from one or more exports, e.g. every daily catalog file of a month.
+    """
+    require_pyarrow()
+    if isinstance(paths, (str, Path)):
+        return pq.read_table(str(paths))
+    return pa.concat_tables([pq.read_table(str(path)) for path in paths])
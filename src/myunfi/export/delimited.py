@@ -0,0 +1,88 @@
+"""
+CSV/TSV export of products, invoice line items and invoice listings, streamed to a file or stdout.
+Usage:
+    write_products(products, r"c:\\temp\\products.tsv", delimiter="\\t")
+    write_line_items(invoice_list.fetched_invoices.values())  # to stdout
+"""
+from __future__ import annotations
+
+import contextlib
+import csv
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Union
+
+from myunfi.export.rows import (INVOICE_SUMMARY_HEADER, LINE_ITEM_HEADER, invoice_summary_rows, line_item_rows,
+                                product_rows)
+from myunfi.logger import get_logger
+from myunfi.models.invoices.invoice import Invoice
+from myunfi.models.invoices.invoice_list import InvoiceList, InvoiceResult
+from myunfi.models.items.product import Product, Products
+
+logger = get_logger(__name__)
+
+Output = Union[str, Path, TextIO, None]
+
+
+@contextlib.contextmanager
+def open_output(out: Output) -> Iterator[TextIO]:
+    """
+    stdout for None, an open file is used as is and a path is opened and closed here.
+    """
+    if out is None:
+        yield sys.stdout
+    elif isinstance(out, (str, Path)):
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", newline="", encoding="utf-8") as file:
+            yield file
+    else:
+        yield out
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(item) for item in value)
+    return value
+
+
+def write_delimited(rows: Iterable[Dict[str, Any]], header: List[str], out: Output = None,
+                    delimiter: str = ",") -> int:
+    """
+    Write a header line and a line per row, keys missing from a row are left empty and keys not in header are left
+    out. Rows are written as they are consumed. Returns the number of rows written.
+    """
+    count = 0
+    with open_output(out) as file:
+        writer = csv.writer(file, delimiter=delimiter, lineterminator="\n")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([_value(row.get(key)) for key in header])
+            count += 1
+    logger.debug("Wrote %s rows to %s", count, out or "stdout")
+    return count
+
+
+def write_products(products: Union[Products, Iterable[Product]], out: Output = None, delimiter: str = ",",
+                   header: List[str] = None) -> int:
+    """
+    A line per product_rows row, header defaults to product_header.
+    """
+    header, rows = product_rows(products, header)
+    return write_delimited(rows, header, out, delimiter)
+
+
+def write_line_items(invoices: Iterable[Invoice], out: Output = None, delimiter: str = ",") -> int:
+    """
+    Every line item of invoices, columns in LINE_ITEM_COLUMN_ORDER after the invoice number.
+    """
+    return write_delimited(line_item_rows(invoices), LINE_ITEM_HEADER, out, delimiter)
+
+
+def write_invoice_summaries(invoices: Union[InvoiceList, Iterable[InvoiceResult]], out: Output = None,
+                            delimiter: str = ",") -> int:
+    """
+    A line per invoice listing, with its number of items.
+    """
+    if isinstance(invoices, InvoiceList):
+        invoices = invoices.listings or []
+    return write_delimited(invoice_summary_rows(invoices), INVOICE_SUMMARY_HEADER, out, delimiter)
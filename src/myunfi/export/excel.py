@@ -0,0 +1,74 @@
+"""
+Streaming Excel export of Products. Workbooks are created in openpyxl's write-only mode, so each row goes to disk as
+it is appended instead of building the whole sheet in memory.
+Usage:
+    export_products(products, r"c:\\temp\\products.xlsx")
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Union
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from myunfi.export.rows import product_rows
+from myunfi.logger import get_logger
+from myunfi.models.items.product import Product, Products
+
+logger = get_logger(__name__)
+
+
+def header_title(key: str) -> str:
+    return key.replace("_", " ").title().replace("`", "'").replace("'S", "'s").replace("Upc", "UPC").replace(
+        "Srp", "SRP")
+
+
+def cell_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    if isinstance(value, (int, float, date)):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+def write_workbook(rows: Iterable[Dict[str, Any]], header: List[str], title: str = "Products") -> Workbook:
+    """
+    A write-only workbook with a title row for header and a row per dict, rows are consumed as they are written.
+    Save it once with save().
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title)
+    worksheet.append([header_title(key) for key in header])
+    count = 0
+    for row in rows:
+        try:
+            worksheet.append([cell_value(row.get(key)) for key in header])
+        except Exception:
+            logger.exception("Could not write row %s", row)
+            raise
+        count += 1
+    logger.debug("Wrote %s rows to workbook", count)
+    return workbook
+
+
+def products_workbook(products: Union[Products, Iterable[Product]], header: List[str] = None) -> Workbook:
+    """
+    A workbook of product_rows, header defaults to product_header.
+    """
+    header, rows = product_rows(products, header)
+    return write_workbook(rows, header)
+
+
+def export_products(products: Union[Products, Iterable[Product]], path: Union[str, Path],
+                    header: List[str] = None) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    products_workbook(products, header).save(path)
+    logger.info("Saved products workbook to %s", path)
+    return path
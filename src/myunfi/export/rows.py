@@ -0,0 +1,105 @@
+"""
+Products, invoice line items and invoice listings flattened to rows (dicts) for the tabular exporters.
+"""
+from __future__ import annotations
+
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Tuple, Type, Union
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+from pydantic.utils import lenient_issubclass
+
+from myunfi.models.invoices.invoice import Invoice, InvoiceLineItem, LINE_ITEM_COLUMN_ORDER
+from myunfi.models.invoices.invoice_list import InvoiceResult
+from myunfi.models.items.product import Product, Products, Promotion
+from myunfi.utils.collections import normalize_dict
+
+# columns that lead a product sheet in this order
+HEADER_FIRST = ["upc_no_check", "case_upc", "brand_name", "description", "title", "sub_type", "pack_size",
+                "pack_qty", "product_category", "wholesale_price", "wholesale_unit_price", "srp",
+                "Non-GMO Project Verified", "Organic", "Gluten Free"]
+# fetch bookkeeping, not data
+SKIP_FIELDS = {"executed", "error", "last_fetched"}
+LINE_ITEM_HEADER = ["invoice_number"] + sorted(InvoiceLineItem.__fields__,
+                                               key=lambda name: LINE_ITEM_COLUMN_ORDER.get(name, 1000))
+INVOICE_SUMMARY_HEADER = [name for name in InvoiceResult.__fields__ if name not in SKIP_FIELDS | {"items"}] + [
+    "item_count"]
+
+
+def model_columns(model: Type[BaseModel], skip: Collection[str] = (), prefix: str = "") -> List[str]:
+    """
+    The keys normalize_dict gives model.dict(), nested models flattened to "<field>_<nested field>".
+    """
+    columns = []
+    for name, field in model.__fields__.items():
+        if name in skip:
+            continue
+        if field.shape == SHAPE_SINGLETON and lenient_issubclass(field.type_, BaseModel):
+            columns.extend(model_columns(field.type_, prefix=f"{prefix}{name}_"))
+        else:
+            columns.append(prefix + name)
+    return columns
+
+
+# product_row columns every product has, Product.dict adds product_category and Organic
+PRODUCT_ROW_COLUMNS = model_columns(
+    Product, skip={"order_history", "executed", "item_attributes", "promotions"}) + ["product_category", "Organic"]
+PROMOTION_ROW_FIELDS = [name for name in Promotion.__fields__ if name != "description"]
+
+
+def product_row(product: Product) -> Dict[str, Any]:
+    """
+    A product flattened to one row, each promotion's fields become "<description> <field>" columns.
+    """
+    row = normalize_dict(product.dict(exclude={"order_history", "executed"}))
+    for promotion in row.pop("promotions", None) or []:
+        promotion = dict(promotion)
+        promo_type = promotion.pop("description")
+        for key, value in promotion.items():
+            row[f"{promo_type} {key}"] = value
+    return row
+
+
+def product_header(products: Iterable[Product]) -> List[str]:
+    """
+    The columns of the product_row of every product, HEADER_FIRST columns first. Only the item attributes and
+    promotion descriptions vary between products, so this reads those and flattens nothing.
+    """
+    attributes, promotions = {}, {}
+    for product in products:
+        attributes.update(dict.fromkeys(product.item_attributes or ()))
+        promotions.update(dict.fromkeys(promotion.description for promotion in product.promotions or ()))
+    columns = dict.fromkeys(PRODUCT_ROW_COLUMNS)
+    columns.update(attributes)
+    columns.update(dict.fromkeys(f"{description} {name}" for description in promotions
+                                 for name in PROMOTION_ROW_FIELDS))
+    first = [key for key in HEADER_FIRST if key in columns]
+    return first + [key for key in columns if key not in first]
+
+
+def product_rows(products: Union[Products, Iterable[Product]],
+                 header: List[str] = None) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    """
+    The header and a generator of product_row, products are flattened one at a time as rows are consumed. Without
+    a header it comes from product_header, which needs a second pass over products, so an iterator is read into a
+    list first. With a header, columns not in it are left out by the writers.
+    """
+    if header is None:
+        if not isinstance(products, (Products, list, tuple)):
+            products = list(products)
+        header = product_header(products)
+    return header, (product_row(product) for product in products)
+
+
+def line_item_rows(invoices: Iterable[Invoice]) -> Iterable[Dict[str, Any]]:
+    """
+    A row per line item with its invoice number, in LINE_ITEM_HEADER order.
+    """
+    for invoice in invoices:
+        for line_item in invoice.line_items or []:
+            yield {"invoice_number": invoice.invoice_number, **line_item.__dict__}
+
+
+def invoice_summary_rows(listings: Iterable[InvoiceResult]) -> Iterable[Dict[str, Any]]:
+    for listing in listings:
+        yield {**listing.__dict__, "item_count": len(listing.items)}
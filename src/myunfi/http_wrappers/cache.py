@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Optional, Tuple, Union
+
+from requests.structures import CaseInsensitiveDict
+
+from myunfi import config
+from myunfi.http_wrappers.http_adapters import HTTPResult
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+CACHEABLE_METHODS = frozenset({"GET"})
+
+
+@dataclass
+class CacheEntry:
+    """
+    A stored response. stored_at is refreshed whenever the server revalidates the entry with a 304.
+    """
+    key: str
+    url: str
+    status_code: int
+    headers: dict
+    content: bytes
+    stored_at: float
+    ttl: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return header_value(self.headers, "etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return header_value(self.headers, "last-modified")
+
+    def is_fresh(self, now: float = None) -> bool:
+        return (now or time.time()) - self.stored_at < self.ttl
+
+    def validators(self) -> dict:
+        """
+        Conditional request headers for revalidating a stale entry.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class CacheLookup:
+    key: str
+    ttl: float
+    entry: Optional[CacheEntry] = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.entry is not None and self.entry.is_fresh()
+
+
+class ResponseCache:
+    """
+    On disk cache of GET responses keyed by method, url, sorted params and the accept header.
+    Each entry is one file, a JSON metadata line followed by the raw body, written atomically so worker
+    threads and concurrent runs can share the cache directory.
+    TTLs are set per endpoint with (regex, seconds) pairs matched against the url, first match wins.
+    Endpoints without a matching pattern use default_ttl, a TTL of 0 disables caching for the endpoint.
+    Stale entries with an ETag or Last-Modified header are revalidated with a conditional request.
+    """
+
+    def __init__(self, directory: Union[str, Path] = None, ttls: Iterable[Tuple[str, float]] = None,
+                 default_ttl: float = None):
+        self.directory = Path(directory or config.http_cache_directory)
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (config.http_cache_ttls if ttls is None else ttls)]
+        self.default_ttl = config.http_cache_default_ttl if default_ttl is None else default_ttl
+
+    def ttl_for(self, url: str) -> float:
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def cache_key(method: str, url: str, params: Union[Mapping, Iterable] = None, accept: str = None) -> str:
+        if isinstance(params, Mapping):
+            params = params.items()
+        sorted_params = sorted((str(key), str(value)) for key, value in (params or ()) if value is not None)
+        key = json.dumps([method.upper(), url, sorted_params, accept or ""], separators=(",", ":"))
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def lookup(self, method: str, url: str, params: Union[Mapping, Iterable] = None,
+               accept: str = None) -> Optional[CacheLookup]:
+        """
+        Find the cached entry for a request. Returns None when the request is not cacheable.
+        """
+        if method.upper() not in CACHEABLE_METHODS:
+            return None
+        ttl = self.ttl_for(url)
+        if ttl <= 0:
+            return None
+        key = self.cache_key(method, url, params, accept)
+        return CacheLookup(key, ttl, self.get(key))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self.path(key)
+        try:
+            with path.open("rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Discarding unreadable cache entry %s: %s", path, e)
+            self.delete(key)
+            return None
+        return CacheEntry(key=key, content=content, **meta)
+
+    def store(self, lookup: CacheLookup, url: str, status_code: int, headers: Mapping, content: bytes) -> CacheEntry:
+        entry = CacheEntry(lookup.key, url, status_code, dict(headers), content, time.time(), lookup.ttl)
+        self.write(entry)
+        return entry
+
+    def revalidated(self, lookup: CacheLookup, headers: Mapping) -> CacheEntry:
+        """
+        The server answered 304 Not Modified, keep the stored body and restart its TTL.
+        """
+        entry = lookup.entry
+        entry.headers = {**entry.headers, **{name: value for name, value in headers.items()
+                                             if name.lower() in ("etag", "last-modified", "date")}}
+        entry.stored_at = time.time()
+        entry.ttl = lookup.ttl
+        self.write(entry)
+        return entry
+
+    def write(self, entry: CacheEntry):
+        path = self.path(entry.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = dict(url=entry.url, status_code=entry.status_code, headers=entry.headers, stored_at=entry.stored_at,
+                    ttl=entry.ttl)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(entry.content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.directory.glob("*/*.cache"):
+            path.unlink(missing_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.cache"
+
+    def __repr__(self):
+        return f"<ResponseCache {self.directory}>"
+
+
+class CachedResult(HTTPResult):
+    """
+    Result served from the response cache. response is the CacheEntry.
+    """
+    from_cache = True
+
+    def __init__(self, response: CacheEntry):
+        super().__init__(response)
+        self._headers = CaseInsensitiveDict(response.headers)
+
+    def get_status_code(self) -> int:
+        return self.response.status_code
+
+    def get_content(self) -> bytes:
+        return self.response.content
+
+    def get_headers(self) -> CaseInsensitiveDict:
+        return self._headers
+
+    def get_cookies(self) -> dict:
+        return {}
+
+    def decode_text(self) -> str:
+        content_type = self.get_content_type() or ""
+        match = re.search(r"charset=([\w-]+)", content_type)
+        return self.response.content.decode(match.group(1) if match else "utf-8", errors="replace")
+
+    def get_url(self) -> str:
+        return self.response.url
+
+    def get_content_type(self) -> Optional[str]:
+        return self._headers.get("content-type")
+
+
+def header_value(headers: Optional[Mapping], name: str) -> Optional[str]:
+    """
+    Case insensitive header lookup that works on plain dicts and read only header sets.
+    """
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """
+    Response cache configured from myunfi.config, or None when caching is disabled.
+    """
+    if not config.http_cache_enabled:
+        return None
+    return ResponseCache()
@@ -0,0 +1,80 @@
+"""
+Streaming response bodies to disk. The body is written in chunks to a temporary file next to the target and
+hashed as it is written, then moved into place, so large downloads never sit in memory and a failed download
+never leaves a partial file behind.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Union
+from urllib.parse import unquote, urlsplit
+
+from myunfi import config
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Download:
+    """
+    A response body saved to disk.
+    """
+    path: Path
+    url: str
+    status_code: int
+    content_type: Optional[str]
+    size: int
+    md5: str
+
+
+def write_chunks(chunks: Iterable[bytes], path: Union[str, Path]) -> tuple[int, str]:
+    """
+    Write chunks to path atomically. Returns (size, md5 hex digest).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.md5()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return size, digest.hexdigest()
+
+
+def response_filename(headers, url: str) -> str:
+    """
+    Filename from the Content-Disposition header, or the last part of the url path.
+    """
+    content_disposition = headers.get("Content-Disposition", "") if headers else ""
+    match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', content_disposition, re.IGNORECASE)
+    if match:
+        return Path(unquote(match.group(1))).name
+    return Path(unquote(urlsplit(url).path)).name or "download"
+
+
+def save_result(result, path: Union[str, Path], chunk_size: int = None) -> Download:
+    """
+    Stream an HTTPResult's body to path. A directory path saves under the response's filename.
+    """
+    path = Path(path)
+    if path.is_dir():
+        path = path / response_filename(result.get_headers(), result.get_url())
+    size, md5 = write_chunks(result.iter_content(chunk_size or config.download_chunk_size), path)
+    logger.debug("Saved %s bytes from %s to %s", size, result.get_url(), path)
+    return Download(path, result.get_url(), result.get_status_code(), result.get_content_type(), size, md5)
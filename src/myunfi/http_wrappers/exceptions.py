@@ -51,3 +51,7 @@ class NonXMLResponseException(Exception):
 
 class NonBytesResponseException(Exception):
     pass
+
+
+class ReplayMissException(Exception):
+    pass
@@ -1,19 +1,29 @@
-from typing import Type
+from typing import Tuple, Type
 
 from myunfi.config import http_library
 from myunfi.http_wrappers.http_requests import HTTPRequestsRequest, RequestsResult, RequestsSession
 from myunfi.http_wrappers.http_adapters import HTTPResult, HTTPRequest, HTTPSession
 
-Session = HTTPSession
-Request = HTTPRequest
-Result = HTTPResult
 
-if http_library == "requests":
-    import requests
+def get_wrapper_classes(library: str) -> Tuple[Type[HTTPSession], Type[HTTPRequest], Type[HTTPResult]]:
+    """
+    Session, request and result classes for the given http library name.
+    - requests: blocking adapter (default)
+    - aiohttp:  asyncio adapter, requires the optional aiohttp dependency
+    - replay:   replays recorded traffic (see http_replay), for offline tests and benchmarks
+    """
+    if library == "requests":
+        return RequestsSession, HTTPRequestsRequest, RequestsResult
+    elif library == "aiohttp":
+        from myunfi.http_wrappers.http_aiohttp import AioHTTPRequest, AioHTTPResult, AioHTTPSession
+        return AioHTTPSession, AioHTTPRequest, AioHTTPResult
+    elif library == "replay":
+        from myunfi.http_wrappers.http_replay import ReplaySession
+        return ReplaySession, HTTPRequestsRequest, RequestsResult
+    return HTTPSession, HTTPRequest, HTTPResult
 
-    Result = RequestsResult
-    Request = HTTPRequestsRequest
-    Session = RequestsSession
+
+Session, Request, Result = get_wrapper_classes(http_library)
 
 
 def get_session() -> Type[HTTPSession]:
@@ -29,10 +39,13 @@ def get_result() -> Type[HTTPResult]:
 
 
 class HTTPWrapperFactory:
-    def __init__(self):
-        self.session = get_session()
-        self.request = get_request()
-        self.result = get_result()
+    def __init__(self, library: str = None):
+        if library is None:
+            self.session = get_session()
+            self.request = get_request()
+            self.result = get_result()
+        else:
+            self.session, self.request, self.result = get_wrapper_classes(library)
 
     def get_session(self) -> Type[HTTPSession]:
         return self.session
@@ -1,27 +1,30 @@
 from __future__ import annotations
 import abc
 import mimetypes
-from typing import Type
-from myunfi.config import random_delay
+from typing import Any, Callable, Iterator, TYPE_CHECKING, Type
+from myunfi.http_wrappers import json_backend
+from myunfi.http_wrappers.rate_limit import RateLimiter
+from myunfi.http_wrappers.retry import RetryPolicy
 from myunfi.logger import get_logger
-import time, random
 
 from myunfi.http_wrappers.responses import BytesResponse, CSVResponse, ErrorResponse, ExcelResponse, HTMLResponse, \
     ImageResponse, \
     JSONResponse, PDFResponse, TextResponse, HTTPResponse, VideoResponse, XMLResponse
 
+if TYPE_CHECKING:
+    from myunfi.http_wrappers.cache import ResponseCache
+
 ALLOWED_VERBS = ["GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS", "PATCH"]
+# marks a result whose body has not been parsed yet, None is a valid JSON document
+NOT_PARSED = object()
+# default of a session's rate_limiter, retry_policy and cache: build it from config, None turns it off
+FROM_CONFIG: Any = object()
 
 logger = get_logger(__name__)
 
 
-def request_sleep(start: float = 1, stop: float = 3):
-    sleep_logger = logger.getChild("request_sleep")
-    if random_delay:
-        duration = random.uniform(start, stop)
-        sleep_logger.debug("Sleeping for %s seconds", duration)
-        time.sleep(duration)
-        sleep_logger.debug("Done sleeping")
+def from_config(value: Any, factory: Callable[[], Any]) -> Any:
+    return factory() if value is FROM_CONFIG else value
 
 
 class HTTPAdapter(abc.ABC):
@@ -74,8 +77,12 @@ class HTTPAdapter(abc.ABC):
 
 
 class HTTPSession(HTTPAdapter):
-    def __init__(self, session):
+    def __init__(self, session, rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None,
+                 cache: ResponseCache = None):
         self.session = session
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.cache = cache
 
     def get_session(self) -> Type[HTTPSession]:
         return self.session
@@ -135,7 +142,8 @@ class HTTPRequest(abc.ABC):
         :param json: HTTP json
         :param cookies: HTTP cookies
         :param session: OPTIONAL: HTTP session. creates a new session if not provided.
-        :param append_to_session: OPTIONAL: Append to existing session info or overwrite headers and cookies
+        :param append_to_session: OPTIONAL: Kept for compatibility. Headers and cookies are merged over the session's
+                                  at send time, the session itself is never modified by a request.
         """
         self.url = url
         self.verb = verb
@@ -151,21 +159,25 @@ class HTTPRequest(abc.ABC):
         self.status_code = None
         if session is not None:
             self.requester = session
-            if self.headers is not None:
-                self.session.headers = self.headers
-            if self.cookies is not None:
-                self.session.cookies = self.cookies
 
         self.__response: HTTPResult = None
         self.response_content_type: str = None
 
     def execute(self) -> Type[HTTPResult]:
-        if self.verb.upper() not in ALLOWED_VERBS:
-            raise ValueError(f"Invalid verb: {self.verb}")
+        self.validate_verb()
         self.__response = None
         response = self.requester.request(self.verb, self.url, headers=self.headers, params=self.params, json=self.json,
                                           data=self.data, cookies=self.cookies)
+        return self.set_response(response)
+
+    def validate_verb(self) -> None:
+        if self.verb.upper() not in ALLOWED_VERBS:
+            raise ValueError(f"Invalid verb: {self.verb}")
 
+    def set_response(self, response: HTTPResult) -> Type[HTTPResult]:
+        """
+        Store the result of an executed request. Shared by the blocking and asyncio adapters.
+        """
         if response.headers.get('Content-Type') is not None:
             self.response_content_type = response.headers.get('Content-Type').split(';')[0]
         else:
@@ -218,6 +230,8 @@ class HTTPRequest(abc.ABC):
 class HTTPResult(abc.ABC):
     def __init__(self, response):
         self.response = response
+        self._text = None
+        self._json = NOT_PARSED
 
     @property
     def url(self) -> str:
@@ -259,18 +273,44 @@ class HTTPResult(abc.ABC):
     def get_headers(self) -> dict:
         pass
 
-    @abc.abstractmethod
     def get_json(self) -> dict:
-        pass
+        """
+        The body parsed as JSON. It is parsed once and the same object is returned on every call,
+        copy it before changing it if the original is still needed.
+        """
+        if self._json is NOT_PARSED:
+            self._json = json_backend.loads(self.get_content())
+        return self._json
 
     @abc.abstractmethod
     def get_cookies(self) -> dict:
         pass
 
-    @abc.abstractmethod
     def get_text(self) -> str:
+        """
+        The body decoded to text, decoded once and cached.
+        """
+        if self._text is None:
+            self._text = self.decode_text()
+        return self._text
+
+    @abc.abstractmethod
+    def decode_text(self) -> str:
         pass
 
+    def iter_content(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        The body in chunks. Results of streamed requests read it from the connection as it is iterated.
+        """
+        content = self.get_content() or b""
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def close(self) -> None:
+        """
+        Release the connection of a streamed request that was not read to the end.
+        """
+
     @abc.abstractmethod
     def get_url(self) -> str:
         pass
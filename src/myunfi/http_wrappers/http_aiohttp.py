@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Optional, Union
+
+from myunfi import config
+from myunfi.http_wrappers.cache import CachedResult, ResponseCache, create_response_cache, header_value
+from myunfi.http_wrappers.download import Download, save_result
+from myunfi.http_wrappers.http_adapters import FROM_CONFIG, HTTPRequest, HTTPResult, HTTPSession, from_config
+from myunfi.http_wrappers.rate_limit import RateLimiter, create_rate_limiter
+from myunfi.http_wrappers.retry import RetryPolicy, create_retry_policy
+from myunfi.logger import get_logger
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:  # aiohttp is an optional dependency, only needed when http_library = "aiohttp"
+    aiohttp = None
+    URL = None
+
+
+def require_aiohttp():
+    if aiohttp is None:
+        raise ImportError("The aiohttp http_library requires aiohttp. Install it with: pip install myunfi[async]")
+
+
+class AioHTTPRequest(HTTPRequest):
+    """
+    Request for the asyncio adapter. execute() is a coroutine and must be awaited.
+    """
+
+    def __init__(self, verb, url, headers=None, params=None, json=None, data=None, cookies=None,
+                 session: AioHTTPSession = None, append_to_session=False):
+        super().__init__(verb, url, headers, params, json, data, cookies, session, append_to_session)
+        if not self.requester:
+            self.requester = AioHTTPSession.create_session()
+
+    async def execute(self) -> AioHTTPResult:
+        self.validate_verb()
+        response = await self.requester.request(self.verb, self.url, headers=self.headers, params=self.params,
+                                                 json=self.json, data=self.data, cookies=self.cookies)
+        return self.set_response(response)
+
+    def __repr__(self):
+        return f"<AioHTTPRequest: {self.verb} {self.url} executed={self.executed} status_code={self.status_code}>"
+
+
+class AioHTTPSession(HTTPSession):
+    """
+    asyncio implementation of HTTPSession backed by aiohttp.ClientSession.
+    All verbs are coroutines. The underlying ClientSession is created lazily on the first request
+    so the session can be constructed outside of a running event loop.
+    Usage:
+        async with AioHTTPSession.from_session(client.session) as session:
+            product = await Product(itemNumber="61003").fetch_async(session)
+    """
+
+    def __init__(self, session: "aiohttp.ClientSession" = None, headers: dict = None, cookies: dict = None,
+                 rate_limiter: RateLimiter = FROM_CONFIG, retry_policy: RetryPolicy = FROM_CONFIG,
+                 cache: ResponseCache = FROM_CONFIG, connector_options: dict = None, **session_options):
+        require_aiohttp()
+        super().__init__(session, from_config(rate_limiter, create_rate_limiter),
+                         from_config(retry_policy, create_retry_policy), from_config(cache, create_response_cache))
+        self.logger = get_logger(__name__)
+        self._headers = dict(headers or {})
+        self._pending_cookies = []
+        self._connector_options = connector_options
+        self._session_options = session_options
+        if cookies:
+            self.cookies = cookies
+
+    @classmethod
+    def create_session(cls, pool_connections: int = None, pool_maxsize: int = None, pool_block: bool = None,
+                       keep_alive: bool = None, tcp_nodelay: bool = None, tcp_keepalive: bool = None,
+                       **session_options) -> AioHTTPSession:
+        """
+        Create a session with a connection pool sized like RequestsSession.create_session.
+        pool_maxsize limits connections per host and keep_alive=False closes connections after each request.
+        aiohttp always waits for a free connection and sets TCP_NODELAY/SO_KEEPALIVE itself, so pool_connections,
+        pool_block, tcp_nodelay and tcp_keepalive are accepted for compatibility only.
+        """
+        session_options.setdefault("connector_options", dict(
+            limit_per_host=config.http_pool_maxsize if pool_maxsize is None else pool_maxsize,
+            force_close=not (config.http_keep_alive if keep_alive is None else keep_alive),
+        ))
+        return AioHTTPSession(**session_options)
+
+    @classmethod
+    def from_session(cls, session: HTTPSession, **session_options) -> AioHTTPSession:
+        """
+        Create an asyncio session sharing the headers, cookies, rate limiter, retry budget and response cache
+        of another session,
+        e.g. a logged in MyUNFIClient session. Cookie domains are preserved where available.
+        """
+        session_options.setdefault("rate_limiter", session.rate_limiter)
+        session_options.setdefault("retry_policy", session.retry_policy)
+        session_options.setdefault("cache", session.cache)
+        async_session = cls.create_session(headers=dict(session.headers), **session_options)
+        for cookie in session.cookies:
+            if hasattr(cookie, "domain"):
+                async_session._pending_cookies.append(({cookie.name: cookie.value}, cookie.domain.lstrip(".")))
+            else:
+                async_session._pending_cookies.append(({cookie: session.cookies[cookie]}, ""))
+        return async_session
+
+    def get_session(self) -> "aiohttp.ClientSession":
+        if self.session is None or self.session.closed:
+            session_options = dict(self._session_options)
+            if self._connector_options is not None and "connector" not in session_options:
+                # the connector binds to the running loop so it is created here rather than in __init__
+                session_options["connector"] = aiohttp.TCPConnector(**self._connector_options)
+            self.session = aiohttp.ClientSession(**session_options)
+        while self._pending_cookies:
+            cookies, domain = self._pending_cookies.pop(0)
+            response_url = URL(f"https://{domain}/") if domain else URL()
+            self.session.cookie_jar.update_cookies(cookies, response_url=response_url)
+        return self.session
+
+    def create_request(self, verb: str, url: str, headers: dict = None, params: dict = None,
+                       json: dict = None, data: bytes = None,
+                       cookies: dict = None, append_to_session: bool = False, **kwargs) -> AioHTTPRequest:
+        return AioHTTPRequest(verb=verb, url=url, headers=headers, params=params, json=json, data=data,
+                              cookies=cookies, session=self, append_to_session=append_to_session)
+
+    async def get(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('PUT', url, **kwargs)
+
+    async def delete(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('DELETE', url, **kwargs)
+
+    async def head(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('HEAD', url, **kwargs)
+
+    async def options(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('OPTIONS', url, **kwargs)
+
+    async def patch(self, url, **kwargs) -> AioHTTPResult:
+        return await self.request('PATCH', url, **kwargs)
+
+    async def request(self, method, url, allow_sleep=True, idempotent: bool = None, use_cache: bool = True,
+                      **kwargs) -> Union[AioHTTPResult, CachedResult]:
+        """
+        Send a request, retrying transient failures according to the session's retry policy.
+        idempotent overrides the retry policy's method check, e.g. True for read only POST endpoints.
+        GET requests are answered from the session's response cache when it has a fresh entry,
+        use_cache=False always goes to the server.
+        """
+        request_logger = self.logger.getChild("request")
+        request_logger.debug(f'{method} {url} {kwargs=}')
+        headers = {**self._headers, **(kwargs.pop("headers", None) or {})}
+        params = prepare_params(kwargs.pop("params", None))
+        lookup = None
+        if self.cache is not None and use_cache and not kwargs.pop("stream", None):
+            lookup = self.cache.lookup(method, url, params, header_value(headers, "accept"))
+        if lookup and lookup.fresh:
+            request_logger.debug(f'{method} {url} served from cache')
+            return CachedResult(lookup.entry)
+        if lookup and lookup.entry:
+            headers.update(lookup.entry.validators())
+        kwargs.pop("stream", None)
+        timeout = kwargs.pop("timeout", None)
+        if isinstance(timeout, (int, float)):
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        if kwargs.get("json") is None:
+            kwargs.pop("json", None)
+        if kwargs.get("data") is None:
+            kwargs.pop("data", None)
+        if not kwargs.get("cookies"):
+            kwargs.pop("cookies", None)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await self.send(method, url, allow_sleep, headers=headers, params=params, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = self.retry_policy.retry_delay(method, attempt, error=e, idempotent=idempotent) \
+                    if self.retry_policy else None
+                if delay is None:
+                    raise
+                request_logger.warning(f'{method} {url} failed with {e!r}, retry {attempt} in {delay:.2f}s')
+                await asyncio.sleep(delay)
+                continue
+            if not self.retry_policy:
+                break
+            delay = self.retry_policy.retry_delay(method, attempt, status_code=result.status_code,
+                                                  retry_after=result.headers.get("Retry-After"),
+                                                  idempotent=idempotent)
+            if delay is None:
+                break
+            request_logger.warning(f'{method} {url} returned {result.status_code}, retry {attempt} in {delay:.2f}s')
+            await asyncio.sleep(delay)
+        if lookup and lookup.entry and result.status_code == 304:
+            request_logger.debug(f'{method} {url} revalidated cache entry')
+            return CachedResult(self.cache.revalidated(lookup, result.headers))
+        try:
+            result.response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            request_logger.exception(e)
+            request_logger.error(f'{method} {url} response: {result.text=} {result.headers=}')
+            raise
+        if lookup and result.status_code == 200:
+            self.cache.store(lookup, result.url, result.status_code, result.headers, result.content)
+        return result
+
+    async def download(self, url, path: Union[str, Path], chunk_size: int = None, **kwargs) -> Download:
+        """
+        asyncio variant of RequestsSession.download. aiohttp results are read inside request(), so the body is
+        held until it is written, the file is still written atomically and hashed in the same pass.
+        """
+        result = await self.request('GET', url, **kwargs)
+        return save_result(result, path, chunk_size)
+
+    async def send(self, method, url, allow_sleep=True, **kwargs) -> AioHTTPResult:
+        """
+        Send a single attempt through the rate limiter and read the body.
+        """
+        session = self.get_session()
+        limiter = self.rate_limiter if allow_sleep else None
+        start = await limiter.acquire_async() if limiter else None
+        try:
+            async with session.request(method, url, **kwargs) as res:
+                content = await res.read()
+        except asyncio.CancelledError:
+            if limiter:
+                limiter.release(start)
+            raise
+        except Exception:
+            if limiter:
+                limiter.release(start, error=True)
+            raise
+        if limiter:
+            limiter.release(start, res.status)
+        return AioHTTPResult(res, content)
+
+    @property
+    def headers(self) -> dict:
+        return self._headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = dict(value) if value is not None else {}
+
+    @property
+    def cookies(self) -> dict:
+        if self.session is None:
+            return {name: value for cookies, _ in self._pending_cookies for name, value in cookies.items()}
+        return {cookie.key: cookie.value for cookie in self.session.cookie_jar}
+
+    @cookies.setter
+    def cookies(self, value):
+        if value is None:
+            return
+        self._pending_cookies.append((dict(value), ""))
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def __enter__(self):
+        raise TypeError("AioHTTPSession must be used with 'async with'")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def __aenter__(self) -> AioHTTPSession:
+        self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AioHTTPResult(HTTPResult):
+    """
+    Adapter for aiohttp.ClientResponse. The body is read inside the request coroutine
+    so the result can be used synchronously after the connection is released.
+    """
+
+    def __init__(self, response: "aiohttp.ClientResponse", content: bytes):
+        super().__init__(response)
+        self._content = content
+
+    def get_status_code(self) -> int:
+        return self.response.status
+
+    def get_content(self) -> bytes:
+        return self._content
+
+    def get_headers(self) -> dict:
+        return self.response.headers
+
+    def get_cookies(self) -> dict:
+        return {name: morsel.value for name, morsel in self.response.cookies.items()}
+
+    def decode_text(self) -> str:
+        return self._content.decode(self.response.get_encoding(), errors="replace")
+
+    def get_url(self) -> str:
+        return str(self.response.url)
+
+    def get_content_type(self) -> Optional[str]:
+        return self.response.headers.get('content-type')
+
+
+def prepare_params(params: Optional[dict]) -> Optional[list]:
+    """
+    aiohttp is stricter than requests about query values. Drop None values, render bools like requests
+    and repeat the key for list values.
+    """
+    if not params:
+        return None
+    prepared = []
+    for key, value in params.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if item is None:
+                continue
+            if isinstance(item, bool):
+                item = str(item)
+            prepared.append((key, item))
+    return prepared
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import base64
+import json
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.client import responses
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+import requests.adapters
+from requests import Session
+
+from myunfi import config
+from myunfi.http_wrappers.cache import ResponseCache
+from myunfi.http_wrappers.exceptions import ReplayMissException
+from myunfi.http_wrappers.http_requests import RequestsSession
+from myunfi.http_wrappers.rate_limit import RateLimiter
+from myunfi.http_wrappers.retry import RetryPolicy
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+# response headers that are never written to a cassette
+UNRECORDED_HEADERS = frozenset({"set-cookie", "content-encoding", "transfer-encoding", "content-length"})
+# pseudo status for injected errors that raise requests.ConnectionError instead of returning a response
+CONNECTION_ERROR = 0
+
+
+@dataclass
+class Interaction:
+    """
+    A recorded request/response pair. body is utf-8 text, or base64 when encoding is "base64".
+    latency is the time the live request took, in seconds.
+    """
+    method: str
+    url: str
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: str = ""
+    encoding: str = "utf-8"
+    latency: float = 0.0
+
+    @classmethod
+    def from_content(cls, method: str, url: str, status_code: int, headers: dict, content: bytes,
+                     latency: float = 0.0) -> Interaction:
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        headers = {name: value for name, value in headers.items() if name.lower() not in UNRECORDED_HEADERS}
+        return cls(method.upper(), url, status_code, headers, body, encoding, latency)
+
+    @property
+    def content(self) -> bytes:
+        if self.encoding == "base64":
+            return base64.b64decode(self.body)
+        return self.body.encode("utf-8")
+
+
+class Cassette:
+    """
+    Recorded interactions, saved as JSON. Requests are matched on method, path and sorted query first and on
+    method and path alone second, so requests with date or paging params still find a recording.
+    When an url was recorded more than once the recordings are replayed in order, the last one repeating.
+    """
+
+    def __init__(self, interactions: List[Interaction] = None, path: Union[str, Path] = None):
+        self.path = Path(path) if path else None
+        self.interactions: List[Interaction] = []
+        self._exact: Dict[Tuple, List[Interaction]] = {}
+        self._by_path: Dict[Tuple, List[Interaction]] = {}
+        self._plays: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+        for interaction in interactions or []:
+            self.add(interaction)
+
+    @staticmethod
+    def match_keys(method: str, url: str) -> Tuple[Tuple, Tuple]:
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return (method.upper(), parts.path, query), (method.upper(), parts.path)
+
+    def add(self, interaction: Interaction):
+        exact, by_path = self.match_keys(interaction.method, interaction.url)
+        with self._lock:
+            self.interactions.append(interaction)
+            self._exact.setdefault(exact, []).append(interaction)
+            self._by_path.setdefault(by_path, []).append(interaction)
+
+    def find(self, method: str, url: str) -> Optional[Interaction]:
+        exact, by_path = self.match_keys(method, url)
+        with self._lock:
+            for key, index in ((exact, self._exact), (by_path, self._by_path)):
+                recordings = index.get(key)
+                if recordings:
+                    play = self._plays.get(key, 0)
+                    self._plays[key] = play + 1
+                    return recordings[min(play, len(recordings) - 1)]
+        return None
+
+    def rewind(self):
+        with self._lock:
+            self._plays.clear()
+
+    def save(self, path: Union[str, Path] = None):
+        path = Path(path or self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"interactions": [asdict(interaction) for interaction in self.interactions]}
+        path.write_text(json.dumps(data, indent=2))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Cassette:
+        data = json.loads(Path(path).read_text())
+        return cls([Interaction(**interaction) for interaction in data["interactions"]], path)
+
+    @classmethod
+    def from_fixtures(cls, directory: Union[str, Path] = None, account_id: str = None) -> Cassette:
+        """
+        Build a cassette from the JSON fixtures in myunfi_tests/Assets (Items, Invoices, Orders, Pricing).
+        """
+        from myunfi.api.endpoints import shopping_customers_items_endpoints, shopping_customers_orders_endpoints
+        directory = Path(directory or config.replay_fixtures_directory or default_fixtures_directory())
+        account_id = account_id or config.default_account_number
+        items = shopping_customers_items_endpoints
+        orders = shopping_customers_orders_endpoints
+        cassette = cls()
+
+        def fixture(name: str) -> Optional[dict]:
+            path = directory / name
+            if not path.exists():
+                logger.warning("Replay fixture %s not found", path)
+                return None
+            return json.loads(path.read_text())
+
+        def add(method: str, url: str, data: dict):
+            cassette.add(Interaction.from_content(method, url, 200, {"Content-Type": "application/json"},
+                                                  json.dumps(data).encode("utf-8")))
+
+        item_data = fixture("Items/item.json")
+        for item in (item_data or {}).get("items", []):
+            add("GET", f"{items['items'].format(accountID=account_id)}/{item['itemNumber']}", {"items": [item]})
+        for method, url, name in (("POST", items["quantity_on_hand"].format(accountID=account_id),
+                                   "Items/qty_on_hand.json"),
+                                  ("POST", items["pricing"].format(accountID=account_id), "Pricing/pricing.json"),
+                                  ("GET", orders["open_orders"].format(accountID=account_id),
+                                   "Orders/open_orders.json"),
+                                  ("GET", orders["invoices"].format(accountID=account_id),
+                                   "Invoices/invoices.json")):
+            data = fixture(name)
+            if data is not None:
+                add(method, url, data)
+        for name in ("Invoices/invoice.json", "Invoices/invoice_credit.json"):
+            invoice = fixture(name)
+            if invoice is not None:
+                url = orders["invoice_id"].format(accountID=account_id, invoiceID=invoice["invoiceNumber"])
+                add("GET", f"{url}?transactionType={invoice['transactionType']}", invoice)
+        # fetch_invoices loads the invoices page before calling the API
+        cassette.add(Interaction("GET", f"{config.api_base_url}/shopping/orders/invoices", 200,
+                                 {"Content-Type": "text/html"}, "<html></html>"))
+        order = fixture("Orders/order_id_uuid.json")
+        if order is not None:
+            add("GET", orders["order_id"].format(accountID=account_id, orderID=order["uuid"]), order)
+        return cassette
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def __repr__(self):
+        return f"<Cassette {self.path or ''} interactions={len(self)}>"
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """
+    requests transport adapter that answers requests from a cassette.
+    - latency: seconds added to every response, a (min, max) tuple for a uniform random delay,
+               or None to replay the recorded latency.
+    - error_rate: fraction of requests answered with error_status instead of the recording.
+                  error_status=CONNECTION_ERROR raises requests.ConnectionError instead.
+    - seed: seed for the latency and error random number generator so runs are repeatable.
+    - strict: raise ReplayMissException for unrecorded requests instead of answering 404.
+    """
+
+    def __init__(self, cassette: Cassette, latency: Union[float, Tuple[float, float], None] = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, seed: int = None, strict: bool = False):
+        super().__init__()
+        self.cassette = cassette
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.strict = strict
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, stream=False, timeout=None, verify=True, cert=None,
+             proxies=None) -> requests.Response:
+        interaction = self.cassette.find(request.method, request.url)
+        with self._lock:
+            self.request_count += 1
+            inject_error = self.error_rate and self.random.random() < self.error_rate
+            delay = self.delay(interaction)
+        if delay:
+            time.sleep(delay)
+        if inject_error:
+            if self.error_status == CONNECTION_ERROR:
+                raise requests.exceptions.ConnectionError(f"Injected connection error for {request.url}",
+                                                          request=request)
+            return self.build_response(request, self.error_status, {"Content-Type": "text/plain"}, b"Injected error")
+        if interaction is None:
+            if self.strict:
+                raise ReplayMissException(f"No recording for {request.method} {request.url}")
+            logger.warning("No recording for %s %s", request.method, request.url)
+            return self.build_response(request, 404, {"Content-Type": "text/plain"}, b"Not recorded")
+        return self.build_response(request, interaction.status_code, interaction.headers, interaction.content)
+
+    def delay(self, interaction: Optional[Interaction]) -> float:
+        if self.latency is None:
+            return interaction.latency if interaction else 0.0
+        if isinstance(self.latency, (tuple, list)):
+            return self.random.uniform(*self.latency)
+        return self.latency
+
+    @staticmethod
+    def build_response(request: requests.PreparedRequest, status_code: int, headers: dict,
+                       content: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = content
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = responses.get(status_code, "")
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(requests.adapters.HTTPAdapter):
+    """
+    requests transport adapter that sends requests to the server and records the responses in a cassette.
+    Request headers and cookies are never recorded.
+    """
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content
+        self.cassette.add(Interaction.from_content(request.method, request.url, response.status_code,
+                                                   response.headers, content, time.perf_counter() - start))
+        return response
+
+
+class ReplaySession(RequestsSession):
+    """
+    RequestsSession that replays a cassette instead of talking to MyUNFI, or records one with record=True.
+    Retries, caching and the request/result classes behave exactly as with a live session.
+    Replay sessions are not rate limited unless a rate_limiter is given.
+    Usage:
+        session = ReplaySession(Cassette.from_fixtures(), latency=(0.05, 0.2), error_rate=0.02, seed=1)
+        product = Product(itemNumber="58082").fetch(session)
+
+        recorder = ReplaySession(Cassette(path="run.json"), record=True)
+        do_login(recorder, username, password)
+        ...
+        recorder.cassette.save()
+    """
+
+    def __init__(self, cassette: Cassette = None, record: bool = False,
+                 latency: Union[float, Tuple[float, float], None] = None, error_rate: float = None,
+                 error_status: int = 503, seed: int = None, strict: bool = False, rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, cache: ResponseCache = None):
+        self.cassette = cassette if cassette is not None else default_cassette()
+        session = Session()
+        if record:
+            self.adapter = RecordingAdapter(self.cassette)
+        else:
+            self.adapter = ReplayAdapter(self.cassette,
+                                         config.replay_latency if latency is None else latency,
+                                         config.replay_error_rate if error_rate is None else error_rate,
+                                         error_status, config.replay_seed if seed is None else seed, strict)
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        super().__init__(session, rate_limiter, retry_policy, cache)
+        if not record:
+            self.rate_limiter = rate_limiter
+
+    @classmethod
+    def create_session(cls, cassette: Cassette = None, **options) -> ReplaySession:
+        return ReplaySession(cassette, **options)
+
+    @property
+    def request_count(self) -> int:
+        return getattr(self.adapter, "request_count", len(self.cassette))
+
+
+def default_fixtures_directory() -> Path:
+    return Path(__file__).parents[3] / "myunfi_tests" / "Assets"
+
+
+def default_cassette() -> Cassette:
+    """
+    The cassette named in config.replay_cassette, or one seeded from the test fixtures.
+    """
+    if config.replay_cassette:
+        return Cassette.load(config.replay_cassette)
+    return Cassette.from_fixtures()
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-from typing import Type
-import random
+import socket
 import time
+from pathlib import Path
+from typing import Iterator, Type, Union
 import requests
+import requests.adapters
 from requests import Session
 from requests.cookies import RequestsCookieJar
 from requests.structures import CaseInsensitiveDict
 
 from myunfi import config
-from myunfi.http_wrappers.http_adapters import HTTPRequest, HTTPResult, HTTPSession, request_sleep
+from myunfi.http_wrappers.cache import CachedResult, ResponseCache, create_response_cache, header_value
+from myunfi.http_wrappers.download import Download, save_result
+from myunfi.http_wrappers.http_adapters import FROM_CONFIG, HTTPRequest, HTTPResult, HTTPSession, from_config
+from myunfi.http_wrappers.rate_limit import RateLimiter, create_rate_limiter
+from myunfi.http_wrappers.retry import RetryPolicy, create_retry_policy
 from myunfi.logger import get_logger
 
 
@@ -19,25 +25,17 @@ class HTTPRequestsRequest(HTTPRequest):
         super().__init__(verb, url, headers, params, json, data, cookies, session, append_to_session)
         if not self.requester:
             self.requester = RequestsSession(requests.Session())
-            if self.headers:
-                if self.append_to_session:
-                    self.requester.headers = self.requester.headers.update(self.headers)
-                    self.headers = self.requester.headers
-                else:
-                    self.requester.headers = self.headers
-
-            if self.cookies:
-                if self.append_to_session:
-                    self.requester.cookies = self.requester.cookies.update(self.cookies)
-                    self.cookies = self.requester.cookies
-                else:
-                    self.requester.cookies = self.cookies
 
 
 class RequestsSession(HTTPSession):
 
-    def __init__(self, session: Session):
-        super().__init__(session)
+    def __init__(self, session: Session, rate_limiter: RateLimiter = FROM_CONFIG,
+                 retry_policy: RetryPolicy = FROM_CONFIG, cache: ResponseCache = FROM_CONFIG):
+        """
+        rate_limiter, retry_policy and cache default to the ones built from config, None turns them off.
+        """
+        super().__init__(session, from_config(rate_limiter, create_rate_limiter),
+                         from_config(retry_policy, create_retry_policy), from_config(cache, create_response_cache))
         self.logger = get_logger(__name__)
 
     def create_request(self, verb: str, url: str, headers: dict = None, params: dict = None,
@@ -52,8 +50,35 @@ class RequestsSession(HTTPSession):
         return self.session
 
     @classmethod
-    def create_session(cls) -> RequestsSession:
-        return RequestsSession(Session())
+    def create_session(cls, pool_connections: int = None, pool_maxsize: int = None, pool_block: bool = None,
+                       keep_alive: bool = None, tcp_nodelay: bool = None, tcp_keepalive: bool = None,
+                       rate_limiter: RateLimiter = FROM_CONFIG, retry_policy: RetryPolicy = FROM_CONFIG,
+                       cache: ResponseCache = FROM_CONFIG) -> RequestsSession:
+        """
+        Create a session with a connection pool sized for threaded use. Options default to the http_* config values.
+        :param pool_connections: number of per host connection pools to cache
+        :param pool_maxsize: connections kept open per host, should be >= the number of worker threads
+        :param pool_block: wait for a free pooled connection instead of opening an extra one
+        :param keep_alive: reuse connections between requests, False sends Connection: close
+        :param tcp_nodelay: disable Nagle's algorithm on pooled sockets
+        :param tcp_keepalive: enable TCP keepalive probes so idle pooled sockets are not silently dropped
+        :param rate_limiter: defaults to create_rate_limiter(), None sends requests unthrottled
+        :param retry_policy: defaults to create_retry_policy(), None never retries
+        :param cache: response cache for GET requests, defaults to create_response_cache(), None disables caching
+        """
+        session = Session()
+        adapter = PooledHTTPAdapter(
+            pool_connections=config.http_pool_connections if pool_connections is None else pool_connections,
+            pool_maxsize=config.http_pool_maxsize if pool_maxsize is None else pool_maxsize,
+            pool_block=config.http_pool_block if pool_block is None else pool_block,
+            socket_options=tcp_socket_options(config.http_tcp_nodelay if tcp_nodelay is None else tcp_nodelay,
+                                              config.http_tcp_keepalive if tcp_keepalive is None else tcp_keepalive),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not (config.http_keep_alive if keep_alive is None else keep_alive):
+            session.headers["Connection"] = "close"
+        return RequestsSession(session, rate_limiter, retry_policy, cache)
 
     def get(self, url, **kwargs) -> RequestsResult:
         return self.request('GET', url, **kwargs)
@@ -76,23 +101,87 @@ class RequestsSession(HTTPSession):
     def patch(self, url, **kwargs) -> RequestsResult:
         return self.request('PATCH', url, **kwargs)
 
-    def request(self, method, url, allow_sleep=True, **kwargs) -> RequestsResult:
+    def request(self, method, url, allow_sleep=True, idempotent: bool = None, use_cache: bool = True,
+                **kwargs) -> Union[RequestsResult, CachedResult]:
+        """
+        Send a request, retrying transient failures according to the session's retry policy.
+        idempotent overrides the retry policy's method check, e.g. True for read only POST endpoints.
+        GET requests are answered from the session's response cache when it has a fresh entry,
+        use_cache=False always goes to the server.
+        """
         request_logger = self.logger.getChild("request")
         request_logger.debug(f'{method} {url} {kwargs=}')
-        if allow_sleep:
-            request_sleep()
-        res = self.session.request(method, url, **kwargs)
+        lookup = None
+        if self.cache is not None and use_cache and not kwargs.get("stream"):
+            accept = header_value(kwargs.get("headers"), "accept") or self.headers.get("accept")
+            lookup = self.cache.lookup(method, url, kwargs.get("params"), accept)
+        if lookup and lookup.fresh:
+            request_logger.debug(f'{method} {url} served from cache')
+            return CachedResult(lookup.entry)
+        if lookup and lookup.entry:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **lookup.entry.validators()}
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                res = self.send(method, url, allow_sleep, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = self.retry_policy.retry_delay(method, attempt, error=e, idempotent=idempotent) \
+                    if self.retry_policy else None
+                if delay is None:
+                    raise
+                request_logger.warning(f'{method} {url} failed with {e!r}, retry {attempt} in {delay:.2f}s')
+                time.sleep(delay)
+                continue
+            if not self.retry_policy:
+                break
+            delay = self.retry_policy.retry_delay(method, attempt, status_code=res.status_code,
+                                                  retry_after=res.headers.get("Retry-After"), idempotent=idempotent)
+            if delay is None:
+                break
+            request_logger.warning(f'{method} {url} returned {res.status_code}, retry {attempt} in {delay:.2f}s')
+            res.close()
+            time.sleep(delay)
+        if lookup and lookup.entry and res.status_code == 304:
+            request_logger.debug(f'{method} {url} revalidated cache entry')
+            return CachedResult(self.cache.revalidated(lookup, res.headers))
         try:
             res.raise_for_status()
-            pass
         except requests.exceptions.HTTPError as e:
             request_logger.exception(e)
             request_logger.error(f'{method} {url} response: {res.text=} {res.headers=}')
             raise
-
-        res.raise_for_status()
+        if lookup and res.status_code == 200:
+            self.cache.store(lookup, res.url, res.status_code, res.headers, res.content)
         return RequestsResult(res)
 
+    def download(self, url, path: Union[str, Path], chunk_size: int = None, **kwargs) -> Download:
+        """
+        Stream a GET response body to path without holding it in memory, hashing it as it is written.
+        path may be a directory, the file is then named from the response (see download.response_filename).
+        """
+        result = self.request('GET', url, stream=True, **kwargs)
+        try:
+            return save_result(result, path, chunk_size)
+        finally:
+            result.close()
+
+    def send(self, method, url, allow_sleep=True, **kwargs) -> requests.Response:
+        """
+        Send a single attempt through the rate limiter.
+        """
+        limiter = self.rate_limiter if allow_sleep else None
+        start = limiter.acquire() if limiter else None
+        try:
+            res = self.session.request(method, url, **kwargs)
+        except Exception:
+            if limiter:
+                limiter.release(start, error=True)
+            raise
+        if limiter:
+            limiter.release(start, res.status_code)
+        return res
+
     @property
     def headers(self) -> CaseInsensitiveDict[str]:
         return self.session.headers
@@ -119,6 +208,44 @@ class RequestsSession(HTTPSession):
         self.session.__exit__(exc_type, exc_val, exc_tb)
 
 
+class PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """
+    requests transport adapter that applies socket options to every pooled connection.
+    """
+    __attrs__ = requests.adapters.HTTPAdapter.__attrs__ + ["socket_options"]
+
+    def __init__(self, socket_options: list = None, **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=requests.adapters.DEFAULT_POOLBLOCK, **pool_kwargs):
+        if self.socket_options is not None:
+            pool_kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        if self.socket_options is not None:
+            proxy_kwargs.setdefault("socket_options", self.socket_options)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def tcp_socket_options(tcp_nodelay: bool = True, tcp_keepalive: bool = True) -> list:
+    """
+    Socket options for pooled connections. Keepalive timing is only set on platforms that support it.
+    """
+    options = []
+    if tcp_nodelay:
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    if tcp_keepalive:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        for name, value in (("TCP_KEEPIDLE", config.http_tcp_keepalive_idle),
+                            ("TCP_KEEPINTVL", config.http_tcp_keepalive_interval),
+                            ("TCP_KEEPCNT", config.http_tcp_keepalive_count)):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
 class RequestsResult(HTTPResult):
     """
     Adapter for requests.Response
@@ -133,15 +260,18 @@ class RequestsResult(HTTPResult):
     def get_headers(self) -> dict:
         return self.response.headers
 
-    def get_json(self) -> dict:
-        return self.response.json
-
     def get_cookies(self) -> dict:
         return self.response.cookies
 
-    def get_text(self) -> str:
+    def decode_text(self) -> str:
         return self.response.text
 
+    def iter_content(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        return self.response.iter_content(chunk_size)
+
+    def close(self) -> None:
+        self.response.close()
+
     def get_url(self) -> str:
         return self.response.url
 
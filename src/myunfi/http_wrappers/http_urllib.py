@@ -27,7 +27,7 @@ class URLLibResponse(HTTPResult):
     def get_status_code(self):
         pass
 
-    def get_text(self):
+    def decode_text(self):
         pass
 
     def get_url(self):
@@ -0,0 +1,48 @@
+"""
+JSON decoding for response bodies. Uses orjson or ujson when installed (pip install myunfi[fast-json]) and the
+standard library json module otherwise. config.json_backend picks one explicitly.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+from typing import Any, Callable, Tuple, Union
+
+from myunfi import config
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+# tried in order when config.json_backend is "auto"
+BACKENDS = ("orjson", "ujson", "json")
+
+
+def load_backend(name: str = None) -> Tuple[str, Callable[[Union[bytes, str]], Any], Tuple[type, ...]]:
+    """
+    Return (name, loads, decode errors) for a backend name or "auto".
+    """
+    name = name or config.json_backend or "auto"
+    candidates = BACKENDS if name == "auto" else (name,)
+    for candidate in candidates:
+        try:
+            module = importlib.import_module(candidate)
+        except ImportError:
+            if name != "auto":
+                raise
+            continue
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, ujson raises a ValueError subclass
+        return candidate, module.loads, (getattr(module, "JSONDecodeError", ValueError), json.JSONDecodeError)
+    raise ImportError(f"No JSON backend available from {candidates}")
+
+
+backend_name, _loads, JSONDecodeErrors = load_backend()
+logger.debug("Using %s for JSON decoding", backend_name)
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """
+    Parse a JSON document. bytes are parsed directly where the backend supports it, skipping a text decode.
+    """
+    if backend_name == "ujson" and isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return _loads(data)
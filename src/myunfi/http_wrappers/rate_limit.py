@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+from myunfi import config
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+BACKOFF_STATUS_CODES = {429}
+
+
+class RateLimiter:
+    """
+    Request budget shared by every request made through a session.
+
+    - Token bucket: requests_per_second sustained rate with up to burst requests sent back to back.
+    - AIMD concurrency: the number of requests in flight grows by increase_step per window of healthy
+      responses (faster than latency_target) and is multiplied by decrease_factor on a 429 or 5xx.
+
+    Usage:
+        start = limiter.acquire()
+        response = send()
+        limiter.release(start, response.status_code)
+    """
+
+    def __init__(self, requests_per_second: float = None, burst: int = None, initial_concurrency: int = None,
+                 min_concurrency: int = None, max_concurrency: int = None, latency_target: float = None,
+                 decrease_factor: float = 0.5, increase_step: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests_per_second = requests_per_second or config.rate_limit_requests_per_second
+        self.burst = burst or config.rate_limit_burst
+        self.min_concurrency = min_concurrency or config.rate_limit_min_concurrency
+        self.max_concurrency = max_concurrency or config.rate_limit_max_concurrency
+        self.latency_target = latency_target or config.rate_limit_latency_target
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._tokens = float(self.burst)
+        self._last_refill = clock()
+        self._last_decrease = float("-inf")
+        self._limit = float(min(max(initial_concurrency or config.rate_limit_initial_concurrency,
+                                    self.min_concurrency), self.max_concurrency))
+        self._in_flight = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent. Returns the start time to hand back to release().
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            wait = self._reserve_token()
+        if wait > 0:
+            time.sleep(wait)
+        return self._clock()
+
+    async def acquire_async(self, poll_interval: float = 0.01) -> float:
+        """
+        asyncio variant of acquire(). Waits on the event loop instead of blocking the thread.
+        """
+        while True:
+            with self._condition:
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    wait = self._reserve_token()
+                    break
+            await asyncio.sleep(poll_interval)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self._clock()
+
+    def release(self, start: float, status_code: Optional[int] = None, error: bool = False) -> None:
+        """
+        Return the concurrency slot and adjust the limit from the outcome of the request.
+        error is for requests that failed without a response (connection errors, timeouts).
+        """
+        latency = self._clock() - start
+        with self._condition:
+            self._in_flight -= 1
+            if error or self.should_back_off(status_code):
+                # only back off once per window, responses to requests sent before the last decrease are stale
+                if start > self._last_decrease:
+                    self._limit = max(float(self.min_concurrency), self._limit * self.decrease_factor)
+                    self._last_decrease = self._clock()
+                    if status_code in BACKOFF_STATUS_CODES:
+                        self._tokens = min(self._tokens, 0.0)
+                    logger.debug("Backing off to %s concurrent requests (status %s)", int(self._limit), status_code)
+            elif latency <= self.latency_target:
+                self._limit = min(float(self.max_concurrency), self._limit + self.increase_step / self._limit)
+            self._condition.notify_all()
+
+    @staticmethod
+    def should_back_off(status_code: Optional[int]) -> bool:
+        return status_code is not None and (status_code in BACKOFF_STATUS_CODES or status_code >= 500)
+
+    def _reserve_token(self) -> float:
+        """
+        Take a token, going into debt when the bucket is empty. Returns how long the caller must wait.
+        Must be called with the condition held.
+        """
+        now = self._clock()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.requests_per_second)
+        self._last_refill = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.requests_per_second
+
+    def __repr__(self):
+        return f"<RateLimiter {self.requests_per_second}/s burst={self.burst} " \
+               f"concurrency={self.concurrency_limit} in_flight={self.in_flight}>"
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Rate limiter configured from myunfi.config, or None when rate limiting is disabled.
+    """
+    if not config.rate_limit_enabled:
+        return None
+    return RateLimiter()
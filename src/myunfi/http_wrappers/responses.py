@@ -1,7 +1,8 @@
 from __future__ import annotations
 import abc
-import json
 from typing import TYPE_CHECKING
+from . import json_backend
+from .download import write_chunks
 from .exceptions import *
 import os
 from pathlib import Path
@@ -27,7 +28,7 @@ class HTTPResponse(abc.ABC):
         return self.result.get_headers()
 
     def get_json(self):
-        return json.loads(self.get_text())
+        return self.result.get_json()
 
     def get_text(self):
         return self.result.get_text()
@@ -100,10 +101,7 @@ class DataResponse(HTTPResponse):
         path = Path(path)
         if path.is_dir():
             path = path / self.get_filename()
-        with path.open('wb') as f:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            f.write(self.get_data())
-            f.close()
+        write_chunks(self.result.iter_content(), path)
 
     def append_to_file(self, path: str):
         path = Path(path)
@@ -123,7 +121,7 @@ class JSONResponse(HTTPResponse):
         super().__init__(response)
         try:
             self.json = self.get_json()
-        except json.JSONDecodeError:
+        except json_backend.JSONDecodeErrors:
             self.json = None
             raise NonJSONResponseException("Response is not JSON")
 
@@ -134,7 +132,6 @@ class TextResponse(HTTPResponse):
         # ensure that the response is text
         if not self.get_content_type().startswith("text"):
             raise NonTextResponseException("Response is not text")
-        self.text = self.get_text()
 
 
 class ImageResponse(DataResponse):
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import random
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Optional
+
+from myunfi import config
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RetryBudget:
+    """
+    Retries allowed for a whole run, shared by every request made through a session.
+    Keeps a failing portal from turning a batch job into max_attempts times as many requests.
+    max_retries=None means unlimited.
+    """
+
+    def __init__(self, max_retries: Optional[int] = None):
+        self.max_retries = max_retries
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.max_retries is None:
+            return None
+        return max(self.max_retries - self.spent, 0)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.max_retries is not None and self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+    def reset(self):
+        with self._lock:
+            self.spent = 0
+
+    def __repr__(self):
+        return f"<RetryBudget spent={self.spent} max_retries={self.max_retries}>"
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed request.
+    - Only idempotent methods are retried unless the caller marks the request idempotent
+      (e.g. the read only POST endpoints like quantity on hand and item search).
+    - Backoff is exponential with full jitter: uniform(0, min(max_backoff, backoff_factor * 2 ** (attempt - 1))).
+    - A Retry-After header (seconds or HTTP date) overrides the backoff. Retry-After values longer than
+      max_retry_after are not waited for and the error is raised instead.
+    """
+    max_attempts: int = field(default_factory=lambda: config.retry_max_attempts)
+    backoff_factor: float = field(default_factory=lambda: config.retry_backoff_factor)
+    max_backoff: float = field(default_factory=lambda: config.retry_max_backoff)
+    max_retry_after: float = field(default_factory=lambda: config.retry_max_retry_after)
+    status_codes: FrozenSet[int] = RETRY_STATUS_CODES
+    methods: FrozenSet[str] = IDEMPOTENT_METHODS
+    budget: Optional[RetryBudget] = field(default_factory=lambda: RetryBudget(config.retry_budget))
+
+    def is_idempotent(self, method: str, idempotent: bool = None) -> bool:
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in self.methods
+
+    def retry_delay(self, method: str, attempt: int, status_code: int = None, retry_after: str = None,
+                    error: Exception = None, idempotent: bool = None) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt, or None if the request should not be retried.
+        attempt is the number of the attempt that just failed, starting at 1.
+        Pass status_code for error responses or error for requests that failed without a response.
+        """
+        if attempt >= self.max_attempts or not self.is_idempotent(method, idempotent):
+            return None
+        if error is None and status_code not in self.status_codes:
+            return None
+        delay = self.backoff(attempt)
+        if retry_after:
+            server_delay = parse_retry_after(retry_after)
+            if server_delay is not None:
+                if server_delay > self.max_retry_after:
+                    logger.warning("Retry-After of %ss exceeds %ss, not retrying", server_delay, self.max_retry_after)
+                    return None
+                delay = server_delay
+        if self.budget is not None and not self.budget.try_spend():
+            logger.warning("Retry budget of %s exhausted, not retrying", self.budget.max_retries)
+            return None
+        return delay
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1)))
+
+
+def parse_retry_after(value: str, now: datetime = None) -> Optional[float]:
+    """
+    Parse a Retry-After header, either delay-seconds or an HTTP date, into seconds from now.
+    Returns None for values that can not be parsed.
+    """
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((retry_at - now).total_seconds(), 0.0)
+
+
+def create_retry_policy() -> Optional[RetryPolicy]:
+    """
+    Retry policy configured from myunfi.config, or None when retries are disabled.
+    """
+    if not config.retry_enabled:
+        return None
+    return RetryPolicy()
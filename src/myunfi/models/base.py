@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Optional, Type
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Type
 
 from pydantic import BaseModel, Field, ValidationError, root_validator
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.utils import ROOT_KEY
 
+from myunfi import config
 from myunfi.http_wrappers.http_adapters import HTTPSession
 from myunfi.http_wrappers.responses import HTTPResponse
 from myunfi.logger import get_logger
@@ -69,6 +74,16 @@ class QueryParams(BaseModel):
     value: str = None
 
 
+@lru_cache(maxsize=None)
+def field_names_by_alias(model: Type[BaseModel]) -> Dict[str, str]:
+    """
+    Field name by alias and by name for a model class, built once per class.
+    """
+    names = {field.name: field.name for field in model.__fields__.values()}
+    names.update({field.alias: field.name for field in model.__fields__.values()})
+    return names
+
+
 class FetchableModel(BaseModel, Sessionable):
     """
     Base class for all models that can be fetched.
@@ -91,6 +106,25 @@ class FetchableModel(BaseModel, Sessionable):
         """
         begin = datetime.now()
         logger = base_logger.getChild(f"{self.__class__.__name__}.fetch")
+        session = self._prepare_fetch(session, logger)
+        result = self._fetch(session, **kwargs)
+        return self._finish_fetch(result, logger, begin)
+
+    async def fetch_async(self, session: HTTPSession = None, **kwargs) -> FetchableModel:
+        """
+        asyncio variant of fetch. Requires an asyncio session (http_library = "aiohttp").
+        Subclasses should implement the _fetch_async method to do the actual fetching.
+        """
+        begin = datetime.now()
+        logger = base_logger.getChild(f"{self.__class__.__name__}.fetch_async")
+        session = self._prepare_fetch(session, logger)
+        result = await self._fetch_async(session, **kwargs)
+        return self._finish_fetch(result, logger, begin)
+
+    def _prepare_fetch(self, session: Optional[HTTPSession], logger) -> HTTPSession:
+        """
+        Check the model can be fetched and return the session to fetch it with.
+        """
         logger.debug(f"Fetching model for {self.__class__.__name__}")
         logger.debug(f"required_fields: {self.__get_field_data(self._required_fields)}")
         logger.debug(f"queryable_fields: {self.__get_field_data(self._queryable_fields)}")
@@ -101,8 +135,12 @@ class FetchableModel(BaseModel, Sessionable):
         if session is None and self.get_session() is None:
             raise ValueError("Cannot fetch product without a session.")
 
-        session = session or self.get_session()
-        result = self._fetch(session, **kwargs)
+        return session or self.get_session()
+
+    def _finish_fetch(self, result: Optional[dict], logger, begin: datetime) -> FetchableModel:
+        """
+        Update the model with the fetched data.
+        """
         if result is None:
             return self
         self.executed = True
@@ -121,18 +159,45 @@ class FetchableModel(BaseModel, Sessionable):
 
     def update_model(self, data: dict) -> None:
         """
-        Updates the model with the data from the response.
-        might be the alias for that field.
-        Sorta hacky, hope this works.
-        Needs the Config.validate_assignment = True or else it could get weird and force some bad data.
-        """
-        aliases_to_fields = {mf.alias or mf.name: mf.name for mf in self.__fields__.values()}
-        for field, value in data.items():
-            if field in aliases_to_fields:
-                setattr(self, aliases_to_fields[field], value)
+        Updates the model with the data from the response, keys may be field names or aliases.
+        Same result as assigning each field with Config.validate_assignment, but the root validators run once for
+        the whole update instead of once per field, only the updated fields are validated, and the model changes
+        only if everything validates.
+        """
+        cls = self.__class__
+        names = field_names_by_alias(cls)
+        new_values = dict(self.__dict__)
+        updated = []
+        for key, value in data.items():
+            name = names.get(key)
+            if name is None:
+                raise ValueError(f'"{cls.__name__}" object has no field "{key}"')
+            new_values[name] = value
+            updated.append(name)
+
+        errors = []
+        for validator in cls.__pre_root_validators__:
+            try:
+                new_values = validator(cls, new_values)
+            except (ValueError, TypeError, AssertionError) as e:
+                raise ValidationError([ErrorWrapper(e, loc=ROOT_KEY)], cls)
+        for name in updated:
+            value, error = cls.__fields__[name].validate(new_values[name], new_values, loc=name, cls=cls)
+            if error:
+                errors.append(error)
             else:
-                # this will throw a validation error if the field is not in the model
-                setattr(self, field, value)
+                new_values[name] = value
+        for skip_on_failure, validator in cls.__post_root_validators__:
+            if skip_on_failure and errors:
+                continue
+            try:
+                new_values = validator(cls, new_values)
+            except (ValueError, TypeError, AssertionError) as e:
+                errors.append(ErrorWrapper(e, loc=ROOT_KEY))
+        if errors:
+            raise ValidationError(errors, cls)
+        object.__setattr__(self, "__dict__", new_values)
+        self.__fields_set__.update(updated)
 
     def _fetch(self, session: HTTPSession = None, **kwargs) -> dict:
         """
@@ -140,6 +205,12 @@ class FetchableModel(BaseModel, Sessionable):
         """
         raise NotImplementedError("All subclasses must implement the _fetch method.")
 
+    async def _fetch_async(self, session: HTTPSession = None, **kwargs) -> dict:
+        """
+        Fetch the model with an asyncio session.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not implement the _fetch_async method.")
+
     def success(self) -> bool:
         """
         Returns true if the model was fetched successfully.
@@ -189,28 +260,71 @@ class FetchableModel(BaseModel, Sessionable):
 class PaginatedFetchableModel(FetchableModel, PaginatedModel):
     """
     Base class for all models that are a single page of a result. allowing for seeking through results.
+    Each page is fetched as a copy of this model with page_number set, keyword arguments are passed to _fetch.
+    Subclasses implement page_items to return the items on a fetched page.
     """
 
-    def fetch_next_page(self, session: HTTPSession) -> Optional[BaseModel]:
+    def page_items(self) -> list:
         """
-        Fetches the next page of the result.
+        Returns the items on this page.
         """
-        ...
+        raise NotImplementedError(f"{self.__class__.__name__} does not implement the page_items method.")
 
-    def fetch_previous_page(self, session: HTTPSession) -> Optional[BaseModel]:
+    def fetch_next_page(self, session: HTTPSession = None, **kwargs) -> Optional[PaginatedFetchableModel]:
         """
-        Fetches the previous page of the result.
+        Fetches the next page of the result, None on the last page.
         """
-        ...
+        page_number = (self.page_number or 0) + 1
+        if self.total_pages is not None and page_number >= self.total_pages:
+            return None
+        return self.get_page(session, page_number, **kwargs)
 
-    def fetch_all_pages(self, session: HTTPSession) -> List[BaseModel]:
+    def fetch_previous_page(self, session: HTTPSession = None, **kwargs) -> Optional[PaginatedFetchableModel]:
         """
-        Fetches all pages of the result.
+        Fetches the previous page of the result, None on the first page.
         """
-        ...
+        if not self.page_number:
+            return None
+        return self.get_page(session, self.page_number - 1, **kwargs)
 
-    def get_page(self, session: HTTPSession, page_number: int) -> Optional[Type[BaseModel]]:
+    def fetch_all_pages(self, session: HTTPSession = None, max_workers: int = None,
+                        **kwargs) -> List[PaginatedFetchableModel]:
         """
-        Fetches a specific page of the result.
+        Fetches all pages of the result in page order. See iter_pages.
         """
-        ...
+        return sorted(self.iter_pages(session, max_workers, **kwargs), key=lambda page: page.page_number)
+
+    def iter_pages(self, session: HTTPSession = None, max_workers: int = None,
+                   **kwargs) -> Iterator[PaginatedFetchableModel]:
+        """
+        Yields every page of the result as it arrives. The first page is fetched on its own to read total_pages,
+        the rest are fetched max_workers (default config.page_fetch_max_workers) at a time and yielded in the order
+        they complete. Pages not yet fetched are cancelled when the iterator is closed early.
+        """
+        first = self.get_page(session, 0, **kwargs)
+        yield first
+        total_pages = first.total_pages or 1
+        if total_pages <= 1:
+            return
+        executor = ThreadPoolExecutor(max_workers=min(max_workers or config.page_fetch_max_workers, total_pages - 1))
+        try:
+            futures = [executor.submit(self.get_page, session, page_number, **kwargs)
+                       for page_number in range(1, total_pages)]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_items(self, session: HTTPSession = None, max_workers: int = None, **kwargs) -> Iterator[Any]:
+        """
+        Yields the items of every page as the pages arrive. See iter_pages.
+        """
+        for page in self.iter_pages(session, max_workers, **kwargs):
+            yield from page.page_items()
+
+    def get_page(self, session: HTTPSession = None, page_number: int = 0, **kwargs) -> PaginatedFetchableModel:
+        """
+        Fetches a specific page of the result. This model is left unchanged.
+        """
+        page = self.copy(update={"page_number": page_number})
+        return page.fetch(session, **kwargs)
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from collections import OrderedDict
 from datetime import date, datetime
-from typing import List, Optional
+from pathlib import Path
+from typing import List, Optional, Union
 
 from pydantic import BaseModel, Field, root_validator, validator
 
-from myunfi.api.shopping.orders import fetch_invoice
+from myunfi.api.shopping.orders import download_invoice, fetch_invoice, fetch_invoice_async
+from myunfi.http_wrappers.download import Download
 from myunfi.http_wrappers.http_adapters import HTTPSession
 from myunfi.models.base import FetchableModel
 from myunfi import config
@@ -196,10 +198,20 @@ class Invoice(FetchableModel):
     def _fetch(self, session: HTTPSession) -> dict:
         res = fetch_invoice(session, account_id=self.account_id, invoice_number=self.invoice_number,
                             transaction_type=self.transaction_type)
-        js = res.get_json()
-        js = self.orders_to_invoice(js)
-        return js
-        pass
+        # orders_to_invoice changes the dict it is given, keep the response's cached JSON intact
+        return self.orders_to_invoice(dict(res.get_json()))
+
+    async def _fetch_async(self, session: HTTPSession) -> dict:
+        res = await fetch_invoice_async(session, account_id=self.account_id, invoice_number=self.invoice_number,
+                                        transaction_type=self.transaction_type)
+        return self.orders_to_invoice(dict(res.get_json()))
+
+    def download(self, path: Union[str, Path], content_type: str = "PDF", session: HTTPSession = None) -> Download:
+        """
+        Stream the invoice as a PDF or EXCEL file to path (a file or a directory).
+        """
+        return download_invoice(session or self.get_session(), self.account_id, self.invoice_number, path,
+                                self.transaction_type or "INVOICE", content_type)
 
     def __repr__(self):
         original = super().__repr__()
@@ -107,6 +107,9 @@ class InvoiceList(PaginatedFetchableModel):
 
         return data
 
+    def page_items(self) -> List[InvoiceResult]:
+        return self.listings or []
+
     def fetch_invoices(self, session=None, **kwargs) -> dict:
         if not session:
             session = self.get_session()
@@ -126,14 +129,25 @@ class InvoiceList(PaginatedFetchableModel):
 
     @classmethod
     def search(cls: InvoiceList, from_date=None, transaction_type=None, page_number=None, page_size=None,
-               session=None, fetch_results=False, **kwargs) -> InvoiceList:
+               session=None, fetch_results=False, all_pages=False, **kwargs) -> InvoiceList:
+        """
+        Search invoices. With all_pages every page is fetched concurrently and the listings combined.
+        """
         session = session or cls.get_session()
         invoice_list = cls()
         invoice_list.from_date = from_date
         invoice_list.transaction_type = transaction_type
         invoice_list.page_number = page_number
         invoice_list.page_size = page_size
-        invoice_list.fetch(session, **kwargs)
+        if all_pages:
+            pages = invoice_list.fetch_all_pages(session, **kwargs)
+            invoice_list.update_model(pages[0].dict(include={"total_elements", "total_pages", "is_sorted",
+                                                             "executed", "last_fetched"}, by_alias=True))
+            invoice_list.page_number = 0
+            invoice_list.listings = [listing for page in pages for listing in page.page_items()]
+            invoice_list.number_of_elements = len(invoice_list.listings)
+        else:
+            invoice_list.fetch(session, **kwargs)
         if fetch_results:
             invoice_list.fetch_invoices(session, **kwargs)
         return invoice_list
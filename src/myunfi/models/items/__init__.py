@@ -1,6 +1,8 @@
 from __future__ import annotations
 from .product import Product
+from .image_store import ImageStore
 from .search import ProductSearch
 from .qty_on_hand import QuantitiesOnHand
 from .pricing import Pricing
-__all__ = [Product, ProductSearch, QuantitiesOnHand, Pricing]
+from .product_store import ProductStore
+__all__ = [Product, ProductSearch, QuantitiesOnHand, Pricing, ImageStore, ProductStore]
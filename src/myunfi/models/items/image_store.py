@@ -0,0 +1,210 @@
+"""
+Content addressed store for product images.
+
+Images are kept once per distinct content under objects/<md5[:2]>/<md5><ext>, and index.json maps each image url
+to the md5 of its content and the ETag/Last-Modified it was served with. Urls that served the generic placeholder
+image are remembered so they are never downloaded again, and export() hardlinks (or copies, across volumes) the
+stored image to wherever it is needed, so identical images shared by several UPCs are stored and fetched once.
+Usage:
+    with ImageStore(r"F:\\Signs\\product_images\\.store") as store:
+        store.export(session, product.image.url, rf"F:\\Signs\\product_images\\{product.upc}.jpg")
+"""
+from __future__ import annotations
+
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from myunfi.http_wrappers.download import save_result, write_chunks
+from myunfi.http_wrappers.exceptions import NonImageResponseException
+from myunfi.http_wrappers.http_adapters import HTTPSession
+from myunfi.logger import get_logger
+from myunfi.models.items.product import PLACEHOLDER_IMAGE_MD5
+
+logger = get_logger(__name__)
+
+INDEX_VERSION = 1
+
+
+class ImageStore:
+    """
+    - directory: where objects and index.json are kept
+    - revalidate: ask the server whether known images changed (If-None-Match/If-Modified-Since) instead of
+                  trusting the index, placeholder urls are never revalidated
+    - autosave: write the index after this many changes, it is always written on flush() and on exit
+    Safe to share between threads.
+    """
+
+    def __init__(self, directory: Union[str, Path], revalidate: bool = False, autosave: int = 100):
+        self.directory = Path(directory)
+        self.objects = self.directory / "objects"
+        self.index_path = self.directory / "index.json"
+        self.revalidate = revalidate
+        self.autosave = autosave
+        self.stats = {"downloaded": 0, "revalidated": 0, "skipped": 0, "placeholders": 0, "deduplicated": 0}
+        self._lock = threading.Lock()
+        # held while the index is serialized and written, so index.json is replaced in snapshot order
+        self._write_lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._unsaved = 0
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index: Dict[str, dict] = self._load_index()
+
+    def _load_index(self) -> Dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            data = json.loads(self.index_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read image index %s, starting a new one: %s", self.index_path, e)
+            return {}
+        return data.get("urls", {}) if data.get("version") == INDEX_VERSION else {}
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                data = json.dumps({"version": INDEX_VERSION, "urls": self.index}).encode("utf-8")
+                self._unsaved = 0
+            write_chunks([data], self.index_path)
+
+    def __enter__(self) -> ImageStore:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def object_path(self, md5: str, content_type: str = None) -> Path:
+        extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ""
+        return self.objects / md5[:2] / f"{md5}{extension}"
+
+    def is_placeholder(self, url: str) -> bool:
+        entry = self.index.get(url)
+        return entry is not None and entry["md5"] == PLACEHOLDER_IMAGE_MD5
+
+    def get(self, url: str) -> Optional[Path]:
+        """
+        The stored image for url without touching the network, None when unknown or a placeholder.
+        """
+        entry = self.index.get(url)
+        if entry is None or entry["md5"] == PLACEHOLDER_IMAGE_MD5:
+            return None
+        path = self.object_path(entry["md5"], entry.get("content_type"))
+        return path if path.exists() else None
+
+    def fetch(self, session: HTTPSession, url: str) -> Optional[Path]:
+        """
+        The stored image for url, downloading it only when it is unknown, missing on disk or (with revalidate)
+        changed on the server. Returns None for the placeholder image.
+        """
+        with self._url_locks[url]:
+            entry = self.index.get(url)
+            if entry is not None and entry["md5"] == PLACEHOLDER_IMAGE_MD5:
+                self._count("placeholders")
+                return None
+            stored = self.get(url)
+            if stored is not None and not self.revalidate:
+                self._count("skipped")
+                return stored
+            headers = {}
+            if stored is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+            return self._download(session, url, headers, stored)
+
+    def _download(self, session: HTTPSession, url: str, headers: dict, stored: Optional[Path]) -> Optional[Path]:
+        result = session.request('GET', url, stream=True, use_cache=False, headers=headers)
+        try:
+            if result.get_status_code() == 304 and stored is not None:
+                self._count("revalidated")
+                return stored
+            content_type = result.get_content_type()
+            if not (content_type or "").startswith("image/"):
+                raise NonImageResponseException(f"Expected an image from {url}, got {content_type}")
+            fd, temp_name = tempfile.mkstemp(dir=self.objects, suffix=".part")
+            os.close(fd)
+            download = save_result(result, temp_name)
+        finally:
+            result.close()
+        response_headers = result.get_headers()
+        entry = {"md5": download.md5, "content_type": content_type, "size": download.size,
+                 "etag": response_headers.get("ETag"), "last_modified": response_headers.get("Last-Modified"),
+                 "checked_at": time.time()}
+        path = None
+        if download.md5 == PLACEHOLDER_IMAGE_MD5:
+            download.path.unlink()
+            self._count("placeholders")
+        else:
+            path = self.object_path(download.md5, content_type)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                download.path.unlink()
+                self._count("deduplicated")
+            else:
+                os.replace(download.path, path)
+                self._count("downloaded")
+        self._record(url, entry)
+        return path
+
+    def export(self, session: HTTPSession, url: str, target: Union[str, Path]) -> Optional[Path]:
+        """
+        Place the image for url at target, hardlinked to the stored object where the filesystem allows and
+        copied otherwise. An existing target with the same content is left alone. Returns None for placeholders.
+        """
+        stored = self.fetch(session, url)
+        if stored is None:
+            return None
+        target = Path(target)
+        if target.exists() and self._same_content(stored, target):
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_target = target.with_name(f".{target.name}.{threading.get_ident()}.part")
+        try:
+            os.link(stored, temp_target)
+        except OSError:
+            shutil.copyfile(stored, temp_target)
+        os.replace(temp_target, target)
+        return target
+
+    @staticmethod
+    def _same_content(stored: Path, target: Path) -> bool:
+        try:
+            if os.path.samefile(stored, target):
+                return True
+        except OSError:
+            return False
+        if stored.stat().st_size != target.stat().st_size:
+            return False
+        with stored.open("rb") as a, target.open("rb") as b:
+            while True:
+                chunk = a.read(64 * 1024)
+                if chunk != b.read(64 * 1024):
+                    return False
+                if not chunk:
+                    return True
+
+    def _record(self, url: str, entry: dict):
+        with self._lock:
+            self.index[url] = entry
+            self._unsaved += 1
+            save = self.autosave and self._unsaved >= self.autosave
+        if save:
+            self.flush()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return f"<ImageStore {self.directory} urls={len(self)}>"
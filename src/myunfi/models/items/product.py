@@ -1,18 +1,27 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Iterator, List, Optional, TYPE_CHECKING, Union
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, TYPE_CHECKING, Union
 
 from pydantic import BaseModel, Field, root_validator, validator
 
-from myunfi.api.shopping.items import fetch_product
+from myunfi import config
+from myunfi.api.shopping.items import fetch_pricing, fetch_product, fetch_product_async, fetch_qty_on_hand
+from myunfi.http_wrappers.exceptions import NonImageResponseException
 from myunfi.http_wrappers.http_adapters import HTTPSession
-from myunfi.http_wrappers.responses import ImageResponse
+from myunfi.http_wrappers.responses import ImageResponse, JSONResponse
 from myunfi.models.base import FetchableModel
 from myunfi.config import default_account_number, replace_abbreviations
+from myunfi.models.items import pricing as batch_pricing
+from myunfi.models.items.qty_on_hand import QuantitiesOnHand
+from myunfi.utils.collections import balanced_chunks
 from myunfi.utils.string import replace_abbrs, acronyms_to_uppercase
+from myunfi.utils.threading import threader
 
 if TYPE_CHECKING:
+    from myunfi.models.items.image_store import ImageStore
     from myunfi.models.items.search import SearchResults
 
 PLACEHOLDER_IMAGE_MD5 = '6dc109b530073c38e107534651b5d6e0'
@@ -58,6 +67,31 @@ class Image(BaseModel):
         self.image_md5 = image_response.md5_hash()
         self.image_result = image_response
 
+    def download_to_file(self, session: HTTPSession, path: Union[str, Path], keep_placeholder: bool = False,
+                         store: ImageStore = None) -> Optional[Path]:
+        """
+        Stream the image straight to path and record its md5, without keeping the image in memory.
+        The generic placeholder image is removed again unless keep_placeholder is set.
+        With a store the image is only downloaded when the store doesn't have it (see ImageStore.export),
+        placeholders are never saved.
+        :return: the saved path or None for a placeholder
+        """
+        if store is not None:
+            saved = store.export(session, self.url, path)
+            self.image_md5 = store.index.get(self.url, {}).get("md5", "")
+            self.image_result = None
+            return saved
+        download = session.download(self.url, path)
+        self.image_md5 = download.md5
+        self.image_result = None
+        if not (download.content_type or "").startswith("image/"):
+            download.path.unlink()
+            raise NonImageResponseException(f"Expected an image from {self.url}, got {download.content_type}")
+        if self.is_placeholder and not keep_placeholder:
+            download.path.unlink()
+            return None
+        return download.path
+
     def save(self, path: str) -> None:
         if self.image_result and not self.is_placeholder:
             self.image_result.save_to_file(path)
@@ -169,6 +203,14 @@ class Product(FetchableModel):
 
     def _fetch(self, session: HTTPSession = None, **kwargs) -> dict:
         result = fetch_product(session, product_code=self.item_number, account_id=self.account_id)
+        return self._product_data(result)
+
+    async def _fetch_async(self, session: HTTPSession = None, **kwargs) -> dict:
+        result = await fetch_product_async(session, product_code=self.item_number, account_id=self.account_id)
+        return self._product_data(result)
+
+    @staticmethod
+    def _product_data(result: JSONResponse) -> dict:
         json_response = result.get_json()
         if "items" in json_response:
             return json_response["items"][0]
@@ -177,7 +219,8 @@ class Product(FetchableModel):
     def download_image(self, session: HTTPSession = None, **kwargs) -> bytes:
         if self.image is None:
             return None
-        return self.image.download_image(session, **kwargs)
+        self.image.download(session or self.get_session())
+        return self.image.image_result.get_data()
 
     def dict(self, exclude: Union[dict, set] = None, **kwargs) -> dict:
         if exclude:
@@ -247,5 +290,74 @@ class Products(BaseModel):
         else:
             raise TypeError(f"Products.update() expects a Products, list, or dict, got {type(products)}")
 
+    def refresh_qty_on_hand(self, session: HTTPSession = None, batch_size: int = None,
+                            max_workers: int = None) -> dict[str, int]:
+        """
+        Update qty_on_hand on every product from the quantityOnHand batch endpoint instead of fetching each product.
+        :param session: defaults to the models' shared session
+        :param batch_size: item numbers per request, defaults to config.qty_on_hand_batch_size
+        :param max_workers: requests sent at once, defaults to config.bulk_fetch_max_workers
+        :return: the quantities returned, by item number
+        """
+        quantities = {}
+        for data in self._fetch_batches(fetch_qty_on_hand, session, batch_size or config.qty_on_hand_batch_size,
+                                        max_workers):
+            for item in QuantitiesOnHand.parse_obj(data).quantities_on_hand or []:
+                quantities[item.item_number] = item.quantity_on_hand
+        for item_number, quantity in quantities.items():
+            if item_number in self.products:
+                self.products[item_number].qty_on_hand = quantity
+        return quantities
+
+    def refresh_pricing(self, session: HTTPSession = None, batch_size: int = None,
+                        max_workers: int = None) -> batch_pricing.Pricing:
+        """
+        Update pricing and promotions on every product from the pricing batch endpoint instead of fetching each
+        product. Products the endpoint returns a price for but no promotions have their promotions cleared.
+        :param session: defaults to the models' shared session
+        :param batch_size: item numbers per request, defaults to config.pricing_batch_size
+        :param max_workers: requests sent at once, defaults to config.bulk_fetch_max_workers
+        :return: the pricing and promotions returned for all batches
+        """
+        merged = batch_pricing.Pricing(pricing=[], promotions=[])
+        for data in self._fetch_batches(fetch_pricing, session, batch_size or config.pricing_batch_size,
+                                        max_workers):
+            result = batch_pricing.Pricing.parse_obj(data)
+            merged.pricing.extend(result.pricing or [])
+            merged.promotions.extend(result.promotions or [])
+        promotions = {promotion.item_number: promotion.promotions for promotion in merged.promotions}
+        for item in merged.pricing:
+            product = self.products.get(item.item_number)
+            if product is None:
+                continue
+            product.pricing = Pricing.parse_obj(item.dict(by_alias=True, exclude={"item_number"}))
+            product.promotions = [Promotion.parse_obj(promotion.dict(by_alias=True))
+                                  for promotion in promotions.get(item.item_number, [])]
+        return merged
+
+    def _fetch_batches(self, fetch: Callable, session: Optional[HTTPSession], batch_size: int,
+                       max_workers: Optional[int]) -> List[dict]:
+        """
+        Call fetch(session, account_id, item_numbers) concurrently for the item numbers of every product, split
+        per account into the fewest evenly sized batches. Returns the JSON body of each batch.
+        """
+        session = session or Product.get_session()
+        if session is None:
+            raise ValueError("Cannot fetch products without a session.")
+        item_numbers_by_account = defaultdict(list)
+        for product in self:
+            item_numbers_by_account[product.account_id].append(product.item_number)
+        batches = [(account_id, batch) for account_id, item_numbers in item_numbers_by_account.items()
+                   for batch in balanced_chunks(item_numbers, batch_size)]
+        if not batches:
+            return []
+
+        def fetch_batch(batch: tuple[str, list[str]]) -> dict:
+            account_id, item_numbers = batch
+            return fetch(session, account_id, item_numbers).get_json()
+
+        max_workers = max_workers or config.bulk_fetch_max_workers
+        return threader(fetch_batch, batches, max_workers=max(1, min(max_workers, len(batches))))
+
     def __len__(self):
         return len(self.products)
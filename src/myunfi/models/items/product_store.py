@@ -0,0 +1,188 @@
+"""
+Persistent local store of Products in sqlite, so products downloaded on an earlier run can be looked up without
+fetching them again. The lookup columns (item number, UPC, UPC without check digit, brand, department, category,
+status, price) are real indexed columns next to the product JSON: rows() and lookup() answer from the columns
+alone, get() and find() rebuild the Product models.
+Usage:
+    with ProductStore(r"c:\\temp\\products.sqlite") as store:
+        store.upsert(products)
+        product = store.get_by_upc(72431000152)
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from myunfi.logger import get_logger
+from myunfi.models.items.product import Product, Products
+
+logger = get_logger(__name__)
+
+# (column, type, Product attribute), stored next to the product JSON
+COLUMNS: List[Tuple[str, str, str]] = [
+    ("upc", "INTEGER", "upc"),
+    ("upc_no_check", "INTEGER", "upc_no_check"),
+    ("brand_id", "INTEGER", "brand_id"),
+    ("brand_name", "TEXT", "brand_name"),
+    ("department_id", "INTEGER", "department_id"),
+    ("category_id", "INTEGER", "category_id"),
+    ("subcategory_id", "INTEGER", "subcategory_id"),
+    ("status_code", "TEXT", "status_code"),
+    ("pack_qty", "INTEGER", "pack_qty"),
+    ("pack_size", "TEXT", "pack_size"),
+    ("wholesale_price", "REAL", "wholesale_price"),
+    ("srp", "REAL", "srp"),
+]
+INDEXED = ["upc", "upc_no_check", "brand_id", "department_id", "category_id", "updated_at"]
+# range filters accepted by rows() and find(), column: (low, high) with either end None for open
+RANGE_COLUMNS = {"item_number", "upc", "wholesale_price", "srp", "updated_at"}
+# not worth keeping: the downloaded image and the fetch bookkeeping
+EXCLUDE = {"image": {"image_result"}, "executed": True, "error": True}
+
+
+class ProductStore:
+    """
+    - path: sqlite database file, ":memory:" for a throwaway store
+    Safe to share between threads, writes are serialized on one connection.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = path
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        columns = ", ".join(f"{name} {column_type}" for name, column_type, _ in COLUMNS)
+        with self._connection:
+            if str(path) != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS products (item_number TEXT PRIMARY KEY, "
+                                     f"{columns}, updated_at REAL NOT NULL, data TEXT NOT NULL)")
+            for column in INDEXED:
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS products_{column} ON products ({column})")
+        names = ["item_number"] + [name for name, _, _ in COLUMNS] + ["updated_at", "data"]
+        self._upsert_sql = (f"INSERT OR REPLACE INTO products ({', '.join(names)}) "
+                            f"VALUES ({', '.join('?' * len(names))})")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> ProductStore:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def upsert(self, products: Union[Products, Iterable[Product]], updated_at: float = None) -> int:
+        """
+        Insert or replace products in one transaction. Returns how many were written.
+        """
+        updated_at = updated_at or time.time()
+        rows = [(product.item_number, *(getattr(product, attribute) for _, _, attribute in COLUMNS), updated_at,
+                 product.json(by_alias=True, exclude=EXCLUDE))
+                for product in products if product.item_number]
+        with self._lock, self._connection:
+            self._connection.executemany(self._upsert_sql, rows)
+        return len(rows)
+
+    def delete(self, item_numbers: Iterable[str]) -> int:
+        with self._lock, self._connection:
+            cursor = self._connection.executemany("DELETE FROM products WHERE item_number = ?",
+                                                  [(item_number,) for item_number in item_numbers])
+            return cursor.rowcount
+
+    def _select(self, columns: str, filters: Dict[str, Any], order_by: str = "item_number",
+                limit: int = None) -> List[sqlite3.Row]:
+        clauses, parameters = [], []
+        known = {"item_number"} | {name for name, _, _ in COLUMNS}
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column.endswith("_between"):
+                column = column[:-len("_between")]
+                if column not in RANGE_COLUMNS:
+                    raise ValueError(f"Can't filter {column} by range, use one of {sorted(RANGE_COLUMNS)}")
+                low, high = value
+                if low is not None:
+                    clauses.append(f"{column} >= ?")
+                    parameters.append(low)
+                if high is not None:
+                    clauses.append(f"{column} <= ?")
+                    parameters.append(high)
+            elif column in known:
+                if isinstance(value, (list, tuple, set)):
+                    clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                    parameters.extend(value)
+                else:
+                    clauses.append(f"{column} = ?")
+                    parameters.append(value)
+            else:
+                raise ValueError(f"Unknown filter {column}")
+        sql = f"SELECT {columns} FROM products"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def rows(self, limit: int = None, **filters) -> List[Dict[str, Any]]:
+        """
+        The indexed columns of matching products, without rebuilding the models.
+        Filters are column=value, column=[values] or <column>_between=(low, high), e.g.
+        store.rows(brand_id=40579, wholesale_price_between=(None, 10))
+        """
+        columns = ", ".join(["item_number"] + [name for name, _, _ in COLUMNS] + ["updated_at"])
+        return [dict(row) for row in self._select(columns, filters, limit=limit)]
+
+    def find(self, limit: int = None, **filters) -> List[Product]:
+        """
+        Matching products, same filters as rows().
+        """
+        return [Product.parse_raw(row["data"]) for row in self._select("data", filters, limit=limit)]
+
+    def lookup(self, item_number: str) -> Optional[Dict[str, Any]]:
+        """
+        The indexed columns of one product, the fast path for item lookups.
+        """
+        rows = self.rows(item_number=item_number)
+        return rows[0] if rows else None
+
+    def get(self, item_number: str) -> Optional[Product]:
+        products = self.find(item_number=item_number)
+        return products[0] if products else None
+
+    def get_by_upc(self, upc: Union[int, str]) -> Optional[Product]:
+        """
+        The product with this UPC, with or without its check digit.
+        """
+        upc = int(upc)
+        products = self.find(upc=upc, limit=1) or self.find(upc_no_check=upc, limit=1)
+        return products[0] if products else None
+
+    def to_products(self, **filters) -> Products:
+        products = Products()
+        products.extend(self.find(**filters))
+        return products
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self.find())
+
+    def __contains__(self, item_number: str) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM products WHERE item_number = ?",
+                                            (item_number,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def __repr__(self):
+        return f"<ProductStore {self.path} products={len(self)}>"
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Any, List, Optional, Union
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 
 from myunfi import config
-from myunfi.api.shopping.items import fetch_items
+from myunfi.api.shopping.items import fetch_items, fetch_items_async
 from myunfi.http_wrappers.http_adapters import HTTPSession
 from myunfi.logger import get_logger
 from myunfi.models.base import PaginatedFetchableModel
 from myunfi.models.items import Product
 from myunfi.models.items.product import Products
+from myunfi.utils.collections import pack_by_weight
+from myunfi.utils.threading import threader
 
 base_logger = get_logger(__name__)
 
@@ -126,6 +130,9 @@ class SearchResults(PaginatedFetchableModel):
 
     _required_fields = ["account_id", "dc_number"]
     _logger = base_logger.getChild(__name__)
+    # item numbers in results, rebuilt whenever results is replaced rather than extended by add_items
+    _item_numbers: Set[str] = PrivateAttr(default_factory=set)
+    _indexed_results: Optional[list] = PrivateAttr(None)
 
     def fetch(self, **kwargs):
         return fetch_items(**kwargs)
@@ -147,27 +154,47 @@ class SearchResults(PaginatedFetchableModel):
 
     def update(self, items: Union[List[ResultItem], dict[str, ResultItem], SearchResults]):
         if isinstance(items, SearchResults):
-            self.results.extend(items.results)
-            self.results = list(set(self.results))
+            self.add_items(items.results)
             self.products.update(items.products)
         elif isinstance(items, list):
             if all(isinstance(item, ResultItem) for item in items):
-                self.results.extend(items)
+                self.add_items(items)
             else:
                 collection_types = [type(item) for item in items if not isinstance(item, ResultItem)]
                 raise TypeError(f'Expected list of ResultItem, got {collection_types}')
         elif isinstance(items, dict):
             if all(isinstance(item, ResultItem) for item in items.values()):
-                self.results.extend(items.values())
+                self.add_items(items.values())
             else:
                 collection_types = [type(item) for item in items if not isinstance(item, ResultItem)]
                 raise TypeError(f'Expected dict of ResultItem, got {collection_types}')
 
+    def add_items(self, items: Iterable[ResultItem]) -> List[ResultItem]:
+        """
+        Append the items not already in results, keeping their order. Returns the items that were added.
+        """
+        item_numbers = self._index()
+        added = []
+        for item in items:
+            if item.item_number not in item_numbers:
+                item_numbers.add(item.item_number)
+                added.append(item)
+        self.results.extend(added)
+        return added
+
+    def _index(self) -> Set[str]:
+        if self._indexed_results is not self.results:
+            self._item_numbers = {item.item_number for item in self.results}
+            self._indexed_results = self.results
+        return self._item_numbers
+
     def __len__(self):
         return len(self.results)
 
     def __contains__(self, item):
-        return item in self.results
+        if isinstance(item, ResultItem):
+            item = item.item_number
+        return item in self._index()
 
 
 class ProductSearch(PaginatedFetchableModel):
@@ -197,15 +224,48 @@ class ProductSearch(PaginatedFetchableModel):
         brand_ids = brand_ids or self.brand_ids
         page = page or self.page_number
         page_size = page_size or self.page_size
-        response = fetch_items(self.get_session(), search_term=search_term, account_id=self.account_id,
+        response = fetch_items(session or self.get_session(), search_term=search_term, account_id=self.account_id,
                                dc_num=self.dc_number,
                                category_id=category_id, sub_category_id=subcategory_id, brand_id=brand_ids,
                                page_number=page, page_size=page_size, sort_by=sort_by, sort_order=sort_order)
 
-        return response.get_json()
+        return self._parse_search_response(response.get_json())
+
+    async def _fetch_async(self, session: HTTPSession = None, search_term=None, category_id=None,
+                           subcategory_id=None, brand_ids=None, page=None, page_size=None, sort_by=None,
+                           sort_order=None, **kwargs) -> dict:
+        response = await fetch_items_async(session, search_term=search_term, account_id=self.account_id,
+                                           dc_num=self.dc_number,
+                                           category_id=category_id or self.category_id,
+                                           sub_category_id=subcategory_id or self.sub_category_id,
+                                           brand_id=brand_ids or self.brand_ids,
+                                           page_number=page or self.page_number, page_size=page_size or self.page_size,
+                                           sort_by=sort_by, sort_order=sort_order)
+
+        return self._parse_search_response(response.get_json())
+
+    def _parse_search_response(self, data: dict) -> dict:
+        """
+        Reshape an items search response into fields of this model, the page's items become the results.
+        data is the response's cached JSON, so the fields are copied into a new dict instead of changing it.
+        """
+        fields = {key: value for key, value in data.items() if key not in ("page", "items")}
+        fields.update(data.get("page", {}))
+        fields["results"] = SearchResults(items=data.get("items", []), account_id=self.account_id,
+                                          dc_number=self.dc_number)
+        return fields
+
+    def page_items(self) -> List[ResultItem]:
+        return self.results.results if self.results else []
 
     def search(self, search_term=None, category_id=None, subcategory_id=None, brand_ids=None, page=None, page_size=1000,
-               fetch_results=False, **kwargs) -> SearchResults:
+               fetch_results=False, session: HTTPSession = None, all_pages=False, shard=True,
+               **kwargs) -> SearchResults:
+        """
+        Search for products. When the first page doesn't hold every result and shard is set, the rest are fetched
+        with brand or category filtered searches run concurrently (see shard_filters), with all_pages every page
+        is fetched concurrently instead. Either way the results are combined.
+        """
         category_id = category_id or self.category_id
         subcategory_id = subcategory_id or self.sub_category_id
         brand_ids = brand_ids or self.brand_ids
@@ -215,9 +275,15 @@ class ProductSearch(PaginatedFetchableModel):
             "search_term": search_term, "category_id": category_id,
             "subcategory_id": subcategory_id, "brand_ids": brand_ids, "page": page, "page_size": page_size
         }
-        res = self.fetch(search_term=search_term, category_id=category_id, subcategory_id=subcategory_id,
-                         brand_ids=brand_ids,
-                         page=page, page_size=page_size)
+        fetch_kwargs = dict(search_term=search_term, category_id=category_id, subcategory_id=subcategory_id,
+                            brand_ids=brand_ids, page_size=page_size)
+        if all_pages:
+            self._combine_pages(self.fetch_all_pages(session, **fetch_kwargs), page_size)
+        else:
+            self.fetch(session, page=page, **fetch_kwargs)
+            if shard and not page and self.total_pages and self.total_pages > 1:
+                pages = self._fetch_rest(session, self, fetch_kwargs, config.page_fetch_max_workers)
+                self._combine_pages([self] + pages, page_size)
 
         if self.results:
             self.results.account_id = self.account_id
@@ -227,6 +293,127 @@ class ProductSearch(PaginatedFetchableModel):
                 self.products.extend(self.results.products)
         return self.results
 
+    def shard_filters(self, page_size: int) -> Optional[List[dict]]:
+        """
+        Filters splitting this search into searches of about page_size results each, read from the facets of a
+        fetched page: groups of brands, or categories when a single brand is left. None when neither facet adds
+        up to total_elements, as results outside the facet would be missed.
+        """
+        if not self.facets or not self.total_elements:
+            return None
+        brands = {brand.id: brand.count for brand in self.facets.brands}
+        if len(brands) > 1 and sum(brands.values()) == self.total_elements:
+            groups = pack_by_weight(brands, page_size, config.search_shard_max_brands)
+            return [{"brand_ids": group} for group in groups]
+        categories = {category.id: category.count for category in self.facets.categories}
+        if len(categories) > 1 and sum(categories.values()) == self.total_elements:
+            return [{"category_id": category_id} for category_id in categories]
+        return None
+
+    def _fetch_rest(self, session: Optional[HTTPSession], first: ProductSearch, fetch_kwargs: dict,
+                    max_workers: int) -> List[ProductSearch]:
+        """
+        Pages holding every result of the search first is page 0 of, fetched breadth first: each round fetches the
+        first pages of the shards from shard_filters and the remaining pages of searches that can't be sharded,
+        max_workers at once. Shards that overflow are sharded again in the next round, once, after that (or when
+        the facets don't cover the results) their remaining pages are fetched instead.
+        """
+        pages = []
+        level = [(first, fetch_kwargs)]
+        depth = 0
+        while level:
+            requests = []
+            for level_first, level_kwargs in level:
+                if not level_first.total_pages or level_first.total_pages <= 1:
+                    continue
+                shards = level_first.shard_filters(level_kwargs["page_size"]) if depth < 2 else None
+                if shards:
+                    requests.extend((0, {**level_kwargs, **filters}) for filters in shards)
+                else:
+                    requests.extend((page_number, level_kwargs) for page_number in range(1, level_first.total_pages))
+            if not requests:
+                break
+
+            def fetch(request: tuple) -> tuple:
+                page_number, request_kwargs = request
+                return page_number, request_kwargs, self.get_page(session, page_number, **request_kwargs)
+
+            level = []
+            for page_number, request_kwargs, page in threader(fetch, requests, max_workers=max_workers):
+                pages.append(page)
+                if page_number == 0:
+                    level.append((page, request_kwargs))
+            depth += 1
+        return pages
+
+    def _combine_pages(self, pages: List[ProductSearch], page_size: int):
+        """
+        Make this model hold the deduplicated results of pages, with the facets and totals of the first one.
+        """
+        results = SearchResults(items=[], account_id=self.account_id, dc_number=self.dc_number)
+        for page_model in pages:
+            results.add_items(page_model.page_items())
+        if pages[0] is not self:
+            self.update_model(pages[0].dict(include={"facets", "total_elements", "total_pages", "is_sorted",
+                                                     "executed", "last_fetched"}, by_alias=True))
+        self.page_number = 0
+        self.page_size = page_size
+        self.results = results
+        self.number_of_elements = len(results)
+
+    def iter_search(self, search_terms: Union[str, Iterable[str], None] = None, category_id=None,
+                    subcategory_id=None, brand_ids=None, page_size=1000, session: HTTPSession = None,
+                    max_workers: int = None, seen: Set[str] = None) -> Iterator[ResultItem]:
+        """
+        Yields the results of one or more searches as each page arrives, skipping item numbers already yielded.
+        search_terms may be a single search term or an iterable of them (e.g. chunks of a long query), consumed
+        lazily. Page 0 of a search is fetched before its remaining pages, and at most max_workers pages
+        (default config.page_fetch_max_workers) are in flight across all searches, so memory stays bounded by the
+        pages in flight plus the item numbers seen. Pass seen to also skip items from earlier searches.
+        This model is left unchanged.
+        """
+        if search_terms is None or isinstance(search_terms, str):
+            search_terms = [search_terms]
+        search_terms = iter(search_terms)
+        fetch_kwargs = dict(category_id=category_id, subcategory_id=subcategory_id, brand_ids=brand_ids,
+                            page_size=page_size)
+        max_workers = max_workers or config.page_fetch_max_workers
+        seen = set() if seen is None else seen
+        # remaining pages of searches whose first page has arrived
+        queued: Deque[Tuple[Optional[str], int]] = deque()
+        running: Dict[Future, Optional[str]] = {}
+        terms_left = True
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                while len(running) < max_workers and (queued or terms_left):
+                    if queued:
+                        search_term, page_number = queued.popleft()
+                    else:
+                        try:
+                            search_term = next(search_terms)
+                        except StopIteration:
+                            terms_left = False
+                            break
+                        page_number = 0
+                    future = executor.submit(self.get_page, session, page_number, search_term=search_term,
+                                             **fetch_kwargs)
+                    running[future] = search_term
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    search_term = running.pop(future)
+                    page = future.result()
+                    if page.page_number == 0:
+                        queued.extend((search_term, page_number) for page_number in range(1, page.total_pages or 1))
+                    for item in page.page_items():
+                        if item.item_number not in seen:
+                            seen.add(item.item_number)
+                            yield item
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def update_products_from_results(self, results: SearchResults = None) -> None:
         results = results or self.results
         if results:
@@ -0,0 +1,3 @@
+from .mock_server import MockMyUNFIServer, SyntheticCatalog
+
+__all__ = ['MockMyUNFIServer', 'SyntheticCatalog']
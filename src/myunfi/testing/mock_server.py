@@ -0,0 +1,515 @@
+"""
+Local imitation of the MyUNFI shopping API for load testing the client without touching the portal.
+
+Usage:
+    with MockMyUNFIServer(SyntheticCatalog(100_000), latency=(0.02, 0.1), throttle_rate=50) as server:
+        session = server.install(RequestsSession.create_session())
+        page = fetch_items(session, "001014", 6, search_term="*", page_size=1000).get_json()
+        print(server.stats())
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from myunfi import config
+from myunfi.http_wrappers.http_requests import PooledHTTPAdapter, RequestsSession, tcp_socket_options
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+WORDS = ["organic", "kale", "almond", "oat", "coconut", "vanilla", "dark", "chocolate", "ginger", "lemon",
+         "sea", "salt", "honey", "maple", "berry", "green", "tea", "coffee", "rice", "bean", "tomato", "basil",
+         "garlic", "olive", "quinoa", "cashew", "mango", "peach", "cinnamon", "apple"]
+PACK_SIZES = ["12 OZ", "16 OZ", "1 LB", "8 OZ", "32 OZ", "6 CT", "1 GAL", "4 OZ"]
+DEPARTMENTS = ["Grocery", "Dairy & Refrigerated", "Frozen", "Health & Beauty", "Bulk", "Produce", "Supplements",
+               "Household", "Beverages", "Snacks"]
+
+
+class SyntheticCatalog:
+    """
+    Deterministic product catalog of any size. Item data is derived from the item index, so only a small
+    search index is held in memory and a 100k item catalog builds in well under a second.
+    """
+
+    def __init__(self, size: int = 1000, brands: int = 200, categories: int = 60, invoices: int = 50,
+                 open_orders: int = 10, account_id: str = None):
+        self.size = size
+        self.brand_count = brands
+        self.category_count = categories
+        self.invoice_count = invoices
+        self.open_order_count = open_orders
+        self.account_id = account_id or config.default_account_number
+        self._text = [self._item_text(index) for index in range(size)]
+        self._by_code: Dict[str, int] = {}
+        for index in range(size):
+            self._by_code[self.item_number(index)] = index
+            self._by_code[self.upc(index)] = index
+
+    @staticmethod
+    def item_number(index: int) -> str:
+        return f"{100000 + index}"
+
+    @staticmethod
+    def upc(index: int) -> str:
+        return f"{850000000000 + index * 7:014d}"
+
+    def brand_id(self, index: int) -> int:
+        return 30000 + index % self.brand_count
+
+    def category_id(self, index: int) -> int:
+        return 1000 + (index * 7) % self.category_count
+
+    def subcategory_id(self, index: int) -> int:
+        # three subcategories per category, numbered apart from the categories
+        return self.category_id(index) * 10 + index % 3
+
+    def department_id(self, index: int) -> int:
+        return (index * 3) % len(DEPARTMENTS) + 1
+
+    def _item_text(self, index: int) -> str:
+        return " ".join((f"brand{index % self.brand_count}", WORDS[index % len(WORDS)],
+                         WORDS[(index * 7 + 3) % len(WORDS)])).lower()
+
+    def index_of(self, code: str) -> Optional[int]:
+        return self._by_code.get(code)
+
+    def search(self, search_term: str = "*", brands: Iterable[int] = None, departments: Iterable[int] = None,
+               category_id: int = None, sub_category_id: int = None) -> List[int]:
+        """
+        Indexes of the items matching a search. Terms are OR'ed, item numbers and UPCs match exactly and
+        words match anywhere in the brand, title or description.
+        """
+        terms = [term.lower() for term in (search_term or "*").split()]
+        if not terms or "*" in terms:
+            matches = range(self.size)
+        else:
+            exact = {self._by_code[term] for term in terms if term in self._by_code}
+            words = [term for term in terms if term not in self._by_code and not term.isdigit()]
+            if words:
+                exact.update(index for index, text in enumerate(self._text) if any(word in text for word in words))
+            matches = sorted(exact)
+        brands = {int(brand) for brand in brands} if brands else None
+        departments = {int(department) for department in departments} if departments else None
+        return [index for index in matches
+                if (brands is None or self.brand_id(index) in brands)
+                and (departments is None or self.department_id(index) in departments)
+                and (category_id is None or self.category_id(index) == int(category_id))
+                and (sub_category_id is None or self.subcategory_id(index) == int(sub_category_id))]
+
+    def search_item(self, index: int) -> dict:
+        words = self._text[index].split()
+        return {
+            "id": 800000 + index,
+            "itemNumber": self.item_number(index),
+            "upc": self.upc(index),
+            "packQty": 1 + index % 12,
+            "packSize": PACK_SIZES[index % len(PACK_SIZES)],
+            "brandId": self.brand_id(index),
+            "statusCode": "Active",
+            "statusReasonCode": "",
+            "packConfig": "Each",
+            "isDsdRestricted": False,
+            "description": f"{words[1]} {words[2]}".title(),
+            "brandName": words[0].title(),
+            "title": " ".join(words).title(),
+            "departmentId": self.department_id(index),
+            "departmentName": DEPARTMENTS[self.department_id(index) - 1],
+            "image": {"url": f"https://products.unfi.com/api/Images/GetByUPC?upc={self.upc(index)}&version=3"},
+        }
+
+    def product(self, index: int) -> dict:
+        price = self.price(index)
+        item = self.search_item(index)
+        # product detail has no isDsdRestricted flag
+        del item["isDsdRestricted"]
+        item.update({
+            "caseUpc": "00000000000000",
+            "minOrderQty": 0,
+            "countryOfOriginCode": 840,
+            "countryOfOriginName": "USA",
+            "organicCode": "O" if index % 3 == 0 else "",
+            "categoryId": self.category_id(index),
+            "subcategoryId": self.subcategory_id(index),
+            "isPrivateLabel": False,
+            "srp": round(price * 1.4, 2),
+            "wholesalePrice": price,
+            "isMonthlyPromo": index % 10 == 0,
+            "discoReasonCode": "",
+            "itemAttributes": ["Natural"],
+            "wholesaleUnitPrice": round(price / item["packQty"], 2),
+            "categoryName": f"Category {self.category_id(index)}",
+            "subcategoryName": f"Subcategory {self.subcategory_id(index)}",
+            "isMsiRestricted": False,
+            "pricing": {"netPrice": price, "netUnitPrice": round(price / item["packQty"], 2)},
+            "qtyOnHand": self.qty_on_hand(index),
+            "orderHistory": [],
+        })
+        return item
+
+    @staticmethod
+    def price(index: int) -> float:
+        return round(1 + (index * 37 % 4000) / 100, 2)
+
+    @staticmethod
+    def qty_on_hand(index: int) -> int:
+        return index * 13 % 250
+
+    def facets(self, matches: List[int]) -> dict:
+        brands = Counter(self.brand_id(index) for index in matches)
+        categories = Counter(self.category_id(index) for index in matches)
+        return {
+            "brands": [{"name": f"Brand{brand_id - 30000}", "count": count, "id": brand_id}
+                       for brand_id, count in sorted(brands.items())],
+            "categories": [{"name": f"Category {category_id}", "count": count, "id": category_id,
+                            "parent": {"name": "Grocery", "id": 1}} for category_id, count in sorted(categories.items())],
+            "dietaryLifestyle": [], "marketing": [], "organicCodes": [], "freeFrom": [], "packConfigCode": [],
+        }
+
+    def invoice_number(self, number: int) -> str:
+        return f"{68000000 + number:08d}-{number % 1000:03d}"
+
+    def invoice_listing(self, number: int) -> dict:
+        invoice_date = date(2022, 1, 1) + timedelta(days=number)
+        lines = [(number * 11 + line) % self.size for line in range(1 + number % 8)]
+        return {
+            "items": [{"itemNumber": self.item_number(index), "upcNumber": self.upc(index)} for index in lines],
+            "orders": [{"poNumber": f"PO{number}", "customerOrderNumber": f"{68000000 + number}",
+                        "orderDate": (invoice_date - timedelta(days=2)).isoformat()}],
+            "transactionType": "INVOICE",
+            "invoiceNumber": self.invoice_number(number),
+            "customerNumber": self.account_id,
+            "invoiceDate": invoice_date.isoformat(),
+            "deliveryDate": (invoice_date + timedelta(days=1)).isoformat(),
+            "invoiceTotalAmount": round(sum(self.price(index) for index in lines), 2),
+            "invoiceTotalCases": len(lines),
+            "invoiceTotalWeight": float(len(lines) * 10),
+        }
+
+    def invoice(self, number: int) -> dict:
+        listing = self.invoice_listing(number)
+        address = {"name": "STORE", "city": "EUGENE", "state": "OR", "zipCode": "97405"}
+        items = []
+        for line_number, line in enumerate(listing.pop("items"), 1):
+            index = self.index_of(line["itemNumber"])
+            product = self.search_item(index)
+            price = self.price(index)
+            items.append({
+                "palletName": "",
+                "packaging": {"eaches": f"{product['packQty']}/{product['packSize']}", "pack": product["packQty"],
+                              "size": product["packSize"], "unit": product["packSize"].split()[-1]},
+                "pricing": {"regularCasePrice": price, "regularSRP": round(price * 1.4, 2), "netCasePrice": price,
+                            "netEachPrice": round(price / product["packQty"], 2),
+                            "regularUnitPrice": round(price / product["packQty"], 2), "extendedPrice": price,
+                            "saleSRP": round(price * 1.4, 2), "margin": 28.57, "discount": 0, "discountReason": ""},
+                "itemNumber": product["itemNumber"], "upcNumber": product["upc"], "lineNumber": line_number,
+                "orderQuantity": 1, "shipQuantity": 1, "taxed": "N", "brand": product["brandName"].upper(),
+                "productDescription": product["title"].upper(), "department": product["departmentId"],
+                "departmentName": product["departmentName"].upper(), "extendedWeight": 10.0, "extendedCube": 1.0,
+            })
+        listing.update({
+            "shipTo": {**address, "street1": "1 MAIN ST", "street2": "", "phone": "5415550100"},
+            "billTo": {**address, "address1": "1 MAIN ST", "address2": ""},
+            "items": items, "customerName": "STORE", "deposits": 0, "invoiceTotalCube": float(len(items)),
+            "truckNumber": 0, "freight": 0, "fuelSurcharge": 0, "terms": "NET 7", "master": "6180",
+            "distributionCenter": config.default_dc, "nonSpecial": 0, "special": 0,
+            "subtotal": listing["invoiceTotalAmount"], "totalDiscount": 0, "tax": 0, "redempt": 0, "netTotal": 0,
+            "totalRetail": 0, "creditAllowance": 0, "profitAmount": 0, "profitPercent": 0,
+        })
+        return listing
+
+    def open_order(self, number: int) -> dict:
+        lines = [(number * 17 + line) % self.size for line in range(1 + number % 5)]
+        return {
+            "orderNumber": f"{68600000 + number:09d}", "orderType": "ORDER", "poNumber": "",
+            "submittedDate": "2022-03-02", "deliveryDate": "2022-03-16", "submittedBy": "MOCK",
+            "itemoutofstock": "N",
+            "items": [{"upc": self.upc(index), "itemNumber": self.item_number(index), "quantityOrdered": 1,
+                       "quantityShipped": 0, "sellUnit": PACK_SIZES[index % len(PACK_SIZES)], "posStatus": "Y",
+                       "itemDescription": self._text[index].upper(), "brand": f"BRAND{index % self.brand_count}",
+                       "lineNumber": line_number, "lineType": "O"}
+                      for line_number, index in enumerate(lines, 1)],
+        }
+
+
+class MockMyUNFIServer:
+    """
+    Threaded HTTP server answering the shopping API routes from a SyntheticCatalog.
+    - latency: seconds added to every response, or a (min, max) tuple for a uniform random delay
+    - throttle_rate: requests per second above which requests are answered 429 with a Retry-After header
+    - max_in_flight: concurrent requests above which requests are answered 503
+    - error_rate: fraction of requests answered 502
+    - seed: seed for the latency and error random number generator
+    stats() reports request counts per route and status and the highest concurrency seen.
+    """
+
+    def __init__(self, catalog: SyntheticCatalog = None, host: str = "127.0.0.1", port: int = 0,
+                 latency: Union[float, Tuple[float, float]] = 0.0, throttle_rate: float = None,
+                 max_in_flight: int = None, error_rate: float = 0.0, seed: int = 0):
+        self.catalog = catalog or SyntheticCatalog()
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.max_in_flight = max_in_flight
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.route_counts: Counter = Counter()
+        self.status_counts: Counter = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._tokens = float(throttle_rate or 0)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.routes = self._routes()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.route_counts.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.request_count, "routes": dict(self.route_counts),
+                    "statuses": dict(self.status_counts), "peak_in_flight": self.peak_in_flight}
+
+    def start(self) -> MockMyUNFIServer:
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MockMyUNFIServer", daemon=True)
+        self._thread.start()
+        logger.info("Mock MyUNFI server listening on %s", self.url)
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> MockMyUNFIServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def install(self, session: RequestsSession) -> RequestsSession:
+        """
+        Send the session's requests for the live portal to this server instead. The session keeps its own
+        rate limiter, retry policy and cache.
+        """
+        adapter = RedirectingAdapter(config.api_base_url, self.url, pool_connections=config.http_pool_connections,
+                                     pool_maxsize=config.http_pool_maxsize, pool_block=config.http_pool_block,
+                                     socket_options=tcp_socket_options(config.http_tcp_nodelay,
+                                                                       config.http_tcp_keepalive))
+        session.get_session().mount(config.api_base_url, adapter)
+        return session
+
+    def _routes(self) -> List[Tuple[str, re.Pattern, Callable]]:
+        customer = r"^/shopping/api/customers/(?P<account_id>[^/]+)"
+        return [
+            ("GET", re.compile(customer + r"/items/search$"), self.search),
+            ("POST", re.compile(customer + r"/items/search$"), self.search),
+            ("POST", re.compile(customer + r"/items/quantityOnHand$"), self.quantity_on_hand),
+            ("POST", re.compile(customer + r"/pricing$"), self.pricing),
+            ("GET", re.compile(customer + r"/items/(?P<item_number>[^/]+)$"), self.item),
+            ("GET", re.compile(customer + r"/brands/grouped$"), self.brands_grouped),
+            ("GET", re.compile(customer + r"/invoices$"), self.invoices),
+            ("GET", re.compile(customer + r"/invoices/(?P<invoice_number>[^/]+)$"), self.invoice),
+            ("GET", re.compile(customer + r"/orders/openOrders$"), self.open_orders),
+            ("POST", re.compile(r"^/api/auth/validate$"), lambda **kwargs: (200, {"authorized": True})),
+        ]
+
+    # route handlers return (status, json body)
+    def search(self, query: dict, body: dict, **kwargs) -> Tuple[int, dict]:
+        page, size = int(query.get("page", 0)), int(query.get("size", 12))
+        brands = query.get("brands", "").split(",") if query.get("brands") else None
+        departments = query.get("departments", "").split(",") if query.get("departments") else None
+        matches = self.catalog.search(query.get("searchTerm", "*"), brands, departments,
+                                      (body or {}).get("categoryId"), (body or {}).get("subCategoryId"))
+        items = [self.catalog.search_item(index) for index in matches[page * size:(page + 1) * size]]
+        return 200, {"facets": self.catalog.facets(matches), "items": items,
+                     "page": page_info(page, size, len(items), len(matches))}
+
+    def item(self, item_number: str, **kwargs) -> Tuple[int, dict]:
+        index = self.catalog.index_of(item_number)
+        if index is None:
+            return 404, {"message": f"Item {item_number} not found"}
+        return 200, {"items": [self.catalog.product(index)]}
+
+    def brands_grouped(self, query: dict, **kwargs) -> Tuple[int, list]:
+        per_group = int(query.get("numPerGroup", 24))
+        groups: Dict[str, list] = {}
+        for brand in range(self.catalog.brand_count):
+            name = f"Brand{brand}"
+            groups.setdefault(name[0], []).append({"id": 30000 + brand, "name": name})
+        return 200, [{"name": letter, "brands": brands[:per_group]} for letter, brands in sorted(groups.items())]
+
+    def quantity_on_hand(self, body: dict, **kwargs) -> Tuple[int, dict]:
+        indexes = [self.catalog.index_of(code) for code in (body or {}).get("itemNumbers", [])]
+        return 200, {"quantitiesOnHand": [{"itemNumber": self.catalog.item_number(index),
+                                           "quantityOnHand": self.catalog.qty_on_hand(index)}
+                                          for index in indexes if index is not None]}
+
+    def pricing(self, body: dict, **kwargs) -> Tuple[int, dict]:
+        pricing, promotions = [], []
+        for code in (body or {}).get("itemNumbers", []):
+            index = self.catalog.index_of(code)
+            if index is None:
+                continue
+            pack_qty = 1 + index % 12
+            price = self.catalog.price(index)
+            pricing.append({"itemNumber": code, "netPrice": price, "netUnitPrice": round(price / pack_qty, 3)})
+            if index % 10 == 0:
+                promotions.append({"itemNumber": code, "promotions": [{
+                    "id": 60000000 + index, "promotionNumber": None, "startDate": "2022-02-26",
+                    "endDate": "2022-03-25", "discountValue": round(price * 0.1, 2), "discountType": "DOLLAR",
+                    "description": "Monthly Promotion", "requiredSrp": None, "paymentMethod": None, "minQty": None,
+                    "maxQty": None, "itemMaxQty": None}]})
+        return 200, {"pricing": pricing, "promotions": promotions}
+
+    def invoices(self, query: dict, **kwargs) -> Tuple[int, dict]:
+        page, size = int(query.get("page", 0)), int(query.get("size", 12))
+        numbers = range(self.catalog.invoice_count)[page * size:(page + 1) * size]
+        return 200, {"page": page_info(page, size, len(numbers), self.catalog.invoice_count),
+                     "invoices": [self.catalog.invoice_listing(number) for number in numbers]}
+
+    def invoice(self, invoice_number: str, **kwargs) -> Tuple[int, dict]:
+        for number in range(self.catalog.invoice_count):
+            if self.catalog.invoice_number(number) == invoice_number:
+                return 200, self.catalog.invoice(number)
+        return 404, {"message": f"Invoice {invoice_number} not found"}
+
+    def open_orders(self, **kwargs) -> Tuple[int, dict]:
+        return 200, {"openOrders": [self.catalog.open_order(number) for number in range(self.catalog.open_order_count)]}
+
+    def _admit(self) -> Optional[Tuple[int, dict, dict]]:
+        """
+        Apply the throttling and error injection settings. Returns an error response or None to continue.
+        Must be called with the lock held.
+        """
+        if self.max_in_flight and self.in_flight > self.max_in_flight:
+            return 503, {"message": "Too many concurrent requests"}, {}
+        if self.throttle_rate:
+            now = time.monotonic()
+            self._tokens = min(self.throttle_rate, self._tokens + (now - self._last_refill) * self.throttle_rate)
+            self._last_refill = now
+            if self._tokens < 1:
+                return 429, {"message": "Too many requests"}, {"Retry-After": "1"}
+            self._tokens -= 1
+        if self.error_rate and self.random.random() < self.error_rate:
+            return 502, {"message": "Injected error"}, {}
+        return None
+
+    def _delay(self) -> float:
+        if isinstance(self.latency, (tuple, list)):
+            return self.random.uniform(*self.latency)
+        return self.latency
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, dict]:
+        parts = urlsplit(path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(parts.path)
+            if route_method == method and match:
+                route = f"{method} {pattern.pattern}"
+                break
+        else:
+            match, handler = None, None
+            route = f"{method} other"
+        with self._lock:
+            self.route_counts[route] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            rejected = self._admit()
+            delay = self._delay()
+        status = 500
+        try:
+            if delay:
+                time.sleep(delay)
+            headers = {"Content-Type": "application/json"}
+            if rejected:
+                status, data, extra_headers = rejected
+                headers.update(extra_headers)
+            elif handler is None:
+                # page loads like /shopping/orders/invoices made before API calls
+                status, data = (200, None) if method == "GET" else (404, {"message": "Not found"})
+            else:
+                try:
+                    payload = json.loads(body) if body else None
+                except ValueError as e:
+                    status, data = 400, {"message": f"Invalid JSON body: {e}"}
+                else:
+                    try:
+                        status, data = handler(query=query, body=payload, **match.groupdict())
+                    except Exception as e:
+                        logger.exception("Mock handler for %s failed", route)
+                        status, data = 500, {"message": f"{type(e).__name__}: {e}"}
+            if data is None:
+                headers["Content-Type"] = "text/html"
+                content = b"<html></html>"
+            else:
+                content = json.dumps(data).encode("utf-8")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.status_counts[status] += 1
+        return status, content, headers
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in separate writes, without this keep-alive requests stall on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, content, headers = server.handle(self.command, self.path, body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                logger.debug("%s - %s", self.address_string(), format % args)
+
+        return Handler
+
+
+class RedirectingAdapter(PooledHTTPAdapter):
+    """
+    Transport adapter that sends requests for one base url to another, e.g. the live portal to a mock server.
+    """
+
+    def __init__(self, from_url: str, to_url: str, **kwargs):
+        self.from_url = from_url.rstrip("/")
+        self.to_url = to_url.rstrip("/")
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(self.from_url):
+            request.url = self.to_url + request.url[len(self.from_url):]
+        return super().send(request, **kwargs)
+
+
+def page_info(page: int, size: int, count: int, total: int) -> dict:
+    return {"size": size, "number": page, "numberOfElements": count, "totalElements": total,
+            "totalPages": -(-total // size) if size else 0, "isSorted": True}
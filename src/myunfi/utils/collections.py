@@ -66,6 +66,51 @@ def divide_chunks(l, n):
         yield l[i : i + n]
 
 
+def balanced_chunks(l: List[Any], max_size: int) -> List[List[Any]]:
+    """
+    Split a list into the fewest chunks of at most max_size items, with chunk sizes differing by at most one,
+    so batched requests finish at about the same time.
+
+    >>> [len(chunk) for chunk in balanced_chunks(list(range(1001)), 500)]
+    [334, 334, 333]
+    """
+    if not l:
+        return []
+    count = -(-len(l) // max_size)
+    size, extra = divmod(len(l), count)
+    chunks = []
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        chunks.append(l[start:end])
+        start = end
+    return chunks
+
+
+def pack_by_weight(weights: Dict[Any, int], capacity: int, max_items: int = None) -> List[List[Any]]:
+    """
+    Group the keys of weights so each group's weights add up to at most capacity, heaviest first into the first
+    group with room (first fit decreasing). A key heavier than capacity gets a group to itself.
+    max_items caps the number of keys in a group.
+
+    >>> pack_by_weight({"a": 6, "b": 5, "c": 4, "d": 3, "e": 2}, 10)
+    [['a', 'c'], ['b', 'd', 'e']]
+    """
+    groups: List[List[Any]] = []
+    totals: List[int] = []
+    for key in sorted(weights, key=weights.get, reverse=True):
+        for index, total in enumerate(totals):
+            if total + weights[key] <= capacity and (max_items is None or len(groups[index]) < max_items):
+                break
+        else:
+            index = len(groups)
+            groups.append([])
+            totals.append(0)
+        groups[index].append(key)
+        totals[index] += weights[key]
+    return groups
+
+
 def table_to_dicts(
     table: List[Any], header_row: int = 0, verbose: bool = False
 ) -> List[Dict]:
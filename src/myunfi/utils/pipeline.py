@@ -0,0 +1,194 @@
+"""
+Staged producer/consumer pipelines. Each stage runs its function on its own worker threads and hands results to
+the next stage through a bounded queue, so every stage works on whatever has arrived so far and a slow stage
+holds back the ones before it instead of letting work pile up in memory.
+Usage:
+    pipeline = Pipeline(iter_search(query, client), [
+        Stage("details", fetch_product, workers=10),
+        Stage("images", fetch_image, workers=4),
+    ])
+    for product in pipeline:
+        products.append(product)
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from myunfi.logger import get_logger
+
+logger = get_logger(__name__)
+
+# marks the end of a stage's input
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    - name: shown in logs and stats
+    - func: called with each item, its return value is passed on, None drops the item
+    - workers: threads running func
+    - queue_size: items waiting for this stage before the previous stage blocks, defaults to workers * 2
+    """
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: Optional[int] = None
+    processed: int = field(default=0, init=False)
+    dropped: int = field(default=0, init=False)
+    busy_time: float = field(default=0.0, init=False)
+
+    def stats(self) -> dict:
+        return {"processed": self.processed, "dropped": self.dropped, "busy_time": round(self.busy_time, 4)}
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class Pipeline:
+    """
+    Runs source through stages in order. Iterating the pipeline starts it and yields the last stage's results in
+    completion order. The source is iterated on its own thread, so a generator source (e.g. a search) overlaps with
+    the stages. The first exception raised by the source or any stage stops the pipeline and is re-raised by the
+    iterator, closing the iterator early cancels the pipeline.
+    """
+
+    def __init__(self, source: Iterable[Any], stages: List[Stage], output_size: int = None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.source = source
+        self.stages = stages
+        self.queues = [queue.Queue(stage.queue_size or stage.workers * 2) for stage in stages]
+        self.queues.append(queue.Queue(output_size or stages[-1].workers * 2))
+        self.source_count = 0
+        # workers still running per stage, the last one to finish ends the next stage's input
+        self._running = [stage.workers for stage in stages]
+        self._cancelled = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.run()
+
+    def run(self) -> Iterator[Any]:
+        self._start()
+        output = self.queues[-1]
+        try:
+            while True:
+                item = self._get(output)
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self.cancel()
+            for thread in self._threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def stats(self) -> dict:
+        return {"source": self.source_count, **{stage.name: stage.stats() for stage in self.stages}}
+
+    def _start(self):
+        self._threads.append(threading.Thread(target=self._feed, name="pipeline-source", daemon=True))
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._work, args=(index,), daemon=True,
+                                                      name=f"pipeline-{stage.name}-{number}"))
+        for thread in self._threads:
+            thread.start()
+
+    def _feed(self):
+        try:
+            for item in self.source:
+                self.source_count += 1
+                self._put(self.queues[0], item)
+        except PipelineCancelled:
+            if hasattr(self.source, "close"):
+                self.source.close()
+            return
+        except BaseException as e:
+            self._fail(e, "source")
+            return
+        for _ in range(self.stages[0].workers):
+            self._put_quietly(self.queues[0], _DONE)
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        inbox, outbox = self.queues[index], self.queues[index + 1]
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _DONE:
+                    break
+                start = time.perf_counter()
+                result = stage.func(item)
+                with self._lock:
+                    stage.busy_time += time.perf_counter() - start
+                    stage.processed += 1
+                    if result is None:
+                        stage.dropped += 1
+                if result is not None:
+                    self._put(outbox, result)
+        except PipelineCancelled:
+            return
+        except BaseException as e:
+            self._fail(e, stage.name)
+            return
+        with self._lock:
+            self._running[index] -= 1
+            last = self._running[index] == 0
+        if last:
+            next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            for _ in range(next_workers):
+                self._put_quietly(outbox, _DONE)
+            logger.debug(f"Pipeline stage {stage.name} finished: {stage.stats()}")
+
+    def _fail(self, error: BaseException, name: str):
+        with self._lock:
+            if self._error is None:
+                logger.error(f"Pipeline stage {name} failed: {error!r}")
+                self._error = error
+        self._cancelled.set()
+        # wake the consumer of the output queue
+        self._put_quietly(self.queues[-1], _DONE)
+
+    def _get(self, q: queue.Queue) -> Any:
+        while True:
+            if self._cancelled.is_set() and q is not self.queues[-1]:
+                raise PipelineCancelled()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._cancelled.is_set():
+                    if q is self.queues[-1]:
+                        return _DONE
+                    raise PipelineCancelled()
+
+    def _put(self, q: queue.Queue, item: Any):
+        while True:
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _put_quietly(self, q: queue.Queue, item: Any):
+        try:
+            self._put(q, item)
+        except PipelineCancelled:
+            try:
+                q.put_nowait(item)
+            except queue.Full:
+                pass
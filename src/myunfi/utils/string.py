@@ -1,7 +1,10 @@
 import re
+from bisect import bisect_left, insort
+from collections import defaultdict
 from pathlib import Path
 from string import hexdigits
-from typing import Any, Iterable, List, Union
+from typing import Any, Callable, Dict, Iterable, List, Union
+from urllib.parse import quote_plus
 from myunfi.config import abbreviations_file
 import csv
 
@@ -267,28 +270,48 @@ def remove_escaped_characters(s: str) -> str:
     return re.sub(r'([\n\t\r]|[\\]+(n|t|r))', '', s)
 
 
-def divide_list_into_chunks_by_character_limit(query: List[str], max_chars: int) -> List[List[str]]:
+def pack_query_terms(terms: Iterable[str], max_length: int, separator: str = " ",
+                     quote: Callable[[str], str] = quote_plus) -> List[List[str]]:
     """
-    Divides a list into chunks of max_chars length.
-
-    Args:
-        query (list): a list of strings
-        max_chars (int): number to divide the list into
-
-    Returns:
-        List[List[str]]: a list of lists of strings limited to max_chars length
+    Packs search terms into as few queries as possible, each no longer than max_length once joined with separator
+    and url encoded with quote (how requests encodes query parameters).
+    Terms are placed longest first into the query with the least room they still fit in (best fit decreasing).
+    Terms are bucketed by encoded length and open queries are indexed by the room left in them, so packing is
+    linear in the number of terms. Duplicate and empty terms are dropped, a term too long for any query gets one
+    to itself.
+
+    >>> pack_query_terms(["aaaa", "bb", "cc", "dddd", "bb"], 9)
+    [['aaaa', 'dddd'], ['bb', 'cc']]
+    >>> pack_query_terms(["a&b", "cd"], 6)
+    [['a&b'], ['cd']]
     """
-    chunks = []
-    chunk = []
-    for term in query:
-        chunk_str = " ".join(chunk)
-        if len(chunk_str + " " + term) > max_chars:
-            print(f"Chunk: {chunk_str}\nLength: {len(chunk_str)}")
-            chunks.append(chunk)
-            chunk = [term]
-        else:
-            chunk.append(term)
-
-    if chunk:
-        chunks.append(chunk)
+    separator_length = len(quote(separator))
+    # every term pays for one separator, the last one in a query gets it back from the extra capacity
+    capacity = max_length + separator_length
+    terms_by_cost: Dict[int, List[str]] = defaultdict(list)
+    for term in dict.fromkeys(terms):
+        if term:
+            terms_by_cost[len(quote(term)) + separator_length].append(term)
+    chunks: List[List[str]] = []
+    chunks_by_room: Dict[int, List[int]] = defaultdict(list)
+    rooms: List[int] = []  # sorted room values that have open queries
+    for cost in sorted(terms_by_cost, reverse=True):
+        for term in terms_by_cost[cost]:
+            if cost > capacity:
+                chunks.append([term])
+                continue
+            position = bisect_left(rooms, cost)
+            if position < len(rooms):
+                room = rooms[position]
+                index = chunks_by_room[room].pop()
+                if not chunks_by_room[room]:
+                    del rooms[position]
+            else:
+                room, index = capacity, len(chunks)
+                chunks.append([])
+            chunks[index].append(term)
+            room -= cost
+            if not chunks_by_room[room]:
+                insort(rooms, room)
+            chunks_by_room[room].append(index)
     return chunks
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import asyncio
 import concurrent.futures.thread
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed, ProcessPoolExecutor
@@ -136,6 +137,45 @@ def run_executor(
     return results
 
 
+async def async_threader(
+        func,
+        args,
+        fn_args=(),
+        fn_kwargs=None,
+        callback=None,
+        max_concurrency=100,
+) -> list[Any]:
+    """
+    asyncio counterpart of threader. Runs the coroutine function for every item in args on the
+    current event loop with at most max_concurrency calls in flight.
+    Results are returned in completion order, same as threader.
+
+    Args:
+    func:              The coroutine function to be run.
+    args:              The data to be passed to the function.
+
+    Kwargs:
+    fn_args:           The arguments to be passed to the function.
+    fn_kwargs:         The keyword arguments to be passed to the function.
+    callback:          The callback function to be run after each call completes.
+    max_concurrency:   The maximum number of calls in flight. default: 100
+    """
+    fn_kwargs = fn_kwargs or dict()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(arg):
+        async with semaphore:
+            return await func(arg, *fn_args, **fn_kwargs)
+
+    results = []
+    for future in asyncio.as_completed([run_one(arg) for arg in args]):
+        result = await future
+        if callback:
+            callback(result)
+        results.append(result)
+    return results
+
+
 def shutdown_executor(executor: Union[ThreadPoolExecutor, ProcessPoolExecutor]):
     """
     This function shuts down the executor.